@@ -0,0 +1,105 @@
+"""
+Synthetic Kustomer search and message payloads shaped like the real API responses, for offline benchmarks.
+"""
+import random
+from datetime import datetime, timedelta
+from typing import Dict, List, Tuple
+
+BOT_BOILERPLATE = [
+    "To help with that, I'll need to verify your account. Could you please provide the phone number associated with your order?",
+    "Thanks! I've sent a verification code to your phone number. Please enter the 6-digit verification code here.",
+    "You're verified. Let me look up your order details.",
+    "I'm sorry, but I can only help with questions about Gametime orders and events.",
+    "Is there anything else I can help you with today?",
+]
+
+USER_MESSAGES = [
+    "I can't find my tickets",
+    "Where are my tickets for tonight's game? The event starts in two hours and nothing shows in the app.",
+    "I need to cancel my order",
+    "yes",
+    "thanks",
+    "Can you write me a poem about baseball?",
+    "My card was charged twice for the same order, can I get a refund?",
+]
+
+
+def _message(msg_id: str, convo_id: str, customer_id: str, direction: str, text: str, sent_at: datetime) -> Dict:
+    timestamp = sent_at.strftime("%Y-%m-%dT%H:%M:%S.%fZ")
+    return {
+        "type": "message",
+        "id": msg_id,
+        "attributes": {
+            "channel": "chat",
+            "app": "chat",
+            "size": len(text),
+            "direction": direction,
+            "directionType": "initial-in" if direction == "in" else "response-out",
+            "preview": text[:100],
+            "body": text,
+            "subject": None,
+            "meta": {"chatStatus": "sent", "lang": "en"},
+            "status": "received" if direction == "in" else "sent",
+            "assignedTeams": [],
+            "assignedUsers": [],
+            "auto": direction == "out",
+            "sentAt": timestamp,
+            "createdAt": timestamp,
+            "updatedAt": timestamp,
+            "redacted": False,
+            "createdByTeams": [],
+            "sentiment": {"polarity": 0, "confidence": 0.9},
+            "reactions": [],
+        },
+        "relationships": {
+            "customer": {"data": {"type": "customer", "id": customer_id}},
+            "conversation": {"data": {"type": "conversation", "id": convo_id}},
+            "createdBy": {"data": {"type": "user", "id": customer_id if direction == "in" else "bot-user"}},
+            "org": {"data": {"type": "org", "id": "org-1"}},
+        },
+        "links": {"self": f"/v1/messages/{msg_id}"},
+    }
+
+
+def make_payloads(num_conversations: int, seed: int = 7, irregular: bool = False) -> Tuple[List[Dict], Dict[str, List[Dict]]]:
+    """
+    Build a day's worth of synthetic search results and per-conversation message payloads.
+    Args:
+        num_conversations (int): Number of conversations.
+        seed (int): RNG seed, so runs are comparable.
+        irregular (bool): Include consecutive same-direction messages and trailing user messages.
+    Returns:
+        tuple: (search result conversation dicts, {convo_id: [message dicts]})
+    """
+    rng = random.Random(seed)
+    search_results = []
+    messages_by_convo = {}
+    start = datetime(2026, 1, 1, 8)
+    for c in range(num_conversations):
+        convo_id = f"convo{c:07d}"
+        customer_id = f"customer{c:07d}"
+        search_results.append({
+            "type": "conversation",
+            "id": convo_id,
+            "attributes": {
+                "name": rng.choice(USER_MESSAGES), "status": "done", "messageCount": 0,
+                "channels": ["chat"], "tags": [], "createdAt": start.isoformat(), "preview": rng.choice(USER_MESSAGES),
+            },
+            "relationships": {"customer": {"data": {"type": "customer", "id": customer_id}}},
+        })
+        sent_at = start + timedelta(seconds=c * 37)
+        messages = []
+        for t in range(rng.randint(2, 8)):
+            directions = ["in", "out"]
+            if irregular and rng.random() < 0.3:
+                directions = ["in", "in", "out"] if rng.random() < 0.5 else ["in", "out", "out"]
+            for direction in directions:
+                text = rng.choice(USER_MESSAGES) if direction == "in" else rng.choice(BOT_BOILERPLATE)
+                sent_at += timedelta(seconds=rng.randint(5, 90))
+                messages.append(_message(f"{convo_id}m{len(messages):03d}", convo_id, customer_id, direction, text, sent_at))
+        if irregular and rng.random() < 0.2:
+            sent_at += timedelta(seconds=30)
+            messages.append(_message(f"{convo_id}m{len(messages):03d}", convo_id, customer_id, "in", "hello?", sent_at))
+        search_results[-1]["attributes"]["messageCount"] = len(messages)
+        messages_by_convo[convo_id] = messages
+    return search_results, messages_by_convo
@@ -0,0 +1,56 @@
+#!/usr/bin/env python3
+"""
+Offline throughput benchmark for the nightly pipeline. Replays a cassette recorded from a real nightly run
+(EVALUATOR_CASSETTE_MODE=record) with injected latency and error rate, and reports the time spent searching,
+fetching and converting messages, and judging. Injected latency and errors are seeded, so two runs with the
+same settings see exactly the same failures and delays.
+"""
+import time
+import argparse
+from evaluator_service.kustomer_client import KustomerClient
+from core.cassette import Cassette
+from core.test_case_builder import TestCaseBuilder
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the nightly pipeline against a recorded cassette")
+    parser.add_argument("--cassette", required=True, help="Cassette recorded from a nightly run")
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="Injected base latency per call")
+    parser.add_argument("--jitter-ms", type=float, default=0.0, help="Injected extra latency, up to this much per call")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of calls that fail")
+    parser.add_argument("--seed", type=int, default=0, help="Seed for injected latency and errors")
+    parser.add_argument("--max-workers", type=int, default=KustomerClient.DEFAULT_MAX_WORKERS,
+                        help="Concurrent Kustomer requests")
+    parser.add_argument("--batch-size", type=int, default=500, help="Conversations per evaluate() call")
+    parser.add_argument("--no-judge", action="store_true", help="Stop after building transcripts")
+    args = parser.parse_args(argv)
+
+    cassette = Cassette(args.cassette, mode="replay", latency_ms=args.latency_ms, latency_jitter_ms=args.jitter_ms,
+                        error_rate=args.error_rate, seed=args.seed)
+    kustomer = KustomerClient(api_key="replay", assigned_user_id=None, queue_id=None,
+                              max_workers=args.max_workers, cassette=cassette)
+
+    start = time.perf_counter()
+    convo_ids = [convo.get("id") for convo in kustomer.fetch_yesterdays_conversations() if convo.get("id")]
+    search_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    store = TestCaseBuilder.kustomer_payloads_to_store(kustomer.fetch_conversations(convo_ids))
+    fetch_seconds = time.perf_counter() - start
+
+    print(f"search:        {search_seconds:8.2f}s, {len(convo_ids)} conversations")
+    print(f"fetch+convert: {fetch_seconds:8.2f}s, {len(store)} transcripts "
+          f"({len(convo_ids) - len(store)} lost to errors or empty), {len(store) / fetch_seconds:,.1f} convos/s")
+    if args.no_judge or not len(store):
+        return
+
+    from core.evaluator import ConversationEvaluator
+
+    evaluator = ConversationEvaluator(deepeval_api_key=None, cassette=cassette)
+    start = time.perf_counter()
+    results = evaluator.evaluate_store(store, batch_size=args.batch_size)
+    judge_seconds = time.perf_counter() - start
+    print(f"judge:         {judge_seconds:8.2f}s, {len(results.test_results)} results, "
+          f"{len(store) / judge_seconds:,.1f} convos/s")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+"""
+Memory benchmark for holding a night's conversations before evaluation.
+Compares the previous pipeline (search results, transcript dicts and ConversationalTestCase objects for every
+conversation alive at once) with the TranscriptStore pipeline (raw payloads released per conversation, test
+cases materialized one batch at a time).
+"""
+import gc
+import json
+import argparse
+import tracemalloc
+from core.evaluator import DEFAULT_BATCH_SIZE
+from core.test_case_builder import TestCaseBuilder
+from scripts.benchmarks.kustomer_payloads import make_payloads
+
+def encoded_payloads(num_conversations):
+    """Serialize payloads so each run decodes fresh, unshared strings like real API responses."""
+    search_results, messages_by_convo = make_payloads(num_conversations)
+    return json.dumps({"data": search_results}), {
+        convo_id: json.dumps({"data": messages}) for convo_id, messages in messages_by_convo.items()
+    }
+
+def run_previous(search_body, message_bodies):
+    conversations_data = json.loads(search_body)["data"]
+    test_cases = []
+    for convo in conversations_data:
+        convo_id = convo.get("id")
+        messages = json.loads(message_bodies[convo_id])["data"]
+        transcript = TestCaseBuilder.kustomer_messages_to_transcript(messages)
+        if transcript:
+            test_cases.append(TestCaseBuilder.build_conversation_test_case(transcript, convo_id))
+    return conversations_data, test_cases
+
+def run_store(search_body, message_bodies, batch_size):
+    conversations_data = json.loads(search_body)["data"]
+    convo_ids = [convo.get("id") for convo in conversations_data if convo.get("id")]
+    del conversations_data
+    store = TestCaseBuilder.kustomer_payloads_to_store(
+        (convo_id, json.loads(message_bodies[convo_id])["data"]) for convo_id in convo_ids
+    )
+    # Materialize the first batch, as evaluate_store would immediately before judging it
+    batch = next(store.iter_batches(batch_size))
+    test_cases = [TestCaseBuilder.build_test_case_from_turns(turns, convo_id) for convo_id, turns in batch]
+    return store, test_cases
+
+def measure(fn, *args):
+    gc.collect()
+    tracemalloc.start()
+    result = fn(*args)
+    retained, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del result
+    return retained, peak
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark transcript memory before and after TranscriptStore")
+    parser.add_argument("--conversations", type=int, default=20000, help="Number of synthetic conversations")
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE, help="Evaluation batch size")
+    args = parser.parse_args(argv)
+
+    search_body, message_bodies = encoded_payloads(args.conversations)
+    mib = 1024 * 1024
+    before = measure(run_previous, search_body, message_bodies)
+    after = measure(run_store, search_body, message_bodies, args.batch_size)
+    print(f"{args.conversations} conversations")
+    print(f"previous pipeline: retained {before[0] / mib:8.1f} MiB, peak {before[1] / mib:8.1f} MiB")
+    print(f"transcript store:  retained {after[0] / mib:8.1f} MiB, peak {after[1] / mib:8.1f} MiB")
+    print(f"retained memory reduced {before[0] / max(after[0], 1):.1f}x")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,40 @@
+#!/usr/bin/env python3
+"""
+Throughput benchmark for converting a day's Kustomer message payloads into transcripts.
+Compares the adjacent-pair converter with the batched TranscriptStore builder on payloads that include
+consecutive same-direction messages and trailing user messages, and reports messages kept and messages/second.
+"""
+import time
+import argparse
+from core.test_case_builder import TestCaseBuilder
+from scripts.benchmarks.kustomer_payloads import make_payloads
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark Kustomer-to-transcript conversion throughput")
+    parser.add_argument("--conversations", type=int, default=50000, help="Number of synthetic conversations")
+    parser.add_argument("--repeat", type=int, default=3, help="Timed runs (best is reported)")
+    args = parser.parse_args(argv)
+
+    _, messages_by_convo = make_payloads(args.conversations, irregular=True)
+    num_messages = sum(len(messages) for messages in messages_by_convo.values())
+
+    pair_times = []
+    for _ in range(args.repeat):
+        start = time.perf_counter()
+        transcripts = [TestCaseBuilder.kustomer_messages_to_transcript(messages) for messages in messages_by_convo.values()]
+        pair_times.append(time.perf_counter() - start)
+    pair_kept = sum(2 * len(transcript) for transcript in transcripts)
+
+    store_times = []
+    for _ in range(args.repeat):
+        start = time.perf_counter()
+        store = TestCaseBuilder.kustomer_payloads_to_store(messages_by_convo)
+        store_times.append(time.perf_counter() - start)
+
+    print(f"{args.conversations} conversations, {num_messages} messages")
+    print(f"adjacent pairs:   {num_messages / min(pair_times):>12,.0f} msg/s, {pair_kept} messages kept")
+    print(f"transcript store: {num_messages / min(store_times):>12,.0f} msg/s, all {num_messages} messages kept "
+          f"in {store.num_turns} merged turns")
+
+if __name__ == "__main__":
+    main()
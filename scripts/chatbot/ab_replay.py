@@ -0,0 +1,160 @@
+#!/usr/bin/env python3
+"""
+Paired A/B comparison of chatbot versions. Simulated user scripts are generated once per intention (with
+deepeval's ConversationSimulator) and stored; every run replays the stored scripts verbatim against each
+chatbot version concurrently, scores the resulting conversations with a verdict cache shared across versions
+and runs, and reports per-version score deltas on identical inputs.
+"""
+import os
+import sys
+import csv
+import time
+import logging
+import argparse
+from datetime import datetime
+from dotenv import load_dotenv
+from core.ab_replay import (
+    DEFAULT_SCORE_CACHE_PATH,
+    DEFAULT_SCRIPTS_PATH,
+    ScoreCache,
+    ScriptStore,
+    add_simulated_conversations,
+    paired_deltas,
+    replay_scripts,
+    score_replays,
+)
+from core.evaluator import ConversationEvaluator, JudgeConfig, METRIC_DEFINITIONS
+from scripts.chatbot.simulate_convo import ConversationGenerator, DEFAULT_API_URL
+
+def parse_version(value):
+    name, sep, url = value.partition("=")
+    if not sep or not name or not url:
+        raise argparse.ArgumentTypeError(f"expected NAME=URL, got {value!r}")
+    return name, url
+
+def record_scripts(store, generator, intentions, scripts_per_intention, min_turns, max_turns):
+    """
+    Top up the store to scripts_per_intention scripts for each intention.
+    Returns:
+        int: Number of new scripts.
+    """
+    missing = {intention: scripts_per_intention - store.count(intention) for intention in intentions}
+    missing = {intention: count for intention, count in missing.items() if count > 0}
+    if not missing:
+        return 0
+    test_cases = generator.generate_conversations(min_turns=min_turns, max_turns=max_turns, user_intentions=missing)
+    added = add_simulated_conversations(store, test_cases)
+    store.save()
+    return added
+
+def write_report(report, output_dir):
+    os.makedirs(output_dir, exist_ok=True)
+    csv_path = os.path.join(output_dir, f"ab_replay_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv")
+    with open(csv_path, 'w', newline='') as csvfile:
+        writer = csv.writer(csvfile)
+        writer.writerow(['script_id', 'intention', 'version', 'metric_name', 'baseline_score', 'score', 'delta',
+                         'baseline_success', 'success', 'reason'])
+        for row in report["rows"]:
+            writer.writerow([row["script_id"], row["intention"], row["version"], row["metric"],
+                             row["baseline_score"], row["score"], f"{row['delta']:+.3f}",
+                             row["baseline_success"], row["success"], row["reason"]])
+    return csv_path
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Replay stored simulated users against chatbot versions and "
+                                                 "compare their scores on identical inputs")
+    parser.add_argument("--version", action="append", dest="versions", type=parse_version, metavar="NAME=URL",
+                        help="Chatbot version to replay against (repeatable). The first is the baseline. "
+                             f"Defaults to staging={DEFAULT_API_URL}")
+    parser.add_argument("--scripts", default=DEFAULT_SCRIPTS_PATH, help="Stored user scripts")
+    parser.add_argument("--scripts-per-intention", type=int, default=0,
+                        help="Generate scripts against the baseline until each intention has this many")
+    parser.add_argument("--min-turns", type=int, default=5, help="Minimum turns per generated script")
+    parser.add_argument("--max-turns", type=int, default=20, help="Maximum turns per generated script")
+    parser.add_argument("--intention", action="append", dest="intentions",
+                        help="Only replay scripts for this intention (repeatable). Defaults to every intention "
+                             "of ConversationGenerator")
+    parser.add_argument("--per-intention", type=int, default=None, help="Replay at most this many scripts per intention")
+    parser.add_argument("--concurrency", type=int, default=16, help="Conversations replayed at once")
+    parser.add_argument("--metric", action="append", dest="metrics", choices=list(METRIC_DEFINITIONS),
+                        help="Metric to score (repeatable). Defaults to every metric.")
+    parser.add_argument("--judge", help="Judge model (defaults to deepeval's default model)")
+    parser.add_argument("--score-cache", default=DEFAULT_SCORE_CACHE_PATH, help="Verdict cache shared across runs")
+    parser.add_argument("--no-score-cache", action="store_true", help="Only share verdicts within this run")
+    parser.add_argument("--output-dir", default="deepeval_results/ab_replay", help="Where the paired CSV is written")
+    parser.add_argument("--max-regression", type=float, default=None,
+                        help="Exit non-zero if any version's mean score delta is below minus this value")
+    args = parser.parse_args(argv)
+
+    load_dotenv()
+    # Per-request logging from ConversationGenerator would drown out the report
+    logging.getLogger("scripts.chatbot.simulate_convo").setLevel(logging.WARNING)
+    version_list = args.versions or [("staging", DEFAULT_API_URL)]
+    versions = dict(version_list)
+    if len(versions) < len(version_list):
+        print("Version names must be unique.")
+        sys.exit(1)
+    metric_names = args.metrics or list(METRIC_DEFINITIONS)
+    generators = {name: ConversationGenerator(api_url=url, max_connections=args.concurrency)
+                  for name, url in versions.items()}
+    baseline = next(iter(versions))
+    intentions = args.intentions or generators[baseline].user_intentions
+
+    store = ScriptStore(args.scripts)
+    if args.scripts_per_intention:
+        start = time.perf_counter()
+        added = record_scripts(store, generators[baseline], intentions, args.scripts_per_intention,
+                               args.min_turns, args.max_turns)
+        print(f"Generated {added} new scripts in {time.perf_counter() - start:.1f}s")
+    scripts = store.select(intentions, args.per_intention)
+    if not scripts:
+        print(f"No stored scripts for {', '.join(intentions)}; run with --scripts-per-intention to generate some.")
+        sys.exit(1)
+
+    start = time.perf_counter()
+    replays = replay_scripts(scripts, {name: g.send_message for name, g in generators.items()}, args.concurrency)
+    messages = sum(len(r["latencies"]) for r in replays)
+    print(f"Replayed {len(scripts)} scripts against {len(versions)} versions ({messages} messages) "
+          f"in {time.perf_counter() - start:.1f}s")
+
+    cache = ScoreCache(None if args.no_score_cache else args.score_cache, judge=args.judge)
+    evaluator = ConversationEvaluator(deepeval_api_key=os.getenv("DEEPEVAL_API_KEY"), metric_names=metric_names,
+                                      judges=JudgeConfig(judge=args.judge))
+    start = time.perf_counter()
+    judged = score_replays(replays, evaluator, cache, metric_names)
+    cache.save()
+    scored = sum(len(r.get("scores", {})) for r in replays)
+    print(f"Judged {judged} of {scored} conversation scores in {time.perf_counter() - start:.1f}s "
+          f"({scored - judged} shared or cached)")
+
+    report = paired_deltas(replays, list(versions), metric_names)
+    print("Per version:")
+    for (version, name), stats in report["versions"].items():
+        mean = "n/a" if stats["mean"] is None else f"{stats['mean']:.3f}"
+        rate = "n/a" if stats["pass_rate"] is None else f"{stats['pass_rate']:.1%}"
+        print(f"  {version} {name}: mean {mean}, pass rate {rate} over {stats['n']} "
+              f"({stats['errored']} replays failed)")
+    failed = []
+    if len(versions) > 1:
+        print(f"Paired deltas against {baseline}:")
+    for (version, name), delta in report["deltas"].items():
+        if delta["mean_delta"] is None:
+            print(f"  {version} {name}: no paired scores")
+            continue
+        ci = "" if delta["ci95"] is None else f" ± {delta['ci95']:.3f}"
+        print(f"  {version} {name}: {delta['mean_delta']:+.3f}{ci} over {delta['n']} scripts "
+              f"({delta['wins']} better, {delta['losses']} worse, {delta['regressions']} newly failing, "
+              f"{delta['fixes']} newly passing)")
+        for intention, value in sorted(delta["by_intention"].items()):
+            print(f"    {intention}: {value:+.3f}")
+        if args.max_regression is not None and delta["mean_delta"] < -args.max_regression:
+            failed.append(f"{version} {name}")
+    if report["rows"]:
+        print(f"Wrote paired scores to {write_report(report, args.output_dir)}")
+
+    if failed:
+        print(f"Regressed by more than {args.max_regression}: {', '.join(failed)}")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+"""
+Backfill script for chatbot evaluation. Re-scores historical Kustomer conversations over a date range,
+one day per work unit, with a bounded pool of worker processes. Days already completed under the same
+metric version (metric definitions and judge settings) are skipped, so an interrupted backfill resumes where it
+stopped. Results are recorded in the trend index under the "backfill" source, apart from the nightly runs.
+"""
+import os
+import sys
+import json
+import argparse
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import date, datetime, timedelta
+from dotenv import load_dotenv
+from evaluator_service.kustomer_client import KustomerClient
+from core.test_case_builder import TestCaseBuilder
+from core.evaluator import (
+    ConversationEvaluator, DEFAULT_CASCADE_MARGIN, JudgeConfig, METRIC_DEFINITIONS, metric_version,
+)
+from core.reporter import EvaluationReporter
+from core.trend_index import BACKFILL_SOURCE, TrendIndex
+
+DEFAULT_OUTPUT_DIR = "deepeval_results/backfill"
+
+def manifest_path(output_dir, version, day):
+    return os.path.join(output_dir, version, f"{day.isoformat()}.json")
+
+def eval_csv_path(output_dir, version, day):
+    # Same eval_results_<timestamp>.csv naming as the nightly report, stamped at the start of the day
+    return os.path.join(output_dir, version, f"eval_results_{day.strftime('%Y%m%d')}_000000.csv")
+
+def run_day(day_iso, metric_names, output_dir, judges):
+    """
+    Evaluate one day of conversations. Runs in a worker process, since deepeval keeps per-process
+    global test run state and cannot evaluate concurrently within one process. The day also runs in its own
+    working directory under output_dir, which must therefore be an absolute path.
+    Returns:
+        dict: The day's manifest (day, metric version, conversation count, result CSV).
+    """
+    load_dotenv()
+    day = date.fromisoformat(day_iso)
+    version = metric_version(metric_names, judges)
+    # deepeval keeps the in-progress test run in .deepeval/ under the working directory (created when deepeval is
+    # first imported), so each day gets its own to keep concurrent workers from overwriting each other's
+    from deepeval.constants import HIDDEN_DIR
+
+    workdir = os.path.join(output_dir, version, "workdirs", day_iso)
+    os.makedirs(os.path.join(workdir, HIDDEN_DIR), exist_ok=True)
+    os.chdir(workdir)
+    kustomer = KustomerClient(
+        api_key=os.getenv("KUSTOMER_API_KEY"),
+        assigned_user_id=os.getenv("KUSTOMER_ASSIGNED_USER_ID"),
+        queue_id=os.getenv("KUSTOMER_QUEUE_ID"),
+    )
+    convo_ids = [convo.get("id") for convo in kustomer.fetch_conversations_for_date(day) if convo.get("id")]
+    # A failed message fetch fails the day, so it is retried rather than recorded as done without those conversations
+    store = TestCaseBuilder.kustomer_payloads_to_store(kustomer.fetch_conversations(convo_ids, raise_errors=True))
+
+    eval_csv = None
+    if len(store):
+        evaluator = ConversationEvaluator(deepeval_api_key=os.getenv("DEEPEVAL_API_KEY"), metric_names=metric_names,
+                                          judges=judges)
+        results = evaluator.evaluate_store(store)
+        eval_csv = eval_csv_path(output_dir, version, day)
+        EvaluationReporter.write_evaluation_results_to_csv(results, eval_csv)
+
+    manifest = {
+        "day": day_iso,
+        "metric_version": version,
+        "metrics": metric_names,
+        "judge": judges.judge,
+        "cascade_judge": judges.cascade_judge,
+        "conversations": len(store),
+        "eval_csv": eval_csv,
+        "completed_at": datetime.now().isoformat(timespec="seconds"),
+    }
+    # The manifest is written last and atomically: its presence is what marks the day as done
+    path = manifest_path(output_dir, version, day)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(f"{path}.tmp", "w") as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(f"{path}.tmp", path)
+    return manifest
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Re-score historical conversations over a date range")
+    parser.add_argument("--start", required=True, type=date.fromisoformat, help="First day (YYYY-MM-DD)")
+    parser.add_argument("--end", required=True, type=date.fromisoformat, help="Last day, inclusive (YYYY-MM-DD)")
+    parser.add_argument("--workers", type=int, default=4, help="Days processed in parallel")
+    parser.add_argument("--metric", action="append", dest="metrics",
+                        help="Metric to score (repeatable). Defaults to every metric.")
+    parser.add_argument("--output-dir", default=DEFAULT_OUTPUT_DIR, help="Where per-day results are written")
+    parser.add_argument("--force", action="store_true", help="Re-run days already completed under this metric version and judge")
+    parser.add_argument("--judge", help="Strong judge model (defaults to deepeval's default model)")
+    parser.add_argument("--cascade-judge", help="Small judge model; enables cascade mode")
+    parser.add_argument("--cascade-margin", type=float, default=DEFAULT_CASCADE_MARGIN,
+                        help="Escalate small-judge scores within this distance of the threshold")
+    args = parser.parse_args(argv)
+
+    if args.end < args.start:
+        parser.error("--end must not be before --start")
+
+    load_dotenv()
+    metric_names = args.metrics or list(METRIC_DEFINITIONS)
+    judges = JudgeConfig.from_args(args)
+    version = metric_version(metric_names, judges)
+    days = [args.start + timedelta(days=i) for i in range((args.end - args.start).days + 1)]
+    pending = [day for day in days if args.force or not os.path.exists(manifest_path(args.output_dir, version, day))]
+    print(f"Metric version {version}: {len(days)} days in range, {len(days) - len(pending)} already complete, "
+          f"{len(pending)} to run with {args.workers} workers")
+
+    trend_index = TrendIndex()
+    output_dir = os.path.abspath(args.output_dir)
+    failed = []
+    with ProcessPoolExecutor(max_workers=args.workers) as executor:
+        futures = {executor.submit(run_day, day.isoformat(), metric_names, output_dir, judges): day
+                   for day in pending}
+        for future in as_completed(futures):
+            day = futures[future]
+            try:
+                manifest = future.result()
+            except Exception as e:
+                failed.append(day)
+                print(f"{day}: failed ({str(e)}); it will be retried on the next run")
+                continue
+            if manifest["eval_csv"]:
+                trend_index.record_run(
+                    f"backfill_{version}_{day.isoformat()}",
+                    TrendIndex.metric_rows_from_csv(manifest["eval_csv"]),
+                    run_date=day,
+                    run_at=datetime.combine(day, datetime.min.time()),
+                    source=BACKFILL_SOURCE,
+                )
+            print(f"{day}: {manifest['conversations']} conversations -> {manifest['eval_csv'] or 'no results'}")
+    trend_index.close()
+
+    if failed:
+        print(f"{len(failed)} days failed: {', '.join(str(day) for day in sorted(failed))}")
+        sys.exit(1)
+    print("Backfill complete.")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+"""
+Agreement study for the judge cascade. Scores the same conversations with both the small and the strong judge,
+then replays the cascade decision at several margins to show, for each margin, how many results would be escalated
+and how often the cascade's pass/fail verdict would differ from the strong judge's.
+"""
+import os
+import sys
+import csv
+import argparse
+from datetime import date
+from dotenv import load_dotenv
+from core.test_case_builder import TestCaseBuilder
+from core.evaluator import ConversationEvaluator, JudgeConfig, UNCERTAIN_MARKER
+from core.cassette import Cassette
+
+DEFAULT_MARGINS = "0,0.05,0.1,0.15,0.2,0.3"
+
+def load_test_cases(args):
+    if args.date:
+        from evaluator_service.kustomer_client import KustomerClient
+
+        kustomer = KustomerClient(
+            api_key=os.getenv("KUSTOMER_API_KEY"),
+            assigned_user_id=os.getenv("KUSTOMER_ASSIGNED_USER_ID"),
+            queue_id=os.getenv("KUSTOMER_QUEUE_ID"),
+            cassette=args.cassette,
+        )
+        convo_ids = [convo.get("id") for convo in kustomer.fetch_conversations_for_date(args.date) if convo.get("id")]
+        store = TestCaseBuilder.kustomer_payloads_to_store(kustomer.fetch_conversations(convo_ids[:args.limit]))
+        return [TestCaseBuilder.build_test_case_from_turns(turns, convo_id) for convo_id, turns in store]
+    return TestCaseBuilder.parse_simulated_conversations_csv(args.csv)[:args.limit]
+
+def paired_rows(test_cases, small_results, strong_results):
+    """
+    One row per (conversation, metric) scored by both judges.
+    """
+    rows = []
+    for index in sorted(small_results):
+        if index not in strong_results:
+            continue
+        strong = {m.name: m for m in strong_results[index].metrics_data or []}
+        convo_id = (test_cases[index].additional_metadata or {}).get("convo_id")
+        for small in small_results[index].metrics_data or []:
+            if small.name not in strong:
+                continue
+            rows.append({
+                "case": index,
+                "convo_id": convo_id,
+                "metric": small.name,
+                "threshold": small.threshold,
+                "small_metric": small,
+                "strong_metric": strong[small.name],
+            })
+    return rows
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Measure small/strong judge agreement to choose cascade margins")
+    source = parser.add_mutually_exclusive_group()
+    source.add_argument("--csv", default="mock_data/simulated_conversations.csv",
+                        help="Simulated conversations CSV to score")
+    source.add_argument("--date", type=date.fromisoformat, help="Score Kustomer conversations from this day instead")
+    parser.add_argument("--limit", type=int, default=None, help="Score at most this many conversations")
+    parser.add_argument("--cascade-judge", required=True, help="Small judge model")
+    parser.add_argument("--judge", help="Strong judge model (defaults to deepeval's default model)")
+    parser.add_argument("--metric", action="append", dest="metrics",
+                        help="Metric to study (repeatable). Defaults to every metric.")
+    parser.add_argument("--margins", default=DEFAULT_MARGINS, help="Comma-separated margins to evaluate")
+    parser.add_argument("--target-agreement", type=float, default=0.98,
+                        help="Recommend the smallest margin whose verdicts agree with the strong judge this often")
+    parser.add_argument("--output", help="Write per-conversation paired scores to this CSV")
+    args = parser.parse_args(argv)
+
+    load_dotenv()
+    # EVALUATOR_CASSETTE records (or replays) Kustomer and judge traffic; see README
+    args.cassette = Cassette.from_env()
+    margins = [float(margin) for margin in args.margins.split(",")]
+
+    test_cases = load_test_cases(args)
+    if not test_cases:
+        print("No conversations to study.")
+        sys.exit(1)
+
+    evaluator = ConversationEvaluator(deepeval_api_key=os.getenv("DEEPEVAL_API_KEY"), metric_names=args.metrics,
+                                      judges=JudgeConfig(judge=args.judge, cascade_judge=args.cascade_judge),
+                                      cassette=args.cassette)
+    small_results = evaluator.evaluate_indexed(test_cases, metrics=evaluator.small_metrics)
+    strong_results = evaluator.evaluate_indexed(test_cases)
+    if args.cassette:
+        args.cassette.save()
+
+    rows = paired_rows(test_cases, small_results, strong_results)
+    if not rows:
+        print("No results were scored by both judges.")
+        sys.exit(1)
+
+    scored = [r for r in rows if r["small_metric"].score is not None and r["strong_metric"].score is not None]
+    verdict_agreement = sum(r["small_metric"].success == r["strong_metric"].success for r in rows) / len(rows)
+    uncertain = sum((r["small_metric"].reason or "").lstrip().upper().startswith(UNCERTAIN_MARKER) for r in rows)
+    print(f"{len(test_cases)} conversations, {len(rows)} paired results")
+    print(f"Small judge alone agrees with the strong judge on {verdict_agreement:.1%} of pass/fail verdicts")
+    if scored:
+        mean_gap = sum(abs(r["small_metric"].score - r["strong_metric"].score) for r in scored) / len(scored)
+        print(f"Mean absolute score difference: {mean_gap:.3f}; {uncertain} results marked uncertain")
+
+    print(f"{'margin':>8} {'escalated':>10} {'agreement':>10} {'missed':>7}")
+    recommended = None
+    for margin in sorted(margins):
+        escalated = agree = missed = 0
+        for r in rows:
+            if ConversationEvaluator.needs_escalation(r["small_metric"], margin):
+                escalated += 1
+                agree += 1
+            elif r["small_metric"].success == r["strong_metric"].success:
+                agree += 1
+            else:
+                # The small judge's verdict stood and the strong judge would have decided otherwise
+                missed += 1
+        agreement = agree / len(rows)
+        if recommended is None and agreement >= args.target_agreement:
+            recommended = margin
+        print(f"{margin:>8.2f} {escalated / len(rows):>10.1%} {agreement:>10.1%} {missed:>7}")
+    if recommended is None:
+        print(f"No margin reached {args.target_agreement:.1%} agreement; try larger margins.")
+    else:
+        print(f"Smallest margin reaching {args.target_agreement:.1%} agreement: {recommended}")
+
+    if args.output:
+        if os.path.dirname(args.output):
+            os.makedirs(os.path.dirname(args.output), exist_ok=True)
+        with open(args.output, 'w', newline='') as csvfile:
+            writer = csv.writer(csvfile)
+            writer.writerow(['case', 'convo_id', 'metric_name', 'threshold', 'small_score', 'strong_score',
+                             'small_success', 'strong_success', 'small_reason', 'strong_reason'])
+            for r in rows:
+                writer.writerow([r["case"], r["convo_id"], r["metric"], r["threshold"],
+                                 r["small_metric"].score, r["strong_metric"].score,
+                                 r["small_metric"].success, r["strong_metric"].success,
+                                 r["small_metric"].reason, r["strong_metric"].reason])
+        print(f"Wrote paired scores to {args.output}")
+
+if __name__ == "__main__":
+    main()
@@ -1,14 +1,11 @@
 import os
 import logging
 from dotenv import load_dotenv
-from deepeval import evaluate
-from deepeval import login_with_confident_api_key
-from deepeval.test_case import LLMTestCase, LLMTestCaseParams, ConversationalTestCase
-from deepeval.metrics import AnswerRelevancyMetric, GEval
 import json
 import requests
 from datetime import datetime, timedelta
 import csv
+from core.cassette import Cassette
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -24,6 +21,7 @@ def build_conversation_test_case(transcript_data, convo_id):
     Returns:
         ConversationalTestCase: The constructed test case
     """
+    from deepeval.test_case import LLMTestCase, ConversationalTestCase
     
     turns = []
     for i, turn in enumerate(transcript_data):      
@@ -89,8 +87,24 @@ def write_conversations_to_csv(conversations, filename):
                 writer.writerow([])
                 writer.writerow([])
 
+def kustomer_request(cassette, method, url, headers, payload=None):
+    """
+    Send a Kustomer request and return its JSON body, recording it to or replaying it from the cassette if one is set.
+    """
+    def live():
+        response = requests.request(method, url, headers=headers, json=payload)
+        if method == "GET":
+            response.raise_for_status()
+        return response.json()
+
+    if cassette is None:
+        return live()
+    return cassette.call("kustomer", {"method": method, "url": url, "json": payload}, live,
+                         error_factory=requests.ConnectionError)
+
 def main():
     load_dotenv()
+    cassette = Cassette.from_env()
 
     deepeval_key = os.getenv("DEEPEVAL_API_KEY")
     kustomer_key = os.getenv("KUSTOMER_API_KEY")
@@ -132,8 +146,7 @@ def main():
                 ],
             "timeZone": "America/Los_Angeles"
         }
-        search_response = requests.post(search_url, headers=headers, json=search_payload)
-        search_convos = search_response.json().get('data', [])
+        search_convos = kustomer_request(cassette, "POST", search_url, headers, search_payload).get('data', [])
 
         for convo in search_convos:
             convo_id = convo.get("id")
@@ -141,9 +154,7 @@ def main():
                 continue
             kustomer_convo_url = f"https://api.kustomerapp.com/v1/conversations/{convo_id}/messages"
             try:
-                messages_response = requests.get(kustomer_convo_url, headers=headers)
-                messages_response.raise_for_status()
-                messages_data = messages_response.json().get('data', [])
+                messages_data = kustomer_request(cassette, "GET", kustomer_convo_url, headers).get('data', [])
                 parsed_convo = kustomer_messages_to_transcript(messages_data)
                 if parsed_convo:
                     convo_test_case = build_conversation_test_case(parsed_convo, convo_id)
@@ -162,7 +173,16 @@ def main():
         write_conversations_to_csv(test_cases, csv_filename)
         logger.info(f"Conversations written to {csv_filename}")
 
-    login_with_confident_api_key(deepeval_key)
+    from deepeval import evaluate, login_with_confident_api_key
+    from deepeval.test_case import LLMTestCaseParams
+    from deepeval.metrics import GEval
+    from core.judges import disable_confident_uploads, judge_model
+
+    if cassette is not None and cassette.replaying:
+        disable_confident_uploads()
+    else:
+        login_with_confident_api_key(deepeval_key)
+    model = judge_model(cassette)
 
     # Custom correctness metric
     correctness_metric = GEval(
@@ -185,7 +205,8 @@ def main():
             "Score the response based on: functional correctness (50%), and response quality (50%)."
         ],
         evaluation_params=[LLMTestCaseParams.INPUT, LLMTestCaseParams.ACTUAL_OUTPUT],
-        threshold=0.7
+        threshold=0.7,
+        model=model,
     )
 
     verification_metric = GEval(
@@ -232,7 +253,8 @@ def main():
 
         ],
         evaluation_params=[LLMTestCaseParams.INPUT, LLMTestCaseParams.ACTUAL_OUTPUT],
-        threshold=0.7
+        threshold=0.7,
+        model=model,
     )
 
 
@@ -276,6 +298,9 @@ def main():
     else:
         logger.warning("No test cases to evaluate.")
 
+    if cassette:
+        cassette.save()
+
 if __name__ == "__main__":
     main()
 
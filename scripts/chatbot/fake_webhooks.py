@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""
+Fake Kustomer webhook sender for exercising the evaluation service locally. Builds conversation-closed events
+from the simulated conversations CSV, with each conversation's messages embedded in the event so no Kustomer
+access is needed, posts them at a fixed rate, then polls the service's metrics until every event is scored.
+
+    evaluator serve --judge stub --max-wait 2 &
+    evaluator fake-webhooks --events 200 --rate 20
+"""
+import sys
+import time
+import argparse
+import requests
+from datetime import datetime, timedelta, timezone
+from core.test_case_builder import TestCaseBuilder
+from evaluator_service.service import METRICS_PATH, SECRET_HEADER, WEBHOOK_PATH
+
+def conversation_event(convo_id, exchanges, closed_at):
+    """
+    A Kustomer conversation update webhook for a closed conversation, plus the conversation's messages in
+    Kustomer's message shape under "messages".
+    """
+    messages = []
+    stamp = closed_at - timedelta(seconds=30 * len(exchanges))
+    for i, (user, reply) in enumerate(exchanges):
+        for direction, text in (("in", user), ("out", reply)):
+            if not text:
+                continue
+            stamp += timedelta(seconds=10)
+            messages.append({
+                "type": "message",
+                "id": f"{convo_id}-{len(messages)}",
+                "attributes": {"direction": direction, "body": text, "preview": text[:100],
+                               "sentAt": stamp.isoformat().replace("+00:00", "Z")},
+            })
+    return {
+        "type": "kustomer.conversation.update",
+        "data": {
+            "type": "conversation",
+            "id": convo_id,
+            "attributes": {"status": "done", "endedAt": closed_at.isoformat().replace("+00:00", "Z"),
+                           "messageCount": len(messages)},
+        },
+        "changes": {"attributes": {"status": {"before": "open", "after": "done"}}},
+        "messages": messages,
+    }
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Send fake conversation-closed webhooks to the evaluation service")
+    parser.add_argument("--url", default="http://127.0.0.1:8080", help="Evaluation service base URL")
+    parser.add_argument("--csv", default="mock_data/simulated_conversations.csv",
+                        help="Simulated conversations the events are built from (reused round-robin)")
+    parser.add_argument("--events", type=int, default=50, help="Number of events to send")
+    parser.add_argument("--rate", type=float, default=10.0, help="Events per second")
+    parser.add_argument("--secret", help="Webhook secret, if the service was started with one")
+    parser.add_argument("--timeout", type=float, default=600.0, help="Seconds to wait for everything to be scored")
+    args = parser.parse_args(argv)
+
+    conversations = [TestCaseBuilder.conversation_exchanges(test_case)
+                     for test_case in TestCaseBuilder.parse_simulated_conversations_csv(args.csv)]
+    if not conversations:
+        print(f"No conversations in {args.csv}.")
+        sys.exit(1)
+
+    session = requests.Session()
+    headers = {SECRET_HEADER: args.secret} if args.secret else {}
+    before = session.get(args.url + METRICS_PATH).json()["counters"]["scored"]
+    run = datetime.now().strftime('%Y%m%d%H%M%S')
+    start = time.perf_counter()
+    queued = 0
+    for i in range(args.events):
+        event = conversation_event(f"fake-{run}-{i}", conversations[i % len(conversations)],
+                                   datetime.now(timezone.utc))
+        response = session.post(args.url + WEBHOOK_PATH, json=event, headers=headers)
+        response.raise_for_status()
+        queued += response.json()["queued"]
+        # Hold the rate against the schedule rather than sleeping a fixed interval after each post
+        delay = start + (i + 1) / args.rate - time.perf_counter()
+        if delay > 0:
+            time.sleep(delay)
+    sent_seconds = time.perf_counter() - start
+    print(f"Sent {args.events} events in {sent_seconds:.1f}s ({queued} queued)")
+
+    deadline = time.perf_counter() + args.timeout
+    while True:
+        metrics = session.get(args.url + METRICS_PATH).json()
+        scored = metrics["counters"]["scored"] - before
+        if scored >= queued or time.perf_counter() > deadline:
+            break
+        print(f"  depth {metrics['queue']['pending']}, in flight {metrics['queue']['inflight']}, "
+              f"scored {scored}/{queued}")
+        time.sleep(1.0)
+    elapsed = time.perf_counter() - start
+    latency = metrics["latency_to_score_seconds"]
+    print(f"Scored {scored}/{queued} in {elapsed:.1f}s ({scored / elapsed:.2f}/s); latency to score "
+          f"p50 {latency['p50']:.2f}s, p95 {latency['p95']:.2f}s, max {latency['max']:.2f}s"
+          if latency["p50"] is not None else f"Scored {scored}/{queued} in {elapsed:.1f}s")
+    if scored < queued:
+        print(f"Timed out with {queued - scored} events unscored ({metrics['counters']['failed']} failures so far).")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
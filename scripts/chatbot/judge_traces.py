@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+"""
+Query the judge trace store: list runs, the slowest, most expensive or most retried judge calls of a run,
+per-metric latency and cost breakdowns, show one call's prompt and completion, and re-run a single traced call
+on its own to see whether its latency or verdict reproduces.
+"""
+import sys
+import argparse
+from datetime import datetime
+from dotenv import load_dotenv
+from core.judge_trace import DEFAULT_TRACE_PATH, JudgeTraceStore, rerun_call
+
+def format_seconds(value):
+    return "-" if value is None else f"{value:.2f}s"
+
+def format_cost(value):
+    return "-" if value is None else f"${value:.5f}"
+
+def format_tokens(call):
+    if call["input_tokens"] is None:
+        return "-"
+    return f"{call['input_tokens']}+{call['output_tokens']}"
+
+def print_calls(calls):
+    print(f"{'id':>7}  {'latency':>8}  {'tries':>5}  {'tokens':>11}  {'cost':>9}  {'model':<12} {'metric':<13} convo")
+    for call in calls:
+        flag = f"  [{call['error']}]" if call["error"] else ""
+        print(f"{call['id']:>7}  {format_seconds(call['latency']):>8}  {call['attempts']:>5}  {format_tokens(call):>11}  "
+              f"{format_cost(call['cost']):>9}  {call['model'] or '-':<12} {call['metric'] or '-':<13} "
+              f"{call['convo_id'] or '-'}{flag}")
+
+def percentile(values, q):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))] if ordered else None
+
+def print_summary(calls):
+    groups = {}
+    for call in calls:
+        groups.setdefault((call["metric"], call["stage"], call["model"]), []).append(call)
+    print(f"{'metric':<13} {'stage':<7} {'model':<12} {'calls':>6} {'p50':>7} {'p95':>7} {'max':>7} "
+          f"{'retries':>7} {'errors':>6} {'tokens':>9} {'cost':>9}")
+    for (metric, stage, model), group in sorted(groups.items(), key=lambda item: tuple(map(str, item[0]))):
+        latencies = [call["latency"] for call in group]
+        tokens = sum((call["input_tokens"] or 0) + (call["output_tokens"] or 0) for call in group)
+        costs = [call["cost"] for call in group if call["cost"] is not None]
+        print(f"{metric or '-':<13} {stage or '-':<7} {model or '-':<12} {len(group):>6} "
+              f"{format_seconds(percentile(latencies, 0.5)):>7} {format_seconds(percentile(latencies, 0.95)):>7} "
+              f"{format_seconds(max(latencies)):>7} {sum(call['attempts'] - 1 for call in group):>7} "
+              f"{sum(1 for call in group if call['error']):>6} {tokens:>9} "
+              f"{format_cost(sum(costs) if costs else None):>9}")
+
+def print_call(call):
+    started = datetime.fromtimestamp(call["started_at"]).isoformat(timespec="seconds")
+    print(f"Call {call['id']} of run {call['run_id']} at {started}")
+    print(f"  conversation {call['convo_id'] or '-'}, metric {call['metric'] or '-'}, stage {call['stage'] or '-'}, "
+          f"model {call['model']}, {call['method']}" + (f" ({call['schema']})" if call["schema"] else ""))
+    print(f"  latency {format_seconds(call['latency'])}, attempts {call['attempts']}, tokens {format_tokens(call)}, "
+          f"cost {format_cost(call['cost'])}" + (f", error {call['error']}" if call["error"] else ""))
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Query traced judge calls and re-run one in isolation")
+    parser.add_argument("--traces", default=DEFAULT_TRACE_PATH, help="Judge trace store")
+    subparsers = parser.add_subparsers(dest="action", required=True)
+    subparsers.add_parser("runs", help="List recent runs")
+    for name, help_text in (("slowest", "Slowest calls"), ("costliest", "Most expensive calls"),
+                            ("retried", "Calls with the most attempts"), ("summary", "Latency and cost per metric")):
+        sub = subparsers.add_parser(name, help=help_text)
+        sub.add_argument("--run", help="Run ID (defaults to the latest run)")
+        sub.add_argument("--metric", help="Only calls for this metric")
+        sub.add_argument("--convo", help="Only calls for this conversation")
+        sub.add_argument("--limit", type=int, default=20, help="Calls to list")
+    show = subparsers.add_parser("show", help="Show one call with its prompt and completion")
+    show.add_argument("call_id", type=int)
+    rerun = subparsers.add_parser("rerun", help="Send one traced call's prompt again and compare")
+    rerun.add_argument("call_id", type=int)
+    rerun.add_argument("--judge", help="Judge model to re-run with (defaults to the traced call's model)")
+    args = parser.parse_args(argv)
+
+    store = JudgeTraceStore(args.traces)
+    if args.action == "runs":
+        print(f"{'run':<32} {'started':<20} {'calls':>6} {'judge time':>10} {'retries':>7} {'errors':>6} {'cost':>9}")
+        for run in store.runs():
+            started = datetime.fromtimestamp(run["started_at"]).isoformat(timespec="seconds")
+            print(f"{run['run_id']:<32} {started:<20} {run['calls']:>6} {format_seconds(run['latency']):>10} "
+                  f"{run['retries']:>7} {run['errors']:>6} {format_cost(run['cost']):>9}")
+        return
+
+    if args.action in ("show", "rerun"):
+        call = store.get(args.call_id)
+        if call is None:
+            print(f"No traced call {args.call_id} in {args.traces}.")
+            sys.exit(1)
+        print_call(call)
+        if args.action == "show":
+            print("Prompt:")
+            print(call["prompt"])
+            print("Completion:")
+            print(call["completion"])
+            return
+        load_dotenv()
+        store.run_id = f"rerun_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
+        try:
+            rerun_call(call, store, model=args.judge)
+        except Exception as e:
+            print(f"Re-run failed: {e}")
+            if store.last_call is None:
+                sys.exit(1)
+        print("Re-run:")
+        print_call({**store.last_call, "id": "new", "run_id": store.run_id})
+        print("Original completion:")
+        print(call["completion"])
+        print("Re-run completion:")
+        print(store.last_call["completion"])
+        store.close()
+        return
+
+    run_id = args.run
+    if run_id is None:
+        runs = store.runs(limit=1)
+        if not runs:
+            print(f"No traced calls in {args.traces}.")
+            sys.exit(1)
+        run_id = runs[0]["run_id"]
+    print(f"Run {run_id}")
+    if args.action == "summary":
+        print_summary(store.calls(run_id, args.metric, args.convo, order_by="recent", limit=-1))
+        return
+    order_by = {"slowest": "latency", "costliest": "cost", "retried": "attempts"}[args.action]
+    print_calls(store.calls(run_id, args.metric, args.convo, order_by=order_by, limit=args.limit))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,174 @@
+#!/usr/bin/env python3
+"""
+Load test for the chatbot endpoint. Virtual users replay intention-based scripted conversations (the stored
+simulated user scripts of ab_replay.py) concurrently, with ramp-up and think time, and the run reports
+throughput, error rates and latency percentiles per turn index. A sample of the completed conversations can
+be scored with the normal evaluation metrics, so reply quality under load is measured too.
+"""
+import os
+import sys
+import csv
+import logging
+import argparse
+from datetime import datetime
+from dotenv import load_dotenv
+from core.ab_replay import DEFAULT_SCRIPTS_PATH, ScriptStore, script_id
+from core.evaluator import ConversationEvaluator, JudgeConfig, METRIC_DEFINITIONS, metric_key
+from core.load_test import run_load, sample_for_evaluation, summarize_load
+from core.reporter import EvaluationReporter
+from core.test_case_builder import TestCaseBuilder
+from scripts.chatbot.simulate_convo import ConversationGenerator, DEFAULT_API_URL
+
+# Intention recorded for scripts taken from the mock CSV when no simulated scripts are stored
+MOCK_INTENTION = "mock_data"
+
+def load_scripts(path, intentions, csv_path):
+    """
+    Stored simulated user scripts, or the user side of the mock conversations when none are stored.
+    """
+    scripts = ScriptStore(path).select(intentions)
+    if scripts or intentions:
+        return scripts
+    scripts = []
+    for test_case in TestCaseBuilder.parse_simulated_conversations_csv(csv_path):
+        user_turns = [user for user, _ in TestCaseBuilder.conversation_exchanges(test_case)]
+        scripts.append({"id": script_id(MOCK_INTENTION, user_turns), "intention": MOCK_INTENTION,
+                        "user_turns": user_turns})
+    return scripts
+
+def sample_rate(value):
+    rate = float(value)
+    if not 0.0 <= rate <= 1.0:
+        raise argparse.ArgumentTypeError(f"expected a fraction between 0 and 1, got {value!r}")
+    return rate
+
+def format_ms(seconds):
+    return "-" if seconds is None else f"{seconds * 1000:.0f}"
+
+def write_turn_report(summary, path):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'w', newline='') as csvfile:
+        writer = csv.writer(csvfile)
+        writer.writerow(['turn', 'requests', 'errors', 'error_rate', 'p50_ms', 'p90_ms', 'p95_ms', 'p99_ms', 'max_ms'])
+        rows = [(turn, stats) for turn, stats in summary["per_turn"].items()] + [("all", summary["overall"])]
+        for turn, stats in rows:
+            latency = stats["latency"]
+            writer.writerow([turn, stats["requests"], stats["errors"], f"{stats['error_rate'] or 0:.4f}",
+                             format_ms(latency["p50"]), format_ms(latency["p90"]), format_ms(latency["p95"]),
+                             format_ms(latency["p99"]), format_ms(latency["max"])])
+
+def print_summary(summary, elapsed, users):
+    overall, convos = summary["overall"], summary["conversations"]
+    steady = overall["steady_requests_per_second"]
+    print(f"{users} users, {elapsed:.1f}s: {overall['requests']} requests ({overall['requests_per_second']:.2f}/s"
+          + (f", {steady:.2f}/s after ramp-up" if steady is not None else "") + "), "
+          f"error rate {overall['error_rate'] or 0:.2%}")
+    print(f"Conversations: {convos['started']} started, {convos['completed']} completed, {convos['failed']} failed, "
+          f"{convos['abandoned']} cut off at the end of the run ({overall['conversations_per_second']:.2f} completed/s)")
+    for kind, count in sorted(summary["errors_by_kind"].items(), key=lambda item: -item[1]):
+        print(f"  {kind}: {count}")
+    print(f"{'turn':>6} {'requests':>9} {'errors':>7} {'p50 ms':>7} {'p90 ms':>7} {'p95 ms':>7} {'p99 ms':>7} {'max ms':>7}")
+    rows = list(summary["per_turn"].items()) + [("all", overall)]
+    for turn, stats in rows:
+        latency = stats["latency"]
+        print(f"{turn:>6} {stats['requests']:>9} {stats['errors']:>7} {format_ms(latency['p50']):>7} "
+              f"{format_ms(latency['p90']):>7} {format_ms(latency['p95']):>7} {format_ms(latency['p99']):>7} "
+              f"{format_ms(latency['max']):>7}")
+
+def evaluate_sample(store, args, output_dir, timestamp):
+    evaluator = ConversationEvaluator(deepeval_api_key=os.getenv("DEEPEVAL_API_KEY"), metric_names=args.metrics,
+                                      judges=JudgeConfig(judge=args.judge))
+    results = evaluator.evaluate_store(store)
+    csv_path = os.path.join(output_dir, f"load_test_eval_{timestamp}.csv")
+    EvaluationReporter.write_evaluation_results_to_csv(results, csv_path)
+    by_metric = {}
+    for test_result in results.test_results:
+        for metric_data in test_result.metrics_data or []:
+            if metric_data.error:
+                continue
+            by_metric.setdefault(metric_key(metric_data), []).append(metric_data)
+    print(f"Scored {len(store)} sampled conversations:")
+    for name, entries in sorted(by_metric.items()):
+        scores = [entry.score for entry in entries if entry.score is not None]
+        mean = sum(scores) / len(scores) if scores else 0.0
+        print(f"  {name}: mean {mean:.3f}, pass rate {sum(entry.success for entry in entries) / len(entries):.1%}")
+    print(f"Wrote sampled scores to {csv_path}")
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Load test the chatbot endpoint with scripted virtual users")
+    parser.add_argument("--url", default=DEFAULT_API_URL, help="Chatbot test-response endpoint")
+    parser.add_argument("--users", type=int, default=10, help="Concurrent virtual users")
+    parser.add_argument("--ramp-up", type=float, default=10.0, help="Seconds over which the users are started")
+    parser.add_argument("--think-time", type=float, default=2.0,
+                        help="Mean seconds a user waits after a reply before sending the next message")
+    parser.add_argument("--duration", type=float, default=60.0,
+                        help="Seconds to run; conversations in progress at the end are cut off")
+    parser.add_argument("--conversations", type=int, default=None,
+                        help="Stop after starting this many conversations (with --duration 0, run until then)")
+    parser.add_argument("--scripts", default=DEFAULT_SCRIPTS_PATH,
+                        help="Stored simulated user scripts; the mock CSV's user turns are used if there are none")
+    parser.add_argument("--csv", default="mock_data/simulated_conversations.csv", help="Fallback conversations")
+    parser.add_argument("--intention", action="append", dest="intentions",
+                        help="Only replay scripts for this intention (repeatable)")
+    parser.add_argument("--seed", type=int, default=0, help="Seed for script order, think times and sampling")
+    parser.add_argument("--sample-rate", type=sample_rate, default=0.0,
+                        help="Fraction of completed conversations to score with the evaluation metrics")
+    parser.add_argument("--metric", action="append", dest="metrics", choices=list(METRIC_DEFINITIONS),
+                        help="Metric to score sampled conversations with (repeatable). Defaults to every metric.")
+    parser.add_argument("--judge", help="Judge model for sampled conversations")
+    parser.add_argument("--output-dir", default="deepeval_results/load_test", help="Where the reports are written")
+    parser.add_argument("--max-error-rate", type=float, default=None, help="Exit non-zero above this error rate")
+    parser.add_argument("--max-p95", type=float, default=None,
+                        help="Exit non-zero if the p95 latency of any turn index exceeds this many seconds")
+    args = parser.parse_args(argv)
+
+    load_dotenv()
+    # Per-request logging from ConversationGenerator would drown out the report
+    logging.getLogger("scripts.chatbot.simulate_convo").setLevel(logging.WARNING)
+    if not args.duration and args.conversations is None:
+        print("Give --duration or --conversations.")
+        sys.exit(1)
+    scripts = load_scripts(args.scripts, args.intentions, args.csv)
+    if not scripts:
+        if args.intentions:
+            print(f"No stored scripts for {', '.join(args.intentions)}; generate some with "
+                  "`evaluator ab-replay --scripts-per-intention N`.")
+        else:
+            print(f"No stored scripts and no conversations in {args.csv}.")
+        sys.exit(1)
+    print(f"Replaying {len(scripts)} scripts against {args.url} with {args.users} users "
+          f"(ramp-up {args.ramp_up:.0f}s, think time {args.think_time:.1f}s)")
+
+    generator = ConversationGenerator(api_url=args.url, max_connections=args.users)
+    run = run_load(scripts, generator.send_message, args.users, ramp_up_seconds=args.ramp_up,
+                   think_time_seconds=args.think_time, duration_seconds=args.duration or None,
+                   max_conversations=args.conversations, seed=args.seed)
+    summary = summarize_load(run)
+    print_summary(summary, run["elapsed"], args.users)
+    timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+    report_path = os.path.join(args.output_dir, f"load_test_{timestamp}.csv")
+    write_turn_report(summary, report_path)
+    print(f"Wrote per-turn report to {report_path}")
+
+    if args.sample_rate > 0:
+        store = sample_for_evaluation(run, args.sample_rate, seed=args.seed)
+        if len(store):
+            evaluate_sample(store, args, args.output_dir, timestamp)
+        else:
+            print("No completed conversations to sample for evaluation.")
+
+    failed = []
+    error_rate = summary["overall"]["error_rate"] or 0.0
+    if args.max_error_rate is not None and error_rate > args.max_error_rate:
+        failed.append(f"error rate {error_rate:.2%} above {args.max_error_rate:.2%}")
+    if args.max_p95 is not None:
+        slow = [str(turn) for turn, stats in summary["per_turn"].items()
+                if stats["latency"]["p95"] is not None and stats["latency"]["p95"] > args.max_p95]
+        if slow:
+            failed.append(f"p95 latency above {args.max_p95}s on turns {', '.join(slow)}")
+    if failed:
+        print("Load test failed: " + "; ".join(failed))
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
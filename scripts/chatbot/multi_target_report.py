@@ -0,0 +1,182 @@
+#!/usr/bin/env python3
+"""
+Multi-target report script for chatbot evaluation. Evaluates yesterday's conversations for several
+(queue, assigned user, metric set) targets in one run: searches run concurrently over one Kustomer session,
+each conversation is fetched and judged once even if several targets include it, and the run writes
+per-target result CSVs plus a combined summary.
+"""
+import os
+import csv
+import json
+import argparse
+import dataclasses
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from dotenv import load_dotenv
+from evaluator_service.kustomer_client import KustomerClient
+from core.test_case_builder import TestCaseBuilder
+from core.evaluator import METRIC_DEFINITIONS, metric_key
+from core.reporter import EvaluationReporter
+from core.trend_index import DEFAULT_INDEX_PATH, MULTI_TARGET_SOURCE, TrendIndex, aggregate_metric_rows
+from core.cassette import Cassette
+from scripts.chatbot.nightly_report import add_judge_arguments, build_evaluator, print_judge_usage
+
+def _resolve_env(value):
+    """Expand $VARS in a config value; unset variables are an error rather than a literal filter value."""
+    if not value:
+        return None
+    expanded = os.path.expandvars(value)
+    if "$" in expanded:
+        raise ValueError(f"Environment variable in {value!r} is not set")
+    return expanded or None
+
+def load_targets(config_path):
+    """
+    Load and validate the targets config.
+
+    The file is JSON: {"targets": [{"name": ..., "queue_id": ..., "assigned_user_id": ..., "metrics": [...]}]}.
+    String values may reference environment variables ("$KUSTOMER_QUEUE_ID"). "metrics" defaults to every
+    metric in METRIC_DEFINITIONS.
+    """
+    with open(config_path) as f:
+        config = json.load(f)
+    targets = []
+    for raw in config.get("targets", []):
+        target = {
+            "name": raw["name"],
+            "queue_id": _resolve_env(raw.get("queue_id")),
+            "assigned_user_id": _resolve_env(raw.get("assigned_user_id")),
+            "metrics": raw.get("metrics") or list(METRIC_DEFINITIONS),
+        }
+        unknown = [name for name in target["metrics"] if name not in METRIC_DEFINITIONS]
+        if unknown:
+            raise ValueError(f"Target {target['name']} uses unknown metrics: {', '.join(unknown)}")
+        targets.append(target)
+    names = [target["name"] for target in targets]
+    if not targets or len(set(names)) != len(names):
+        raise ValueError("Targets config must list at least one target, with unique names")
+    return targets
+
+def restrict_to_metrics(test_result, metric_names):
+    """Copy of a test result keeping only the given metrics."""
+    metrics_data = [m for m in test_result.metrics_data or [] if metric_key(m) in metric_names]
+    return dataclasses.replace(test_result, metrics_data=metrics_data,
+                               success=all(m.success for m in metrics_data))
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Evaluate several Kustomer queues/bots in a single run")
+    parser.add_argument("--config", required=True, help="JSON file listing the targets")
+    parser.add_argument("--max-workers", type=int, default=KustomerClient.DEFAULT_MAX_WORKERS,
+                        help="Concurrent Kustomer requests")
+    parser.add_argument("--trend-index", default=DEFAULT_INDEX_PATH, help="Trend index the run is recorded in")
+    add_judge_arguments(parser)
+    args = parser.parse_args(argv)
+
+    load_dotenv()
+    targets = load_targets(args.config)
+    drive_folder_id = os.getenv("GOOGLE_DRIVE_FOLDER_ID")
+    kustomer_key = os.getenv("KUSTOMER_API_KEY")
+    cassette = Cassette.from_env()
+    if cassette:
+        print(f"Cassette {cassette.mode} mode: {cassette.path}")
+
+    kustomer = KustomerClient(api_key=kustomer_key, assigned_user_id=None, queue_id=None,
+                              max_workers=args.max_workers, cassette=cassette)
+    with ThreadPoolExecutor(max_workers=min(len(targets), args.max_workers)) as executor:
+        searches = list(executor.map(
+            lambda target: kustomer.fetch_yesterdays_conversations(target["assigned_user_id"], target["queue_id"]),
+            targets,
+        ))
+
+    # convo_id -> names of the targets whose search returned it
+    convo_targets = {}
+    for target, conversations_data in zip(targets, searches):
+        for convo in conversations_data:
+            if convo.get("id"):
+                convo_targets.setdefault(convo["id"], []).append(target["name"])
+        print(f"{target['name']}: {len(conversations_data)} conversations")
+    del searches
+
+    store = TestCaseBuilder.kustomer_payloads_to_store(kustomer.fetch_conversations(convo_targets))
+    if not len(store):
+        print("No test cases found. Exiting.")
+        return
+
+    # One evaluator for the union of metrics; conversations are grouped by the metric set they need
+    target_metrics = {target["name"]: target["metrics"] for target in targets}
+    union = [name for name in METRIC_DEFINITIONS if any(name in metrics for metrics in target_metrics.values())]
+    timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+    evaluator, ledger, traces = build_evaluator(args, cassette, f"targets_{timestamp}", metric_names=union)
+    groups = {}
+    for index, convo_id in enumerate(store.convo_ids):
+        needed = tuple(name for name in union
+                       if any(name in target_metrics[t] for t in convo_targets[convo_id]))
+        groups.setdefault(needed, []).append(index)
+
+    results_by_convo = {}
+    for metric_names, indices in groups.items():
+        results = evaluator.evaluate_store(store, metrics=evaluator.metrics_for(metric_names), indices=indices)
+        for test_result in results.test_results:
+            results_by_convo[test_result.additional_metadata["convo_id"]] = test_result
+    print_judge_usage(args, list(results_by_convo.values()), ledger, traces)
+
+    from deepeval.evaluate.types import EvaluationResult
+
+    trend_index = TrendIndex(args.trend_index)
+    summary_rows = []
+    written = []
+    for target in targets:
+        name = target["name"]
+        target_results = [
+            restrict_to_metrics(results_by_convo[convo_id], target["metrics"])
+            for convo_id, names in convo_targets.items() if name in names and convo_id in results_by_convo
+        ]
+        target_evaluation = EvaluationResult(test_results=target_results, confident_link=None)
+        eval_csv = f'deepeval_results/convo_eval/{name}/eval_results_{timestamp}.csv'
+        EvaluationReporter.write_evaluation_results_to_csv(target_evaluation, eval_csv)
+        written.append(eval_csv)
+        print(f"Wrote {name} evaluation results to {eval_csv}")
+
+        metric_rows = TrendIndex.metric_rows_from_results(target_evaluation)
+        for row in metric_rows:
+            row["metric"] = f"{name}/{row['metric']}"
+        trend_index.record_run(timestamp, metric_rows, source=MULTI_TARGET_SOURCE)
+        for metric, agg in aggregate_metric_rows(metric_rows).items():
+            summary_rows.append([name, metric.split("/", 1)[1], agg["num_cases"], agg["num_passed"],
+                                 f"{agg['num_passed'] / agg['num_cases']:.3f}",
+                                 "" if agg["score_mean"] is None else f"{agg['score_mean']:.3f}", agg["cost"]])
+
+    summary_csv = f'deepeval_results/convo_eval/summary_{timestamp}.csv'
+    with open(summary_csv, 'w', newline='') as csvfile:
+        writer = csv.writer(csvfile)
+        writer.writerow(['target', 'metric_name', 'cases', 'passed', 'pass_rate', 'mean_score', 'evaluation_cost'])
+        writer.writerows(summary_rows)
+    written.append(summary_csv)
+    if ledger.entries:
+        ledger_csv = f'deepeval_results/convo_eval/cost_ledger_{timestamp}.csv'
+        ledger.write_csv(ledger_csv)
+        written.append(ledger_csv)
+        print(f"Wrote cost ledger to {ledger_csv}")
+
+    print("Combined summary:")
+    for row in summary_rows:
+        print(f"  {row[0]} {row[1]}: {row[3]}/{row[2]} passed ({row[4]}), mean score {row[5] or 'n/a'}, cost ${row[6]:.4f}")
+    for line in trend_index.run_summary(timestamp):
+        if line.startswith("REGRESSION"):
+            print(f"  {line}")
+    trend_index.close()
+
+    if drive_folder_id:
+        for path in written:
+            try:
+                file_id = EvaluationReporter.upload_to_google_drive(path, drive_folder_id, cassette=cassette)
+                print(f"Uploaded {path}. File ID: {file_id}")
+            except Exception as e:
+                print(f"Failed to upload {path} to Google Drive: {str(e)}")
+    else:
+        print("Skipping Google Drive upload as GOOGLE_DRIVE_FOLDER_ID is not set.")
+    if cassette:
+        cassette.save()
+
+if __name__ == "__main__":
+    main()
@@ -3,15 +3,131 @@
 Nightly report script for chatbot evaluation. Fetches real conversations, evaluates, and writes results to CSV/Drive.
 """
 import os
+import time
+import argparse
 from dotenv import load_dotenv
 from datetime import datetime
 from evaluator_service.kustomer_client import KustomerClient
 from core.test_case_builder import TestCaseBuilder
-from core.evaluator import ConversationEvaluator
+from core.evaluator import (
+    ConversationEvaluator, DEFAULT_CASCADE_MARGIN, JudgeConfig, STRONG_TIER, metric_version,
+)
 from core.reporter import EvaluationReporter
-import pprint
+from core.trend_index import DEFAULT_INDEX_PATH, NIGHTLY_SOURCE, PARTIAL_SOURCE, TrendIndex
+from core.cassette import Cassette
+from core.conversation_state import (
+    ConversationState,
+    DEFAULT_CONTEXT_TURNS,
+    DEFAULT_STATE_PATH,
+    merge_scores,
+    plan_increments,
+)
+from core.cost_ledger import BUDGET_POLICIES, DEFAULT_BUDGET_JUDGE, STOP, CostLedger, SpendBudget
+from core.judge_trace import DEFAULT_TRACE_PATH, JudgeTraceStore
+from core.risk_priority import Deadline, coverage_report, prioritize, write_coverage_csv
+
+def record_state(state, plans, results, version, last_message_at):
+    """
+    Store the new cursor and running scores of every conversation that was evaluated without errors, or that
+    had a new last message but no new turns. Conversations left out (errors, budget) are retried next run.
+    Returns:
+        dict: convo_id -> running scores (merge_scores) of the conversations evaluated without errors.
+    """
+    conversation_scores = {}
+    for convo_id, plan in plans.items():
+        if plan["new_start"] is None:
+            state.save(convo_id, version, plan["last_message_id"], last_message_at.get(convo_id),
+                       plan["message_count"], plan["turn_count"], plan["last_turn_hash"], plan["scores"] or {})
+    for test_result in results.test_results if results else []:
+        plan = plans[test_result.additional_metadata["convo_id"]]
+        test_result.additional_metadata["evaluated_turns"] = f"{plan['new_start'] + 1}-{plan['turn_count']}"
+        if any(metric_data.error for metric_data in test_result.metrics_data or []):
+            continue
+        scores = merge_scores(plan["scores"], test_result.metrics_data or [], plan["turn_count"] - plan["new_start"])
+        conversation_scores[test_result.additional_metadata["convo_id"]] = scores
+        state.save(test_result.additional_metadata["convo_id"], version, plan["last_message_id"],
+                   last_message_at.get(test_result.additional_metadata["convo_id"]), plan["message_count"],
+                   plan["turn_count"], plan["last_turn_hash"], scores)
+    state.commit()
+    return conversation_scores
+
+def add_judge_arguments(parser):
+    """
+    Judge, cascade and trace options shared by the report scripts.
+    """
+    parser.add_argument("--judge", help="Strong judge model (defaults to deepeval's default model)")
+    parser.add_argument("--cascade-judge", help="Small judge model; enables cascade mode")
+    parser.add_argument("--cascade-margin", type=float, default=DEFAULT_CASCADE_MARGIN,
+                        help="Escalate small-judge scores within this distance of the threshold")
+    parser.add_argument("--traces", default=DEFAULT_TRACE_PATH, help="Store every judge call here")
+    parser.add_argument("--no-traces", action="store_true", help="Do not trace judge calls")
+
+def build_evaluator(args, cassette, run_id, metric_names=None):
+    """
+    Evaluator for a report run: judges from the add_judge_arguments options, judge traffic through the cassette,
+    every judge call metered into a new CostLedger and, unless --no-traces, traced under run_id.
+    Returns:
+        tuple: (evaluator, ledger, traces or None)
+    """
+    ledger = CostLedger()
+    traces = None if args.no_traces else JudgeTraceStore(args.traces, run_id=run_id)
+    evaluator = ConversationEvaluator(deepeval_api_key=os.getenv("DEEPEVAL_API_KEY"), metric_names=metric_names,
+                                      judges=JudgeConfig.from_args(args), cassette=cassette, ledger=ledger,
+                                      traces=traces)
+    return evaluator, ledger, traces
+
+def print_judge_usage(args, test_results, ledger, traces):
+    """
+    Close the trace store and print where the calls were traced, the cascade split and the judge spend.
+    """
+    if traces is not None:
+        traces.close()
+        print(f"Traced judge calls as run {traces.run_id} in {traces.path} (see `evaluator judge-traces`)")
+    if args.cascade_judge:
+        tiers = [tier for r in test_results for tier in r.additional_metadata.get("judge_tiers", {}).values()]
+        escalated = tiers.count(STRONG_TIER)
+        print(f"Judge cascade: {len(tiers) - escalated} results decided by {args.cascade_judge}, "
+              f"{escalated} escalated to the strong judge")
+
+    print(f"Judge spend: ${ledger.total_cost:.4f} ({ledger.total_tokens} tokens)")
+    for stage, totals in sorted(ledger.totals_by("stage").items()):
+        print(f"  {stage}: ${totals['cost']:.4f} over {totals['calls']} calls")
+    for metric, totals in sorted(ledger.totals_by("metric").items()):
+        print(f"  {metric}: ${totals['cost']:.4f} ({totals['input_tokens']} input, {totals['output_tokens']} output tokens)")
+
+def print_coverage(report, deadline, total):
+    risk = "n/a" if report["risk_covered"] is None else f"{report['risk_covered']:.1%}"
+    print(f"Coverage: {report['evaluated']} of {total} conversations judged, riskiest first "
+          f"({risk} of the total risk score)")
+    if deadline is not None and deadline.stopped:
+        print(f"Deadline: stopped with {max(deadline.remaining, 0):.0f}s left; "
+              f"{len(deadline.unreached)} conversations were not reached")
+    for signal, (covered, count) in report["by_signal"].items():
+        print(f"  {signal}: {covered}/{count} judged")
+    for row in report["top_missed"][:5]:
+        print(f"  not judged: #{row['rank']} {row['convo_id']} (risk {row['score']:.1f}, {row['status']})")
+
+def main(argv=None):
+    run_started = time.monotonic()
+    parser = argparse.ArgumentParser(description="Evaluate yesterday's Kustomer conversations and publish the report")
+    add_judge_arguments(parser)
+    parser.add_argument("--budget-usd", type=float, default=None, help="Hard limit on judge spend for this run")
+    parser.add_argument("--budget-policy", choices=BUDGET_POLICIES, default=STOP,
+                        help="What to do when the rest of the run would exceed the budget")
+    parser.add_argument("--budget-judge", default=DEFAULT_BUDGET_JUDGE,
+                        help="Judge the cheaper-judge policy switches to")
+    parser.add_argument("--full", action="store_true",
+                        help="Re-evaluate every conversation in full instead of only the turns added since last time")
+    parser.add_argument("--context-turns", type=int, default=DEFAULT_CONTEXT_TURNS,
+                        help="Earlier turns sent to the judge as context when evaluating new turns")
+    parser.add_argument("--state", default=DEFAULT_STATE_PATH, help="Per-conversation evaluation state")
+    parser.add_argument("--trend-index", default=DEFAULT_INDEX_PATH, help="Trend index the run is recorded in")
+    parser.add_argument("--estimate-only", action="store_true", help="Print the cost estimate and exit before judging")
+    parser.add_argument("--deadline-minutes", type=float, default=None,
+                        help="Stop judging in time to finish within this many minutes of the start of the run; "
+                             "conversations are judged riskiest first")
+    args = parser.parse_args(argv)
 
-def main():
     load_dotenv()
 
     # Add Google Drive folder ID to environment variables
@@ -19,50 +135,129 @@ def main():
     if not drive_folder_id:
         print("Warning: GOOGLE_DRIVE_FOLDER_ID not set. Google Drive upload will be skipped.")
 
-    deepeval_key = os.getenv("DEEPEVAL_API_KEY")
     kustomer_key = os.getenv("KUSTOMER_API_KEY")
     assigned_user_id = os.getenv("KUSTOMER_ASSIGNED_USER_ID")  
     queue_id = os.getenv("KUSTOMER_QUEUE_ID")
 
-    kustomer = KustomerClient(api_key=kustomer_key, assigned_user_id=assigned_user_id, queue_id=queue_id)
+    # EVALUATOR_CASSETTE records (or replays) Kustomer, judge and Drive traffic; see README
+    cassette = Cassette.from_env()
+    if cassette:
+        print(f"Cassette {cassette.mode} mode: {cassette.path}")
+
+    kustomer = KustomerClient(api_key=kustomer_key, assigned_user_id=assigned_user_id, queue_id=queue_id,
+                              cassette=cassette)
     conversations_data = kustomer.fetch_yesterdays_conversations()
 
-    test_cases = []
-    for convo in conversations_data:
-        convo_id = convo.get("id")
-        if not convo_id:
-            continue
-        messages = kustomer.fetch_single_conversation(convo_id)
-        transcript = TestCaseBuilder.kustomer_messages_to_transcript(messages)
-        if transcript:
-            test_case = TestCaseBuilder.build_conversation_test_case(transcript, convo_id)
-            test_cases.append(test_case)
+    # Kustomer stamps each conversation with its latest message time, so unchanged ones need not be fetched
+    last_message_at = {convo.get("id"): (convo.get("attributes") or {}).get("lastMessageAt")
+                       for convo in conversations_data if convo.get("id")}
+    # Search results carry every conversation attribute; only the IDs are needed from here on
+    del conversations_data
+
+    state = ConversationState(args.state)
+    # Scores from a different judge are not comparable, so changing --judge/--cascade-judge re-evaluates in full
+    judges = JudgeConfig.from_args(args)
+    version = metric_version(judges=judges)
+    states = {} if args.full else state.get_many(last_message_at)
+    convo_ids = [convo_id for convo_id, stamp in last_message_at.items()
+                 if not (stamp and convo_id in states and states[convo_id]["metric_version"] == version
+                         and states[convo_id]["last_message_at"] == stamp)]
+
+    cursors = {}
+    def track_cursors(payloads):
+        for convo_id, messages in payloads:
+            cursors[convo_id] = TestCaseBuilder.message_cursor(messages)
+            yield convo_id, messages
 
-    if not test_cases:
+    # Payloads are fetched concurrently, a bounded window ahead of the converter, and released once converted
+    fetched = TestCaseBuilder.kustomer_payloads_to_store(track_cursors(kustomer.fetch_conversations(convo_ids)))
+    store, plans = plan_increments(fetched, states, cursors, version, args.context_turns, full=args.full)
+    incremental = sum(1 for plan in plans.values() if plan["new_start"])
+    unfetched = len(convo_ids) - len(fetched)
+    print(f"{len(last_message_at)} conversations: {len(last_message_at) - unfetched - len(store)} unchanged, "
+          f"{incremental} with new turns, {len(store) - incremental} evaluated in full"
+          + (f", {unfetched} without messages" if unfetched else ""))
+    del fetched
+
+    if not len(store):
+        record_state(state, plans, None, version, last_message_at)
+        state.close()
         print("No test cases found. Exiting.")
         return
 
     timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
 
-    evaluator = ConversationEvaluator(deepeval_api_key=deepeval_key)
-    results = evaluator.evaluate(test_cases)
+    evaluator, ledger, traces = build_evaluator(args, cassette, f"nightly_{timestamp}")
+    estimate = evaluator.estimate_cost(store)
+    print(f"Estimated judge cost: ${estimate['cost']:.4f} for {estimate['conversations']} conversations "
+          f"({estimate['calls']} calls, ~{estimate['input_tokens']} input and ~{estimate['output_tokens']} output "
+          f"tokens with {estimate['model']})")
+    if args.estimate_only:
+        state.close()
+        if traces is not None:
+            traces.close()
+        return
+    budget = None
+    if args.budget_usd is not None and not evaluator.billed:
+        print("Judge calls of this run are not billed (stub judge or cassette replay); --budget-usd is ignored")
+    elif args.budget_usd is not None:
+        budget = SpendBudget(args.budget_usd, ledger, policy=args.budget_policy, cheaper_judge=args.budget_judge)
+        if estimate["cost"] > args.budget_usd:
+            print(f"Estimate exceeds the ${args.budget_usd:.2f} budget; the {args.budget_policy} policy will apply")
+    # Riskiest conversations first, so a run cut short by its deadline or budget misses the least important ones
+    ranked = prioritize(store)
+    deadline = Deadline(args.deadline_minutes * 60, started_at=run_started) if args.deadline_minutes else None
+    results = evaluator.evaluate_store(store, indices=[entry["index"] for entry in ranked], budget=budget,
+                                       deadline=deadline)
+    conversation_scores = record_state(state, plans, results, version, last_message_at)
+    state.close()
+    print_judge_usage(args, results.test_results, ledger, traces)
+    if budget is not None:
+        for event in budget.events:
+            print(f"Budget: {event}")
+        if budget.skipped:
+            print(f"Budget: {budget.skipped} of {len(store)} conversations were not evaluated; results are partial")
+    coverage = coverage_report(ranked, [r.additional_metadata["convo_id"] for r in results.test_results],
+                               deadline.unreached if deadline is not None else [])
+    print_coverage(coverage, deadline, len(store))
+    coverage_csv = f'deepeval_results/convo_eval/coverage_{timestamp}.csv'
+    write_coverage_csv(coverage, coverage_csv)
+    print(f"Wrote coverage report to {coverage_csv}")
+    if ledger.entries:
+        ledger_csv = f'deepeval_results/convo_eval/cost_ledger_{timestamp}.csv'
+        ledger.write_csv(ledger_csv)
+        print(f"Wrote cost ledger to {ledger_csv}")
 
     eval_csv = f'deepeval_results/convo_eval/eval_results_{timestamp}.csv'
     if results:
         EvaluationReporter.write_evaluation_results_to_csv(results, eval_csv)
         print(f"Wrote evaluation results to {eval_csv} (local file, available before upload)")
+
+        trend_index = TrendIndex(args.trend_index)
+        partial = (deadline is not None and deadline.stopped) or (budget is not None and budget.skipped > 0)
+        trend_index.record_run(timestamp, TrendIndex.metric_rows_from_results(results, conversation_scores),
+                               source=PARTIAL_SOURCE if partial else NIGHTLY_SOURCE)
+        if partial:
+            print(f"Recorded as a partial run ({PARTIAL_SOURCE}): nightly trends and regression checks leave it out")
+        print("Run summary:")
+        for line in trend_index.run_summary(timestamp):
+            print(f"  {line}")
+        trend_index.close()
     else:
         print("No evaluation results to write due to error.")
 
     # Test Google Drive upload if folder ID is provided
     if drive_folder_id:
         try:
-            eval_file_id = EvaluationReporter.upload_to_google_drive(eval_csv, drive_folder_id)
+            eval_file_id = EvaluationReporter.upload_to_google_drive(eval_csv, drive_folder_id, cassette=cassette)
             print(f"Successfully uploaded evaluation results file. File ID: {eval_file_id}")
         except Exception as e:
             print(f"Failed to upload files to Google Drive: {str(e)}")
     else:
         print("Skipping Google Drive upload as GOOGLE_DRIVE_FOLDER_ID is not set.")
 
+    if cassette:
+        cassette.save()
+
 if __name__ == "__main__":
     main() 
\ No newline at end of file
@@ -4,14 +4,21 @@ Pre-merge check script for chatbot evaluation. Reads simulated conversations, ev
 """
 import os
 import sys
+import argparse
 from dotenv import load_dotenv
 from core.test_case_builder import TestCaseBuilder
 from core.evaluator import ConversationEvaluator
+from core.cassette import Cassette
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Evaluate simulated conversations and exit non-zero if any fail")
+    parser.add_argument("--csv", default="mock_data/simulated_conversations.csv",
+                        help="Simulated conversations CSV to evaluate")
+    args = parser.parse_args(argv)
 
-def main():
     load_dotenv()
     deepeval_key = os.getenv("DEEPEVAL_API_KEY")
-    csv_path = "mock_data/simulated_conversations.csv"
+    csv_path = args.csv
     if not os.path.exists(csv_path):
         print(f"Simulated conversations CSV not found at {csv_path}")
         sys.exit(1)
@@ -21,8 +28,12 @@ def main():
         print("No test cases found in simulated conversations CSV.")
         sys.exit(1)
 
-    evaluator = ConversationEvaluator(deepeval_api_key=deepeval_key)
+    # EVALUATOR_CASSETTE records (or replays) judge traffic; see README
+    cassette = Cassette.from_env()
+    evaluator = ConversationEvaluator(deepeval_api_key=deepeval_key, cassette=cassette)
     results = evaluator.evaluate(test_cases)
+    if cassette:
+        cassette.save()
 
     all_passed = True
     for test_result in results.test_results:
@@ -0,0 +1,158 @@
+#!/usr/bin/env python3
+"""
+Red-teaming script for the chatbot. Generates adversarial probes with deepteam (cached and deduplicated in a
+pool shared across runs), fires them at the ConversationGenerator endpoint with bounded concurrency, scores the
+replies in batches with deepteam's vulnerability metrics, and writes a vulnerability report with timings.
+"""
+import os
+import sys
+import csv
+import json
+import time
+import asyncio
+import logging
+import argparse
+from datetime import datetime
+from dotenv import load_dotenv
+from core.red_team import (
+    AttackPool,
+    DEFAULT_ATTACKS,
+    DEFAULT_POOL_PATH,
+    DEFAULT_VULNERABILITIES,
+    BOUNDARY_VULNERABILITY,
+    TARGET_PURPOSE,
+    generate_attacks,
+    resolve_attacks,
+    resolve_vulnerabilities,
+    run_probes,
+    score_results,
+    summarize,
+)
+from scripts.chatbot.simulate_convo import ConversationGenerator, DEFAULT_API_URL
+
+def write_report(results, summary, timings, output_dir):
+    """
+    Write per-probe results to CSV and the summary with timings to JSON.
+    Returns:
+        tuple: (csv path, json path)
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+    csv_path = os.path.join(output_dir, f"red_team_{timestamp}.csv")
+    json_path = os.path.join(output_dir, f"red_team_{timestamp}.json")
+    with open(csv_path, 'w', newline='') as csvfile:
+        writer = csv.writer(csvfile)
+        writer.writerow(['attack_id', 'vulnerability', 'vulnerability_type', 'attack_method', 'input', 'output',
+                         'score', 'reason', 'error', 'latency_seconds'])
+        for r in results:
+            writer.writerow([r["id"], r["vulnerability"], r["vulnerability_type"], r["attack_method"], r["input"],
+                             r["output"], r["score"], r["reason"], r["error"],
+                             "" if r["latency"] is None else f"{r['latency']:.3f}"])
+    with open(json_path, 'w') as f:
+        json.dump({"timings": timings, **summary}, f, indent=2)
+    return csv_path, json_path
+
+async def red_team(args):
+    from deepteam.red_teamer import RedTeamer
+
+    vulnerabilities = resolve_vulnerabilities(args.vulnerabilities or DEFAULT_VULNERABILITIES)
+    attacks = resolve_attacks(args.attacks or DEFAULT_ATTACKS)
+    red_teamer = RedTeamer(simulator_model=args.simulator_model, evaluation_model=args.evaluation_model,
+                           target_purpose=TARGET_PURPOSE, async_mode=True, max_concurrent=args.score_concurrency)
+    timings = {}
+
+    pool = AttackPool(args.pool)
+    pooled_before = len(pool)
+    start = time.perf_counter()
+    if not args.no_generate:
+        await generate_attacks(pool, red_teamer.attack_simulator, vulnerabilities, attacks, args.attacks_per_type,
+                               TARGET_PURPOSE, args.generate_concurrency, include_boundary=not args.no_boundary)
+        pool.save()
+    timings["generate_seconds"] = time.perf_counter() - start
+
+    names = [vulnerability.get_name() for vulnerability in vulnerabilities]
+    if not args.no_boundary:
+        names.append(BOUNDARY_VULNERABILITY)
+    probes = pool.select(names, [attack.get_name() for attack in attacks])[:args.max_probes]
+    print(f"Attack pool: {len(pool)} attacks ({len(pool) - pooled_before} new this run), "
+          f"{len(probes)} probes selected")
+    if not probes:
+        return [], timings
+
+    generator = ConversationGenerator(api_url=args.api_url, max_connections=args.concurrency)
+    start = time.perf_counter()
+    results = await run_probes(probes, generator.send_message, args.concurrency)
+    timings["probe_seconds"] = time.perf_counter() - start
+    timings["probes_per_second"] = len(results) / timings["probe_seconds"]
+    print(f"Sent {len(results)} probes in {timings['probe_seconds']:.1f}s "
+          f"({timings['probes_per_second']:.1f}/s at concurrency {args.concurrency})")
+
+    start = time.perf_counter()
+    await score_results(results, red_teamer.get_red_teaming_metrics_map(), args.score_batch_size,
+                        args.score_concurrency,
+                        on_batch=lambda done: print(f"Scored {done}/{len(results)} replies"))
+    timings["score_seconds"] = time.perf_counter() - start
+    return results, timings
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Red-team the chatbot endpoint with deepteam attacks")
+    parser.add_argument("--api-url", default=DEFAULT_API_URL, help="Chatbot endpoint to attack")
+    parser.add_argument("--vulnerability", action="append", dest="vulnerabilities",
+                        help=f"deepteam vulnerability class (repeatable). Defaults to {', '.join(DEFAULT_VULNERABILITIES)}")
+    parser.add_argument("--attack", action="append", dest="attacks",
+                        help=f"deepteam single-turn attack class (repeatable). Defaults to {', '.join(DEFAULT_ATTACKS)}")
+    parser.add_argument("--attacks-per-type", type=int, default=5,
+                        help="Grow the pool to this many attacks per vulnerability type")
+    parser.add_argument("--no-boundary", action="store_true", help="Skip the poem/homework/coding boundary probes")
+    parser.add_argument("--no-generate", action="store_true", help="Only send attacks already in the pool")
+    parser.add_argument("--max-probes", type=int, default=None, help="Send at most this many probes")
+    parser.add_argument("--concurrency", type=int, default=32, help="Chatbot requests in flight")
+    parser.add_argument("--generate-concurrency", type=int, default=8, help="Concurrent attack simulator calls")
+    parser.add_argument("--score-concurrency", type=int, default=16, help="Concurrent judge calls")
+    parser.add_argument("--score-batch-size", type=int, default=200, help="Replies scored per batch")
+    parser.add_argument("--simulator-model", default="gpt-4o-mini", help="Model that writes attacks")
+    parser.add_argument("--evaluation-model", default="gpt-4o", help="Model that scores replies")
+    parser.add_argument("--pool", default=DEFAULT_POOL_PATH, help="Attack pool shared across runs")
+    parser.add_argument("--output-dir", default="deepeval_results/red_team", help="Where reports are written")
+    parser.add_argument("--min-pass-rate", type=float, default=None,
+                        help="Exit non-zero if any vulnerability type resists fewer than this share of attacks")
+    args = parser.parse_args(argv)
+
+    load_dotenv()
+    # Per-request logging from ConversationGenerator would drown out the report at thousands of probes
+    logging.getLogger("scripts.chatbot.simulate_convo").setLevel(logging.WARNING)
+
+    start = time.perf_counter()
+    results, timings = asyncio.run(red_team(args))
+    timings["total_seconds"] = time.perf_counter() - start
+    if not results:
+        print("No probes to send.")
+        return
+
+    summary = summarize(results)
+    csv_path, json_path = write_report(results, summary, timings, args.output_dir)
+
+    print("Vulnerability report (share of attacks resisted):")
+    for name, group in sorted(summary["by_vulnerability_type"].items(), key=lambda item: item[1]["pass_rate"] or 0):
+        rate = "n/a" if group["pass_rate"] is None else f"{group['pass_rate']:.1%}"
+        print(f"  {name}: {rate} ({group['passed']}/{group['passed'] + group['failed']}, {group['errored']} errored)")
+    print("By attack method:")
+    for name, group in sorted(summary["by_attack_method"].items(), key=lambda item: item[1]["pass_rate"] or 0):
+        rate = "n/a" if group["pass_rate"] is None else f"{group['pass_rate']:.1%}"
+        print(f"  {name}: {rate} ({group['passed']}/{group['passed'] + group['failed']}, {group['errored']} errored)")
+    if summary["latency_p50"] is not None:
+        print(f"Chatbot latency: p50 {summary['latency_p50']:.2f}s, p95 {summary['latency_p95']:.2f}s, "
+              f"max {summary['latency_max']:.2f}s")
+    print(f"Timings: generate {timings['generate_seconds']:.1f}s, probe {timings['probe_seconds']:.1f}s, "
+          f"score {timings['score_seconds']:.1f}s, total {timings['total_seconds']:.1f}s")
+    print(f"Wrote {csv_path} and {json_path}")
+
+    if args.min_pass_rate is not None:
+        weak = [name for name, group in summary["by_vulnerability_type"].items()
+                if group["pass_rate"] is not None and group["pass_rate"] < args.min_pass_rate]
+        if weak:
+            print(f"Below {args.min_pass_rate:.0%}: {', '.join(sorted(weak))}")
+            sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""
+Near-real-time evaluation service. Listens for Kustomer conversation webhooks, queues closed conversations
+durably and scores them in micro-batches, flushing by batch size or by how long the oldest event has waited.
+Queue depth, latency-to-score and throughput are served as JSON on /metrics.
+"""
+import os
+import logging
+import argparse
+from dotenv import load_dotenv
+from core.cassette import Cassette
+from core.evaluator import ConversationEvaluator, JudgeConfig, METRIC_DEFINITIONS
+from evaluator_service.event_queue import DEFAULT_QUEUE_PATH, EventQueue
+from evaluator_service.kustomer_client import KustomerClient
+from evaluator_service.service import (
+    DEFAULT_BATCH_SIZE,
+    DEFAULT_MAX_WAIT_SECONDS,
+    DEFAULT_OUTPUT_DIR,
+    METRICS_PATH,
+    WEBHOOK_PATH,
+    EvaluationService,
+    make_server,
+)
+
+# Shared secret Kustomer is configured to send with each webhook
+WEBHOOK_SECRET_ENV = "EVALUATOR_WEBHOOK_SECRET"
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Score closed Kustomer conversations as their webhooks arrive")
+    parser.add_argument("--host", default="127.0.0.1", help="Interface to listen on")
+    parser.add_argument("--port", type=int, default=8080, help="Port to listen on")
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE,
+                        help="Score a batch as soon as this many conversations are waiting")
+    parser.add_argument("--max-wait", type=float, default=DEFAULT_MAX_WAIT_SECONDS,
+                        help="Score a partial batch once its oldest conversation has waited this many seconds")
+    parser.add_argument("--queue", default=DEFAULT_QUEUE_PATH, help="Durable event queue")
+    parser.add_argument("--max-attempts", type=int, default=3, help="Give up on a conversation after this many tries")
+    parser.add_argument("--output-dir", default=DEFAULT_OUTPUT_DIR, help="Where each batch's result CSV is written")
+    parser.add_argument("--metric", action="append", dest="metrics", choices=list(METRIC_DEFINITIONS),
+                        help="Metric to score (repeatable). Defaults to every metric.")
+    parser.add_argument("--judge", help="Judge model (defaults to deepeval's default model); "
+                                        "\"stub\" scores offline for local testing")
+    parser.add_argument("--verbose", action="store_true", help="Log every batch and request")
+    args = parser.parse_args(argv)
+
+    load_dotenv()
+    logging.basicConfig(level=logging.DEBUG if args.verbose else logging.INFO,
+                        format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+    cassette = Cassette.from_env()
+    if cassette:
+        print(f"Cassette {cassette.mode} mode: {cassette.path}")
+
+    kustomer = None
+    if os.getenv("KUSTOMER_API_KEY"):
+        kustomer = KustomerClient(api_key=os.getenv("KUSTOMER_API_KEY"),
+                                  assigned_user_id=os.getenv("KUSTOMER_ASSIGNED_USER_ID"),
+                                  queue_id=os.getenv("KUSTOMER_QUEUE_ID"), cassette=cassette)
+    else:
+        print("Warning: KUSTOMER_API_KEY not set. Only events that carry their messages can be scored.")
+
+    evaluator = ConversationEvaluator(deepeval_api_key=os.getenv("DEEPEVAL_API_KEY"), metric_names=args.metrics,
+                                      judges=JudgeConfig(judge=args.judge), cassette=cassette)
+    queue = EventQueue(args.queue, max_attempts=args.max_attempts)
+    service = EvaluationService(queue, evaluator, fetch_messages=kustomer.fetch_conversations if kustomer else None,
+                                batch_size=args.batch_size, max_wait_seconds=args.max_wait,
+                                output_dir=args.output_dir)
+    server = make_server(service, args.host, args.port, secret=os.getenv(WEBHOOK_SECRET_ENV))
+    pending = queue.depth()
+    print(f"Listening on http://{args.host}:{server.server_port}{WEBHOOK_PATH} "
+          f"(metrics on {METRICS_PATH}, {pending} conversations already queued)")
+    service.start()
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("Shutting down; unscored conversations stay queued for the next start.")
+    finally:
+        server.server_close()
+        service.stop()
+        queue.close()
+
+if __name__ == "__main__":
+    main()
@@ -4,14 +4,16 @@ Script to generate simulated conversations for chatbot evaluation.
 Uses a configured API endpoint to generate responses and writes conversations to CSV.
 """
 import os
+import asyncio
 import logging
-from typing import Dict, List
+import argparse
+from typing import Dict, List, Optional
 import requests
 from dotenv import load_dotenv
 import csv
 from datetime import datetime
-
-from deepeval.conversation_simulator import ConversationSimulator
+from core.test_case_builder import TestCaseBuilder
+from core.ab_replay import DEFAULT_SCRIPTS_PATH, ScriptStore, add_simulated_conversations
 
 # Configure logging
 logging.basicConfig(
@@ -20,18 +22,26 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+DEFAULT_API_URL = "https://gametime-ai-chatbot-staging.vercel.app/api/dot/test-response"
+
 class ConversationGenerator:
     """Handles generation of simulated conversations using an API endpoint."""
     
-    def __init__(self, api_url: str = "https://gametime-ai-chatbot-staging.vercel.app/api/dot/test-response"):
+    def __init__(self, api_url: str = DEFAULT_API_URL,
+                 max_connections: int = 10):
         """
         Initialize the conversation generator.
         
         Args:
             api_url (str): URL of the API endpoint to use for responses
+            max_connections (int): Size of the HTTP connection pool shared by concurrent requests
         """
         self.api_url = api_url
         self.jwt_secret = os.getenv("JWT_SECRET", "test-token")
+        self.session = requests.Session()
+        adapter = requests.adapters.HTTPAdapter(pool_connections=1, pool_maxsize=max_connections)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
         
         # Define standard user intentions for simulation
         self.user_intentions = [
@@ -46,55 +56,60 @@ class ConversationGenerator:
             "verification code"
         ]
 
-    async def model_callback(self, input_text: str) -> str:
+    def send_message(self, input_text: str) -> str:
         """
-        Callback function to interact with the API.
+        Send one message to the API and return the chatbot's reply. Blocking; raises on failure.
 
         Args:
-            input_text: The input prompt to send to the model
+            input_text: The message to send
 
         Returns:
-            The model's response as a string
+            The reply text
         """
         payload = {
             "userMessage": input_text,
             "purchaseConfirmationNumber": "ZT268QDK3D"
         }
-        
+        response = self.session.post(
+            self.api_url,
+            json=payload,
+            headers={
+                "Authorization": f"Bearer {self.jwt_secret}",
+                "Accept": "application/json"
+            },
+            timeout=30
+        )
+        if response.status_code != 200:
+            raise requests.HTTPError(f"{response.status_code}: {response.text}", response=response)
+        return response.json().get("text", "")
+
+    async def model_callback(self, input_text: str, **kwargs) -> str:
+        """
+        Callback function to interact with the API. The request runs in a worker thread so that
+        concurrent callbacks do not block the event loop.
+
+        Args:
+            input_text: The input prompt to send to the model
+            **kwargs: Ignored; deepeval's simulator also passes the conversation history, which the
+                endpoint does not take
+
+        Returns:
+            The model's response as a string
+        """
         logger.info(f"Sending request to API with prompt: {input_text[:50]}...")
         
         try:
-            response = requests.post(
-                self.api_url,
-                json=payload,
-                headers={
-                    "Authorization": f"Bearer {self.jwt_secret}",
-                    "Accept": "application/json"
-                },
-                timeout=30
-            )
-            
-            logger.info(f"Response status: {response.status_code}")
-            
-            if response.status_code != 200:
-                logger.error(f"Error response: {response.text}")
-                return f"Error: {response.status_code}"
-                
-            try:
-                response_data = response.json()
-                result = response_data.get("text", "")
-                logger.info(f"Received response: {result[:50]}...")
-                return result
-            except Exception as e:
-                logger.error(f"Error parsing JSON: {e}")
-                return f"Error parsing response: {str(e)}"
+            result = await asyncio.to_thread(self.send_message, input_text)
+            logger.info(f"Received response: {result[:50]}...")
+            return result
         except Exception as e:
             logger.error(f"Exception during API call: {e}")
             return f"Error: {str(e)}"
 
     def generate_conversations(self, num_conversations: int = 2, 
                              min_turns: int = 5, 
-                             max_turns: int = 20) -> List:
+                             max_turns: int = 20,
+                             user_intentions: Optional[Dict[str, int]] = None) -> List:
         """
         Generate simulated conversations.
         
@@ -102,22 +117,31 @@ class ConversationGenerator:
             num_conversations (int): Number of conversations to generate
             min_turns (int): Minimum number of turns per conversation
             max_turns (int): Maximum number of turns per conversation
+            user_intentions (dict, optional): Conversations per intention. Overrides num_conversations,
+                which is otherwise spread round-robin over self.user_intentions
             
         Returns:
             List: List of generated conversation test cases
         """
-        logger.info(f"Generating {num_conversations} conversations...")
-        
+        from deepeval.conversation_simulator import ConversationSimulator
+
+        if user_intentions is None:
+            # The simulator takes a count per intention; spread the conversations round-robin
+            user_intentions = {}
+            for i in range(num_conversations):
+                intention = self.user_intentions[i % len(self.user_intentions)]
+                user_intentions[intention] = user_intentions.get(intention, 0) + 1
+        logger.info(f"Generating {sum(user_intentions.values())} conversations...")
+
         simulator = ConversationSimulator(
-            user_intentions=self.user_intentions,
+            user_intentions=user_intentions,
             user_profile_items=self.user_profile_items
         )
         
         test_cases = simulator.simulate(
             model_callback=self.model_callback,
             min_turns=min_turns,
-            max_turns=max_turns,
-            num_conversations=num_conversations
+            max_turns=max_turns
         )
         
         logger.info(f"Successfully generated {len(test_cases)} conversations")
@@ -143,8 +167,8 @@ class ConversationGenerator:
             writer.writerow(['Turn', 'Input', 'Actual Output'])
             
             for i, convo in enumerate(test_cases):
-                for j, turn in enumerate(convo.turns):
-                    writer.writerow([f"Turn {j+1}", turn.input, turn.actual_output])
+                for j, (user, reply) in enumerate(TestCaseBuilder.conversation_exchanges(convo)):
+                    writer.writerow([f"Turn {j+1}", user, reply])
                 
                 # Add 3 empty lines between conversations
                 if i < len(test_cases) - 1:
@@ -155,8 +179,17 @@ class ConversationGenerator:
         logger.info(f"Conversations written to {csv_filename}")
         return csv_filename
 
-def main():
+def main(argv=None):
     """Main entry point for the script."""
+    parser = argparse.ArgumentParser(description="Generate simulated conversations against the chatbot API")
+    parser.add_argument("--num-conversations", type=int, default=2, help="Number of conversations to simulate")
+    parser.add_argument("--min-turns", type=int, default=5, help="Minimum turns per conversation")
+    parser.add_argument("--max-turns", type=int, default=20, help="Maximum turns per conversation")
+    parser.add_argument("--save-scripts", nargs="?", const=DEFAULT_SCRIPTS_PATH, default=None, metavar="PATH",
+                        help="Also store the simulated user turns per intention for ab_replay.py "
+                             f"(default path {DEFAULT_SCRIPTS_PATH})")
+    args = parser.parse_args(argv)
+
     try:
         # Load environment variables
         load_dotenv()
@@ -166,14 +199,20 @@ def main():
         
         # Generate conversations
         test_cases = generator.generate_conversations(
-            num_conversations=2,
-            min_turns=5,
-            max_turns=20
+            num_conversations=args.num_conversations,
+            min_turns=args.min_turns,
+            max_turns=args.max_turns
         )
         
         # Write to CSV
         csv_path = generator.write_conversations_to_csv(test_cases)
         logger.info(f"Successfully generated conversations at {csv_path}")
+
+        if args.save_scripts:
+            store = ScriptStore(args.save_scripts)
+            added = add_simulated_conversations(store, test_cases)
+            store.save()
+            logger.info(f"Stored {added} new user scripts in {args.save_scripts}")
         
     except Exception as e:
         logger.error(f"Error generating conversations: {str(e)}")
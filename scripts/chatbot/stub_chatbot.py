@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""
+Local stand-in for the staging chatbot's /api/dot/test-response endpoint, for checking the load tester and
+replay tooling without touching staging. Replies are canned; latency, jitter and the error rate are
+configurable.
+
+    evaluator stub-chatbot --port 8787 --latency 0.3 --error-rate 0.02 &
+    evaluator load-test --url http://127.0.0.1:8787/api/dot/test-response --users 20
+"""
+import json
+import time
+import random
+import argparse
+import threading
+from urllib.parse import urlparse
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+ENDPOINT_PATH = "/api/dot/test-response"
+
+def make_server(host, port, latency=0.2, jitter=0.5, error_rate=0.0, max_in_flight=None, seed=0):
+    """
+    Build the stub server.
+    Args:
+        host (str): Interface to listen on.
+        port (int): Port to listen on (0 picks a free one).
+        latency (float): Mean seconds per reply.
+        jitter (float): Replies take latency times a factor drawn uniformly from 1 +/- jitter.
+        error_rate (float): Fraction of requests answered with a 500.
+        max_in_flight (int, optional): Requests served at once; others wait, so latency grows with load the
+            way a saturated backend's does.
+        seed (int): Seeds latencies and injected errors.
+    Returns:
+        ThreadingHTTPServer: The server; call serve_forever().
+    """
+    rng = random.Random(seed)
+    rng_lock = threading.Lock()
+    slots = threading.Semaphore(max_in_flight) if max_in_flight else None
+
+    class StubChatbotHandler(BaseHTTPRequestHandler):
+        def _reply(self, status, body):
+            data = json.dumps(body).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def do_POST(self):
+            if urlparse(self.path).path != ENDPOINT_PATH:
+                return self._reply(404, {"error": "not found"})
+            if not self.headers.get("Authorization", "").startswith("Bearer "):
+                return self._reply(401, {"error": "missing bearer token"})
+            try:
+                payload = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+            except ValueError:
+                return self._reply(400, {"error": "body is not JSON"})
+            message = payload.get("userMessage") or ""
+            with rng_lock:
+                delay = max(0.0, latency * rng.uniform(1 - jitter, 1 + jitter))
+                fail = rng.random() < error_rate
+            if slots:
+                slots.acquire()
+            try:
+                time.sleep(delay)
+            finally:
+                if slots:
+                    slots.release()
+            if fail:
+                return self._reply(500, {"error": "injected failure"})
+            self._reply(200, {"text": f"Thanks for reaching out to Gametime support. You said: {message[:200]} "
+                                      f"Could you share your order number "
+                                      f"({payload.get('purchaseConfirmationNumber', 'unknown')}) so I can help?"})
+
+        def log_message(self, format, *args):
+            pass
+
+    return ThreadingHTTPServer((host, port), StubChatbotHandler)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serve a stub of the chatbot test-response endpoint")
+    parser.add_argument("--host", default="127.0.0.1", help="Interface to listen on")
+    parser.add_argument("--port", type=int, default=8787, help="Port to listen on")
+    parser.add_argument("--latency", type=float, default=0.2, help="Mean seconds per reply")
+    parser.add_argument("--jitter", type=float, default=0.5, help="Relative spread of reply latency")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of requests answered with a 500")
+    parser.add_argument("--max-in-flight", type=int, default=None,
+                        help="Requests served at once; the rest queue, so latency grows under load")
+    parser.add_argument("--seed", type=int, default=0, help="Seed for latencies and injected errors")
+    args = parser.parse_args(argv)
+
+    server = make_server(args.host, args.port, args.latency, args.jitter, args.error_rate, args.max_in_flight,
+                         args.seed)
+    print(f"Stub chatbot on http://{args.host}:{server.server_port}{ENDPOINT_PATH}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,55 @@
+#!/usr/bin/env python3
+"""
+Trend query script for chatbot evaluation. Reads the local trend index written by the nightly report and prints
+rolling pass rates, score means and costs per metric, optionally ingesting historical result CSVs first.
+"""
+import os
+import glob
+import argparse
+from datetime import date
+from core.trend_index import NIGHTLY_SOURCE, SOURCES, TrendIndex, DEFAULT_INDEX_PATH
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Query rolling metric trends across nightly runs")
+    parser.add_argument("--metric", action="append", help="Metric to report (repeatable). Defaults to all metrics.")
+    parser.add_argument("--days", type=int, default=7, help="Rolling window length in days")
+    parser.add_argument("--end", type=date.fromisoformat, default=None, help="Last day of the window (YYYY-MM-DD)")
+    parser.add_argument("--ingest", metavar="DIR",
+                        help="Ingest eval_results_*.csv files from DIR before querying (e.g. deepeval_results/convo_eval)")
+    parser.add_argument("--index", default=DEFAULT_INDEX_PATH, help="Trend index path")
+    parser.add_argument("--source", choices=SOURCES, default=NIGHTLY_SOURCE,
+                        help="Report nightly runs, partial nightly runs, backfilled re-scores or multi-target runs")
+    parser.add_argument("--check-run", metavar="RUN_ID", help="Print the summary and regression flags for one run")
+    args = parser.parse_args(argv)
+
+    trend_index = TrendIndex(args.index)
+
+    if args.ingest:
+        ingested = 0
+        for csv_path in sorted(glob.glob(os.path.join(args.ingest, "eval_results_*.csv"))):
+            ingested += trend_index.ingest_csv(csv_path)
+        print(f"Ingested {ingested} result files from {args.ingest}")
+
+    if args.check_run:
+        for line in trend_index.run_summary(args.check_run, rolling_days=args.days):
+            print(line)
+        trend_index.close()
+        return
+
+    metrics = args.metric or trend_index.metrics(args.source)
+    if not metrics:
+        print("Trend index is empty.")
+    for metric in metrics:
+        window = trend_index.rolling(metric, days=args.days, end=args.end, source=args.source)
+        if not window:
+            print(f"{metric}: no runs in the last {args.days} days")
+            continue
+        score_text = f"{window['score_mean']:.3f}" if window["score_mean"] is not None else "n/a"
+        print(
+            f"{metric}: {args.days}-day pass rate {window['pass_rate']:.1%} over {window['cases']} cases "
+            f"({window['runs']} runs), mean score {score_text}, cost ${window['cost']:.4f}"
+        )
+    trend_index.close()
+
+if __name__ == "__main__":
+    main()
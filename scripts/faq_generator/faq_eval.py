@@ -2,38 +2,104 @@ import os
 import logging
 import argparse
 from dotenv import load_dotenv
-from deepeval import evaluate
-from deepeval import login_with_confident_api_key
-from deepeval.test_case import LLMTestCase
-from deepeval.metrics import HallucinationMetric
 import csv
+import re
 from datetime import datetime
+from core.context_retriever import ContextRetriever
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-def evaluate_faq_content(input_text, generated_content, context):
+# Question formats the FAQ generator emits: a markdown heading, a "Q:"/"Question 1:" prefix (optionally bold), or a
+# bold question. Bold phrases and numbered steps inside answers do not start a new item.
+QUESTION_LINE = re.compile(r'^\s*(?:#+\s|(?:\*\*)?q(?:uestion)?\s*\d*\s*[:.)-]|\*\*[^*]+\?\s*\*\*)', re.IGNORECASE)
+
+def positive_int(value):
+    number = int(value)
+    if number < 1:
+        raise argparse.ArgumentTypeError(f"expected a positive integer, got {value!r}")
+    return number
+
+def non_negative_int(value):
+    number = int(value)
+    if number < 0:
+        raise argparse.ArgumentTypeError(f"expected a non-negative integer, got {value!r}")
+    return number
+
+def split_faq_items(generated_content):
+    """
+    Split generated FAQ content into individual question/answer items.
+    A new item starts at a question-looking line once the current item already has an answer line.
+
+    Args:
+        generated_content (str): The LLM-generated FAQ content
+
+    Returns:
+        list: List of FAQ item strings (the whole content if no structure is detected)
+    """
+    items = []
+    current = []
+    has_answer = False
+    for line in generated_content.splitlines():
+        if not line.strip():
+            continue
+        is_question = bool(QUESTION_LINE.match(line)) or line.rstrip().endswith('?')
+        if is_question and current and has_answer:
+            items.append('\n'.join(current))
+            current = []
+            has_answer = False
+        current.append(line)
+        if not is_question:
+            has_answer = True
+    if current:
+        items.append('\n'.join(current))
+    return items or [generated_content]
+
+def evaluate_faq_content(input_text, generated_content, context, top_k=3, chunk_size=200):
     """
     Evaluate FAQ content using DeepEval metrics.
+
+    When context is a single string, it is chunked and indexed with BM25, and each FAQ item
+    becomes its own test case carrying only its top_k most relevant chunks.
     
     Args:
         input_text (str): The original input/prompt
         generated_content (str): The LLM-generated FAQ content
         context (str): The context/reference material to check against
+        top_k (int): Number of reference chunks attached per FAQ item. 0 attaches the full context.
+        chunk_size (int): Target number of words per reference chunk
     
     Returns:
         list: List of test cases for evaluation
     """
-    # Convert context to a list of strings if it's not already
-    context_list = [context] if isinstance(context, str) else context
-    
-    test_case = LLMTestCase(
-        input=input_text,
-        actual_output=generated_content,
-        context=context_list
+    from deepeval.test_case import LLMTestCase
+
+    # Pre-split context lists and top_k=0 keep the original single-test-case behaviour
+    if not isinstance(context, str) or top_k <= 0:
+        context_list = [context] if isinstance(context, str) else context
+        return [LLMTestCase(
+            input=input_text,
+            actual_output=generated_content,
+            context=context_list
+        )]
+
+    retriever = ContextRetriever(context, chunk_size=chunk_size, chunk_overlap=chunk_size // 5)
+    test_cases = []
+    attached_chars = 0
+    for item in split_faq_items(generated_content):
+        chunks = retriever.retrieve(item, top_k=top_k)
+        attached_chars += sum(len(chunk) for chunk in chunks)
+        test_cases.append(LLMTestCase(
+            input=input_text,
+            actual_output=item,
+            context=chunks
+        ))
+    logger.info(
+        f"Split context into {len(retriever.chunks)} chunks; attaching {attached_chars} context chars "
+        f"across {len(test_cases)} FAQ items instead of {len(context) * len(test_cases)}"
     )
-    return [test_case]
+    return test_cases
 
 def write_results_to_csv(results, filename):
     """
@@ -67,13 +133,26 @@ def write_results_to_csv(results, filename):
                     metric_data.evaluation_cost,
                 ])
 
-def main():
+def main(argv=None):
     # Set up argument parser
     parser = argparse.ArgumentParser(description='Evaluate FAQ content using DeepEval metrics')
     parser.add_argument('--input', required=True, help='The input prompt text')
     parser.add_argument('--content', required=True, help='The generated FAQ content')
-    parser.add_argument('--context', required=True, help='The reference context material')
-    args = parser.parse_args()
+    context_group = parser.add_mutually_exclusive_group(required=True)
+    context_group.add_argument('--context', help='The reference context material')
+    context_group.add_argument('--context-file', help='Path to a file containing the reference context material')
+    parser.add_argument('--top-k', type=non_negative_int, default=3,
+                        help='Reference chunks attached per FAQ item (0 sends the full context)')
+    parser.add_argument('--chunk-size', type=positive_int, default=200, help='Target words per reference chunk')
+    args = parser.parse_args(argv)
+
+    context = args.context
+    if args.context_file:
+        with open(args.context_file) as f:
+            context = f.read()
+    # An empty reference would score every FAQ item against no context at all
+    if not context.strip():
+        parser.error("the reference context is empty")
 
     load_dotenv()
     deepeval_key = os.getenv("DEEPEVAL_API_KEY")
@@ -83,7 +162,11 @@ def main():
         return
 
     # Create test cases
-    test_cases = evaluate_faq_content(args.input, args.content, args.context)
+    test_cases = evaluate_faq_content(args.input, args.content, context,
+                                      top_k=args.top_k, chunk_size=args.chunk_size)
+
+    from deepeval import evaluate, login_with_confident_api_key
+    from deepeval.metrics import HallucinationMetric
 
     # Initialize metrics
     hallucination_metric = HallucinationMetric(
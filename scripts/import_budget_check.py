@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""
+Import-time budget check for the evaluator CLI. Cold-imports the CLI and every subcommand module in a fresh
+interpreter, and exits non-zero if a heavy dependency is loaded at import time or startup exceeds the budget.
+tests/test_import_budget.py runs the same check under pytest.
+"""
+import os
+import sys
+import json
+import argparse
+import subprocess
+
+# Modules that must only ever be imported lazily, once a subcommand actually needs them
+HEAVY_MODULES = [
+    "deepeval",
+    "deepteam",
+    "googleapiclient",
+    "google.oauth2",
+    "openai",
+]
+
+PROBE = """
+import importlib, json, sys, time
+start = time.perf_counter()
+for name in sys.argv[2:]:
+    importlib.import_module(name)
+elapsed = time.perf_counter() - start
+print(json.dumps({"seconds": elapsed, "heavy": [m for m in json.loads(sys.argv[1]) if m in sys.modules]}))
+"""
+
+
+def measure(modules, repo_root):
+    """
+    Import the given modules in a fresh interpreter.
+    Returns:
+        dict: {"seconds": import wall time, "heavy": heavy modules that ended up loaded}
+    """
+    env = dict(os.environ)
+    env["PYTHONPATH"] = os.pathsep.join(
+        [os.path.join(repo_root, "src"), repo_root] + ([env["PYTHONPATH"]] if env.get("PYTHONPATH") else [])
+    )
+    output = subprocess.run(
+        [sys.executable, "-c", PROBE, json.dumps(HEAVY_MODULES)] + modules,
+        cwd=repo_root, env=env, capture_output=True, text=True, check=True,
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def targets():
+    """
+    Modules each entry point imports before doing any work: the bare CLI, and the CLI plus each subcommand.
+    """
+    from core.cli import COMMANDS
+
+    result = {"evaluator": ["core.cli"]}
+    for command, (module_name, _) in COMMANDS.items():
+        result[command] = ["core.cli", module_name]
+    return result
+
+
+def default_budget():
+    return float(os.getenv("IMPORT_BUDGET_SECONDS", "0.5"))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Fail if evaluator CLI cold start regresses")
+    parser.add_argument("--budget-seconds", type=float, default=default_budget(),
+                        help="Maximum cold import time per subcommand (best of --repeat runs)")
+    parser.add_argument("--repeat", type=int, default=3, help="Fresh interpreter runs per subcommand")
+    args = parser.parse_args(argv)
+
+    repo_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    sys.path.insert(0, os.path.join(repo_root, "src"))
+
+    failed = False
+    for name, modules in targets().items():
+        runs = [measure(modules, repo_root) for _ in range(args.repeat)]
+        best = min(run["seconds"] for run in runs)
+        heavy = sorted({module for run in runs for module in run["heavy"]})
+        status = "ok"
+        if heavy:
+            status = f"FAIL: imports {', '.join(heavy)} at startup"
+            failed = True
+        elif best > args.budget_seconds:
+            status = f"FAIL: over {args.budget_seconds:.3f}s budget"
+            failed = True
+        print(f"{name:<12} {best * 1000:8.1f} ms  {status}")
+
+    if failed:
+        print("Import-time budget check failed.")
+        sys.exit(1)
+    print("Import-time budget check passed.")
+    sys.exit(0)
+
+if __name__ == "__main__":
+    main()
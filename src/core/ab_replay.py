@@ -0,0 +1,256 @@
+import hashlib
+import json
+import math
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+from .evaluator import metric_key, metric_version
+from .jsonl_store import JsonlStore
+from .test_case_builder import TestCaseBuilder
+from .transcript_store import ASSISTANT, ROLES, USER, TurnRecord
+
+DEFAULT_SCRIPTS_PATH = "deepeval_results/.cache/ab_replay/scripts.jsonl"
+DEFAULT_SCORE_CACHE_PATH = "deepeval_results/.cache/ab_replay/scores.jsonl"
+
+
+def script_id(intention: str, user_turns: Sequence[str]) -> str:
+    payload = json.dumps([intention, [" ".join(turn.split()) for turn in user_turns]])
+    return hashlib.sha1(payload.encode("utf-8")).hexdigest()[:16]
+
+
+def transcript_hash(turns: Sequence[Tuple[str, str]]) -> str:
+    return hashlib.sha256(json.dumps([list(turn) for turn in turns]).encode("utf-8")).hexdigest()[:24]
+
+
+class ScriptStore(JsonlStore):
+    """
+    Append-only JSON-lines store of simulated user scripts: the user side of a simulated conversation,
+    keyed by the intention it was generated for. Scripts are generated once with the simulator model and
+    then replayed verbatim against any chatbot version, so versions are compared on identical inputs.
+    """
+
+    def __init__(self, path: str = DEFAULT_SCRIPTS_PATH):
+        super().__init__(path)
+
+    def add(self, intention: str, user_turns: List[str]) -> bool:
+        """
+        Add a script unless an identical one (same intention, same normalized turns) is stored.
+        Args:
+            intention (str): The simulated user's intention.
+            user_turns (list): The user's messages, in order.
+        Returns:
+            bool: True if the script was new.
+        """
+        if not user_turns:
+            return False
+        return self.append({"id": script_id(intention, user_turns), "intention": intention,
+                            "user_turns": list(user_turns)})
+
+    def count(self, intention: str) -> int:
+        return sum(1 for entry in self.entries if entry["intention"] == intention)
+
+    def select(self, intentions: Optional[Iterable[str]] = None, per_intention: Optional[int] = None) -> List[Dict]:
+        """
+        Stored scripts for the given intentions (default all), at most per_intention of each, oldest first.
+        """
+        wanted = None if intentions is None else set(intentions)
+        selected, taken = [], {}
+        for entry in self.entries:
+            if wanted is not None and entry["intention"] not in wanted:
+                continue
+            if per_intention is not None and taken.get(entry["intention"], 0) >= per_intention:
+                continue
+            taken[entry["intention"]] = taken.get(entry["intention"], 0) + 1
+            selected.append(entry)
+        return selected
+
+
+def add_simulated_conversations(store: ScriptStore, test_cases: List, default_intention: str = "unknown") -> int:
+    """
+    Store the user side of simulated conversations, keyed by the simulator's "User Intent" metadata.
+    Args:
+        store (ScriptStore): The script store.
+        test_cases (list): ConversationalTestCase objects from deepeval's ConversationSimulator.
+        default_intention (str): Intention recorded when a test case carries none.
+    Returns:
+        int: Number of new scripts.
+    """
+    added = 0
+    for test_case in test_cases:
+        intention = (test_case.additional_metadata or {}).get("User Intent") or default_intention
+        user_turns = [user for user, _ in TestCaseBuilder.conversation_exchanges(test_case)]
+        added += store.add(intention, user_turns)
+    return added
+
+
+class ScoreCache(JsonlStore):
+    """
+    Append-only JSON-lines cache of judge verdicts keyed by metric, metric definition version, judge and
+    transcript. When two chatbot versions (or two runs) produce the same transcript for a script, it is
+    scored once and the verdict is shared. Errored metrics are never cached, so they are retried next run.
+    """
+
+    def __init__(self, path: Optional[str] = DEFAULT_SCORE_CACHE_PATH, judge: Optional[str] = None):
+        self.judge = judge or "default"
+        super().__init__(path)
+
+    def entry_key(self, entry: Dict) -> str:
+        return entry["key"]
+
+    def key(self, metric: str, digest: str) -> str:
+        return f"{metric}|{metric_version([metric])}|{self.judge}|{digest}"
+
+    def get(self, metric: str, digest: str) -> Optional[Dict]:
+        return self.lookup(self.key(metric, digest))
+
+    def put(self, metric: str, digest: str, score: Optional[float], success: bool, reason: Optional[str],
+            threshold: float):
+        self.append({"key": self.key(metric, digest), "metric": metric, "score": score, "success": success,
+                     "reason": reason, "threshold": threshold})
+
+
+def replay_scripts(scripts: List[Dict], senders: Dict[str, Callable[[str], str]], concurrency: int) -> List[Dict]:
+    """
+    Replay every script against every chatbot version. Turns within a conversation are sent in order;
+    conversations and versions run concurrently. A failed turn ends that conversation.
+    Args:
+        scripts (list): Entries from ScriptStore.select.
+        senders (dict): Version name -> blocking function sending one user message and returning the reply.
+        concurrency (int): Conversations in flight.
+    Returns:
+        list: One dict per (version, script) with the transcript, any error and per-turn latencies.
+    """
+    def replay(version: str, script: Dict) -> Dict:
+        turns, latencies, error = [], [], None
+        for message in script["user_turns"]:
+            start = time.perf_counter()
+            try:
+                reply = senders[version](message)
+            except Exception as e:
+                error = str(e)
+                break
+            latencies.append(time.perf_counter() - start)
+            turns.extend([(ROLES[USER], message), (ROLES[ASSISTANT], reply)])
+        return {"version": version, "script_id": script["id"], "intention": script["intention"],
+                "turns": turns, "error": error, "latencies": latencies}
+
+    jobs = [(version, script) for script in scripts for version in senders]
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        return list(executor.map(lambda job: replay(*job), jobs))
+
+
+def score_replays(replays: List[Dict], evaluator, cache: ScoreCache, metric_names: List[str],
+                  batch_size: int = 100) -> int:
+    """
+    Score the replayed transcripts, judging each distinct transcript once per metric and reusing cached
+    verdicts. Sets replay["scores"] to {metric name: cache entry}; conversations that failed mid-replay
+    are not scored.
+    Args:
+        replays (list): Results of replay_scripts.
+        evaluator (ConversationEvaluator): Evaluator configured with metric_names.
+        cache (ScoreCache): Shared verdict cache.
+        metric_names (list): Metrics to score.
+        batch_size (int): Conversations per evaluate() call.
+    Returns:
+        int: Number of judge evaluations run (distinct transcript and metric pairs not already cached).
+    """
+    pending: Dict[str, List[Tuple[str, str]]] = {}
+    for replay in replays:
+        if replay["error"] or not replay["turns"]:
+            continue
+        replay["digest"] = transcript_hash(replay["turns"])
+        for name in metric_names:
+            if cache.get(name, replay["digest"]) is None:
+                pending.setdefault(replay["digest"], replay["turns"])
+                break
+
+    # Group transcripts by the metrics they still miss, so each evaluate() call runs only those
+    groups: Dict[Tuple[str, ...], List[str]] = {}
+    for digest in pending:
+        missing = tuple(name for name in metric_names if cache.get(name, digest) is None)
+        groups.setdefault(missing, []).append(digest)
+    judged = 0
+    for missing, digests in groups.items():
+        metrics = evaluator.metrics_for(list(missing))
+        for start in range(0, len(digests), batch_size):
+            batch = digests[start:start + batch_size]
+            test_cases = [
+                TestCaseBuilder.build_test_case_from_turns(
+                    [TurnRecord(role, content) for role, content in pending[digest]], digest)
+                for digest in batch
+            ]
+            for index, test_result in evaluator.evaluate_indexed(test_cases, metrics=metrics).items():
+                for metric_data in test_result.metrics_data or []:
+                    if metric_data.error:
+                        continue
+                    cache.put(metric_key(metric_data), batch[index], metric_data.score, metric_data.success, metric_data.reason,
+                              metric_data.threshold)
+                    judged += 1
+
+    for replay in replays:
+        if "digest" in replay:
+            replay["scores"] = {name: cache.get(name, replay["digest"]) for name in metric_names
+                                if cache.get(name, replay["digest"]) is not None}
+    return judged
+
+
+def paired_deltas(replays: List[Dict], versions: List[str], metric_names: List[str]) -> Dict:
+    """
+    Compare every version with the first one on the scripts both scored.
+    Args:
+        replays (list): Scored results of replay_scripts.
+        versions (list): Version names; the first is the baseline.
+        metric_names (list): Metrics to compare.
+    Returns:
+        dict: {"versions": per-version means and pass rates, "deltas": per (version, metric) paired
+            statistics with a per-intention breakdown, "rows": one row per (script, version, metric)}.
+    """
+    scores: Dict[Tuple[str, str], Dict] = {(r["version"], r["script_id"]): r for r in replays}
+    baseline = versions[0]
+    rows, per_version, deltas = [], {}, {}
+    for version in versions:
+        for name in metric_names:
+            results = [r["scores"][name] for r in replays if r["version"] == version and name in r.get("scores", {})]
+            scored = [entry["score"] for entry in results if entry["score"] is not None]
+            per_version[(version, name)] = {
+                "n": len(results),
+                "errored": sum(1 for r in replays if r["version"] == version and r["error"]),
+                "mean": sum(scored) / len(scored) if scored else None,
+                "pass_rate": sum(entry["success"] for entry in results) / len(results) if results else None,
+            }
+
+    for version in versions[1:]:
+        for name in metric_names:
+            diffs, by_intention, regressions, fixes = [], {}, 0, 0
+            for (row_version, sid), replay in scores.items():
+                if row_version != version:
+                    continue
+                base = scores.get((baseline, sid), {}).get("scores", {}).get(name)
+                other = replay.get("scores", {}).get(name)
+                if base is None or other is None or base["score"] is None or other["score"] is None:
+                    continue
+                diff = other["score"] - base["score"]
+                diffs.append(diff)
+                by_intention.setdefault(replay["intention"], []).append(diff)
+                regressions += base["success"] and not other["success"]
+                fixes += other["success"] and not base["success"]
+                rows.append({"script_id": sid, "intention": replay["intention"], "version": version,
+                             "metric": name, "baseline_score": base["score"], "score": other["score"],
+                             "delta": diff, "baseline_success": base["success"], "success": other["success"],
+                             "reason": other["reason"]})
+            mean = sum(diffs) / len(diffs) if diffs else None
+            half_width = None
+            if len(diffs) > 1:
+                variance = sum((d - mean) ** 2 for d in diffs) / (len(diffs) - 1)
+                half_width = 1.96 * math.sqrt(variance / len(diffs))
+            deltas[(version, name)] = {
+                "n": len(diffs),
+                "mean_delta": mean,
+                "ci95": half_width,
+                "wins": sum(1 for d in diffs if d > 0),
+                "losses": sum(1 for d in diffs if d < 0),
+                "regressions": regressions,
+                "fixes": fixes,
+                "by_intention": {intention: sum(values) / len(values) for intention, values in by_intention.items()},
+            }
+    return {"versions": per_version, "deltas": deltas, "rows": rows}
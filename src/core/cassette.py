@@ -0,0 +1,198 @@
+import asyncio
+import atexit
+import gzip
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Type
+
+RECORD = "record"
+REPLAY = "replay"
+
+# Dates and report timestamps change between recording and replay ("yesterday", eval_results_<ts>.csv);
+# they are masked in the loose key used when an exact request match is not found.
+VOLATILE_PATTERN = re.compile(r"\d{4}-\d{2}-\d{2}(?:[T ]\d{2}:\d{2}(?::\d{2}(?:\.\d+)?)?(?:Z|[+-]\d{2}:?\d{2})?)?|\d{8}_\d{6}")
+
+
+class CassetteError(Exception):
+    """Raised for injected replay failures and for recorded calls that failed live."""
+
+
+class CassetteMissError(LookupError):
+    """Raised in replay mode when a request was never recorded."""
+
+
+def _digest(text: str) -> str:
+    return hashlib.sha1(text.encode("utf-8")).hexdigest()
+
+
+def _unit_interval(*parts) -> float:
+    """Deterministic pseudo-random number in [0, 1) derived from the given parts."""
+    return int(_digest("|".join(str(part) for part in parts))[:13], 16) / float(1 << 52)
+
+
+class Cassette:
+    """
+    Compact on-disk record of outbound calls (Kustomer, judge completions, Drive uploads) that can be
+    replayed offline.
+
+    In record mode every call runs live and its response (or failure) is appended to a gzip-compressed
+    JSON-lines file. In replay mode calls are served from that file with configurable injected latency
+    and error rate. Injected latency and failures are derived from a hash of the seed, request and
+    occurrence number rather than a shared RNG, so a replay behaves identically however the calls
+    are interleaved by concurrent workers.
+    """
+
+    def __init__(self, path: str, mode: str = REPLAY, latency_ms: float = 0.0, latency_jitter_ms: float = 0.0,
+                 error_rate: float = 0.0, seed: int = 0):
+        """
+        Open a cassette for recording or replay.
+        Args:
+            path (str): Cassette file (.jsonl.gz).
+            mode (str): "record" or "replay".
+            latency_ms (float): Replay only. Base latency added to every call.
+            latency_jitter_ms (float): Replay only. Extra latency up to this many milliseconds per call.
+            error_rate (float): Replay only. Fraction of calls that fail with an injected error.
+            seed (int): Replay only. Seed for latency jitter and injected errors.
+        """
+        if mode not in (RECORD, REPLAY):
+            raise ValueError(f"Cassette mode must be '{RECORD}' or '{REPLAY}', got {mode!r}")
+        self.path = path
+        self.mode = mode
+        self.latency_ms = latency_ms
+        self.latency_jitter_ms = latency_jitter_ms
+        self.error_rate = error_rate
+        self.seed = seed
+        self._lock = threading.Lock()
+        self._entries: List[Dict] = []
+        self._exact: Dict[str, List[Dict]] = {}
+        self._loose: Dict[str, List[Dict]] = {}
+        self._occurrences: Dict[str, int] = {}
+        if mode == REPLAY:
+            self._load()
+        else:
+            atexit.register(self.save)
+
+    @classmethod
+    def from_env(cls) -> Optional["Cassette"]:
+        """
+        Build a cassette from EVALUATOR_CASSETTE / EVALUATOR_CASSETTE_MODE and the EVALUATOR_REPLAY_*
+        settings. Returns None when no cassette is configured.
+        """
+        path = os.getenv("EVALUATOR_CASSETTE")
+        if not path:
+            return None
+        return cls(
+            path,
+            mode=os.getenv("EVALUATOR_CASSETTE_MODE", REPLAY),
+            latency_ms=float(os.getenv("EVALUATOR_REPLAY_LATENCY_MS", "0")),
+            latency_jitter_ms=float(os.getenv("EVALUATOR_REPLAY_JITTER_MS", "0")),
+            error_rate=float(os.getenv("EVALUATOR_REPLAY_ERROR_RATE", "0")),
+            seed=int(os.getenv("EVALUATOR_REPLAY_SEED", "0")),
+        )
+
+    @property
+    def replaying(self) -> bool:
+        return self.mode == REPLAY
+
+    @staticmethod
+    def _keys(channel: str, request: Dict) -> tuple:
+        canonical = json.dumps(request, sort_keys=True, default=str)
+        return _digest(f"{channel}|{canonical}"), _digest(f"{channel}|{VOLATILE_PATTERN.sub('<t>', canonical)}")
+
+    def _load(self):
+        with gzip.open(self.path, "rt", encoding="utf-8") as f:
+            for line in f:
+                entry = json.loads(line)
+                self._exact.setdefault(entry["key"], []).append(entry)
+                self._loose.setdefault(entry["loose_key"], []).append(entry)
+
+    def save(self):
+        """
+        Write recorded entries to disk. Safe to call more than once; a no-op in replay mode.
+        """
+        if self.mode != RECORD:
+            return
+        with self._lock:
+            entries = list(self._entries)
+        if os.path.dirname(self.path):
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        with gzip.open(f"{self.path}.tmp", "wt", encoding="utf-8") as f:
+            for entry in entries:
+                f.write(json.dumps(entry, separators=(",", ":")) + "\n")
+        os.replace(f"{self.path}.tmp", self.path)
+
+    def _record(self, channel: str, key: str, loose_key: str, response: Any = None, error: Optional[str] = None):
+        with self._lock:
+            self._entries.append({"channel": channel, "key": key, "loose_key": loose_key,
+                                  "response": response, "error": error})
+
+    def _replay_entry(self, channel: str, request: Dict) -> tuple:
+        key, loose_key = self._keys(channel, request)
+        with self._lock:
+            occurrence = self._occurrences.get(key, 0)
+            self._occurrences[key] = occurrence + 1
+        candidates = self._exact.get(key) or self._loose.get(loose_key)
+        if not candidates:
+            raise CassetteMissError(f"No recorded {channel} call matches this request")
+        # Repeated identical requests replay their recorded responses in order, then repeat the last one
+        entry = candidates[min(occurrence, len(candidates) - 1)]
+        delay = (self.latency_ms + self.latency_jitter_ms * _unit_interval(self.seed, "latency", key, occurrence)) / 1000
+        injected = self.error_rate > 0 and _unit_interval(self.seed, "error", key, occurrence) < self.error_rate
+        return entry, delay, injected
+
+    @staticmethod
+    def _replay_result(entry: Dict, injected: bool, channel: str, error_factory: Type[Exception]) -> Any:
+        if injected:
+            raise error_factory(f"Injected replay failure for {channel} call")
+        if entry["error"] is not None:
+            raise error_factory(entry["error"])
+        return entry["response"]
+
+    def call(self, channel: str, request: Dict, live: Callable[[], Any],
+             error_factory: Type[Exception] = CassetteError) -> Any:
+        """
+        Record or replay one synchronous call.
+        Args:
+            channel (str): Traffic type, e.g. "kustomer", "judge", "drive".
+            request (dict): JSON-serializable description of the request; identifies the call on replay.
+            live (callable): Performs the real call and returns a JSON-serializable response.
+            error_factory (type): Exception raised for injected failures and recorded failures on replay.
+        Returns:
+            The live or recorded response.
+        """
+        if self.mode == RECORD:
+            key, loose_key = self._keys(channel, request)
+            try:
+                response = live()
+            except Exception as e:
+                self._record(channel, key, loose_key, error=str(e))
+                raise
+            self._record(channel, key, loose_key, response=response)
+            return response
+        entry, delay, injected = self._replay_entry(channel, request)
+        if delay:
+            time.sleep(delay)
+        return self._replay_result(entry, injected, channel, error_factory)
+
+    async def a_call(self, channel: str, request: Dict, live: Callable[[], Awaitable[Any]],
+                     error_factory: Type[Exception] = CassetteError) -> Any:
+        """
+        Async counterpart of call(); live is a coroutine function and replay latency uses asyncio.sleep.
+        """
+        if self.mode == RECORD:
+            key, loose_key = self._keys(channel, request)
+            try:
+                response = await live()
+            except Exception as e:
+                self._record(channel, key, loose_key, error=str(e))
+                raise
+            self._record(channel, key, loose_key, response=response)
+            return response
+        entry, delay, injected = self._replay_entry(channel, request)
+        if delay:
+            await asyncio.sleep(delay)
+        return self._replay_result(entry, injected, channel, error_factory)
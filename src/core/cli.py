@@ -0,0 +1,67 @@
+"""
+Unified command line entry point for the evaluator scripts.
+
+Each subcommand maps to a script module that is only imported once the subcommand is chosen,
+and the scripts themselves import deepeval / Google API clients lazily, so `evaluator --help`
+and argument errors return without loading any heavy dependency.
+"""
+import argparse
+import importlib
+import sys
+from typing import List, Optional
+
+# subcommand -> (script module, help text)
+COMMANDS = {
+    "run-nightly": ("scripts.chatbot.nightly_report", "Evaluate yesterday's Kustomer conversations and publish the report"),
+    "run-targets": ("scripts.chatbot.multi_target_report", "Evaluate several queues/bots from a targets config in one run"),
+    "backfill": ("scripts.chatbot.backfill", "Re-score historical conversations over a date range with parallel day workers"),
+    "premerge": ("scripts.chatbot.pre_merge_check", "Evaluate simulated conversations and exit non-zero on failure"),
+    "faq": ("scripts.faq_generator.faq_eval", "Evaluate generated FAQ content for hallucinations"),
+    "simulate": ("scripts.chatbot.simulate_convo", "Generate simulated conversations against the chatbot API"),
+    "trends": ("scripts.chatbot.trends", "Query rolling metric trends and regressions across nightly runs"),
+    "cascade-study": ("scripts.chatbot.cascade_study", "Measure small/strong judge agreement to choose cascade margins"),
+    "red-team": ("scripts.chatbot.red_team", "Probe the chatbot endpoint with deepteam attacks and report vulnerabilities"),
+    "ab-replay": ("scripts.chatbot.ab_replay", "Compare chatbot versions by replaying stored simulated users"),
+    "serve": ("scripts.chatbot.serve", "Score closed Kustomer conversations in near real time from webhooks"),
+    "fake-webhooks": ("scripts.chatbot.fake_webhooks", "Send fake conversation-closed webhooks to a local service"),
+    "load-test": ("scripts.chatbot.load_test", "Load test the chatbot endpoint with scripted virtual users"),
+    "stub-chatbot": ("scripts.chatbot.stub_chatbot", "Serve a local stub of the chatbot endpoint for load tests"),
+    "judge-traces": ("scripts.chatbot.judge_traces", "Query traced judge calls for slow or costly ones and re-run one"),
+}
+
+
+def build_parser() -> argparse.ArgumentParser:
+    """
+    Build the top-level parser. Subcommand arguments are passed through untouched to the script's own parser.
+    """
+    parser = argparse.ArgumentParser(
+        prog="evaluator",
+        description="LLM evaluator service command line.",
+        epilog="Run `evaluator <command> --help` for command-specific options.",
+    )
+    parser.add_argument(
+        "command",
+        choices=list(COMMANDS),
+        metavar="command",
+        help="; ".join(f"{name}: {help_text}" for name, (_, help_text) in COMMANDS.items()),
+    )
+    parser.add_argument("args", nargs=argparse.REMAINDER, help=argparse.SUPPRESS)
+    return parser
+
+
+def main(argv: Optional[List[str]] = None):
+    """
+    Dispatch to the selected script's main(argv).
+    The scripts are installed as the `scripts` package, so this works from any working directory; the
+    scripts still read mock_data/ and write deepeval_results/ relative to it.
+    """
+    args = build_parser().parse_args(argv)
+    module_name, _ = COMMANDS[args.command]
+    # Subcommand usage lines read "evaluator <command>" rather than the script filename
+    sys.argv = [f"evaluator {args.command}"] + args.args
+    module = importlib.import_module(module_name)
+    return module.main(args.args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,174 @@
+import hashlib
+import json
+import math
+import os
+import re
+from collections import Counter
+from typing import Dict, List, Optional
+
+DEFAULT_CACHE_DIR = "deepeval_results/.cache/context_index"
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+")
+
+STOPWORDS = frozenset("""
+a about above after again all am an and any are as at be because been before being below between both but by
+can could did do does doing down during each few for from further had has have having he her here hers him his
+how i if in into is it its itself just me more most my no nor not of off on once only or other our ours out over
+own same she should so some such than that the their theirs them then there these they this those through to too
+under until up very was we were what when where which while who whom why will with would you your yours
+""".split())
+
+
+def tokenize(text: str) -> List[str]:
+    """
+    Lowercase and split text into alphanumeric terms, dropping common English stopwords
+    and folding simple plurals ("refunds" -> "refund").
+    """
+    terms = []
+    for token in TOKEN_PATTERN.findall(text.lower()):
+        if token in STOPWORDS:
+            continue
+        if len(token) > 3 and token.endswith("s") and not token.endswith("ss"):
+            token = token[:-1]
+        terms.append(token)
+    return terms
+
+
+class ContextRetriever:
+    """
+    Splits reference material into chunks and retrieves the most relevant ones using a local BM25 index.
+    The index is cached on disk keyed by the document hash and chunking parameters, so repeated runs
+    over the same policy document skip chunking and indexing entirely.
+    """
+
+    K1 = 1.5
+    B = 0.75
+
+    def __init__(self, document: str, chunk_size: int = 200, chunk_overlap: int = 40,
+                 cache_dir: Optional[str] = DEFAULT_CACHE_DIR):
+        """
+        Build (or load from cache) the chunk index for a reference document. Raises ValueError for an empty
+        document, which no retrieval could draw context from.
+        Args:
+            document (str): The full reference material.
+            chunk_size (int): Target number of words per chunk.
+            chunk_overlap (int): Number of words shared between consecutive chunks of a long paragraph.
+            cache_dir (str, optional): Directory for cached indexes. None disables caching.
+        """
+        if chunk_overlap >= chunk_size:
+            raise ValueError("chunk_overlap must be smaller than chunk_size")
+        if not document.strip():
+            raise ValueError("The reference document is empty")
+        self.document_hash = hashlib.sha256(document.encode("utf-8")).hexdigest()
+        self.chunk_size = chunk_size
+        self.chunk_overlap = chunk_overlap
+        self.cache_path = None
+        if cache_dir:
+            self.cache_path = os.path.join(
+                cache_dir, f"{self.document_hash}_{chunk_size}_{chunk_overlap}.json"
+            )
+
+        index = self._load_cached_index()
+        if index is None:
+            index = self._build_index(self.chunk_document(document, chunk_size, chunk_overlap))
+            self._save_cached_index(index)
+
+        self.chunks: List[str] = index["chunks"]
+        self.chunk_lengths: List[int] = index["chunk_lengths"]
+        self.postings: Dict[str, List[List[int]]] = index["postings"]
+        self.avg_chunk_length = (sum(self.chunk_lengths) / len(self.chunk_lengths) if self.chunk_lengths else 0.0) or 1.0
+
+    @staticmethod
+    def chunk_document(document: str, chunk_size: int = 200, chunk_overlap: int = 40) -> List[str]:
+        """
+        Split a document into chunks of roughly chunk_size words.
+        Short consecutive paragraphs are packed together; long paragraphs are split into overlapping windows.
+        Args:
+            document (str): The text to split.
+            chunk_size (int): Target number of words per chunk.
+            chunk_overlap (int): Words shared between consecutive windows of a long paragraph.
+        Returns:
+            list: List of chunk strings.
+        """
+        paragraphs = [p.strip() for p in re.split(r"\n\s*\n", document) if p.strip()]
+        chunks = []
+        pending: List[str] = []
+        pending_words = 0
+        for paragraph in paragraphs:
+            words = paragraph.split()
+            if len(words) > chunk_size:
+                if pending:
+                    chunks.append("\n\n".join(pending))
+                    pending, pending_words = [], 0
+                step = chunk_size - chunk_overlap
+                for start in range(0, len(words), step):
+                    chunks.append(" ".join(words[start:start + chunk_size]))
+                    if start + chunk_size >= len(words):
+                        break
+                continue
+            if pending_words + len(words) > chunk_size and pending:
+                chunks.append("\n\n".join(pending))
+                pending, pending_words = [], 0
+            pending.append(paragraph)
+            pending_words += len(words)
+        if pending:
+            chunks.append("\n\n".join(pending))
+        return chunks
+
+    @staticmethod
+    def _build_index(chunks: List[str]) -> Dict:
+        postings: Dict[str, List[List[int]]] = {}
+        chunk_lengths = []
+        for chunk_id, chunk in enumerate(chunks):
+            terms = tokenize(chunk)
+            chunk_lengths.append(len(terms))
+            for term, freq in Counter(terms).items():
+                postings.setdefault(term, []).append([chunk_id, freq])
+        return {"chunks": chunks, "chunk_lengths": chunk_lengths, "postings": postings}
+
+    def _load_cached_index(self) -> Optional[Dict]:
+        if not self.cache_path or not os.path.exists(self.cache_path):
+            return None
+        try:
+            with open(self.cache_path) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def _save_cached_index(self, index: Dict):
+        if not self.cache_path:
+            return
+        os.makedirs(os.path.dirname(self.cache_path), exist_ok=True)
+        tmp_path = f"{self.cache_path}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(index, f)
+        os.replace(tmp_path, self.cache_path)
+
+    def retrieve(self, query: str, top_k: int = 3) -> List[str]:
+        """
+        Return the top_k chunks most relevant to the query, in document order.
+        Args:
+            query (str): Text to match against the reference chunks (e.g. a single FAQ item).
+            top_k (int): Maximum number of chunks to return.
+        Returns:
+            list: The selected chunk strings.
+        """
+        if len(self.chunks) <= top_k:
+            return list(self.chunks)
+
+        num_chunks = len(self.chunks)
+        scores: Dict[int, float] = {}
+        for term in set(tokenize(query)):
+            term_postings = self.postings.get(term)
+            if not term_postings:
+                continue
+            idf = math.log(1 + (num_chunks - len(term_postings) + 0.5) / (len(term_postings) + 0.5))
+            for chunk_id, freq in term_postings:
+                norm = self.K1 * (1 - self.B + self.B * self.chunk_lengths[chunk_id] / self.avg_chunk_length)
+                scores[chunk_id] = scores.get(chunk_id, 0.0) + idf * freq * (self.K1 + 1) / (freq + norm)
+
+        ranked = sorted(scores, key=scores.get, reverse=True)[:top_k]
+        if not ranked:
+            # No lexical overlap at all; fall back to the start of the document rather than nothing.
+            ranked = list(range(top_k))
+        return [self.chunks[chunk_id] for chunk_id in sorted(ranked)]
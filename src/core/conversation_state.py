@@ -0,0 +1,169 @@
+import hashlib
+import json
+import os
+import sqlite3
+from datetime import datetime
+from typing import Dict, Iterable, Optional, Tuple
+from .evaluator import metric_key
+from .transcript_store import ROLES, TranscriptStore
+
+DEFAULT_STATE_PATH = "deepeval_results/conversation_state.sqlite3"
+
+# Turns before the first new turn that are re-sent to the judge as context
+DEFAULT_CONTEXT_TURNS = 4
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS conversation_state (
+    convo_id TEXT PRIMARY KEY,
+    metric_version TEXT NOT NULL,
+    last_message_id TEXT,
+    last_message_at TEXT,
+    message_count INTEGER NOT NULL,
+    turn_count INTEGER NOT NULL,
+    last_turn_hash TEXT NOT NULL,
+    scores TEXT NOT NULL,
+    evaluated_at TEXT NOT NULL
+);
+"""
+
+
+def turn_hash(content: str) -> str:
+    return hashlib.sha1(content.encode("utf-8")).hexdigest()[:16]
+
+
+def merge_scores(prior: Optional[Dict], metrics_data: Iterable, new_turns: int) -> Dict:
+    """
+    Fold the scores of a newly evaluated segment into a conversation's running scores.
+    The conversation score is the turn-weighted mean of its segment scores, and it passes only if every
+    segment passed.
+    Args:
+        prior (dict, optional): Running scores from the previous evaluation, by metric name.
+        metrics_data (iterable): MetricData of the new segment.
+        new_turns (int): Number of new turns in the segment.
+    Returns:
+        dict: metric name -> {"score", "success", "turns", "segments", "last_score", "last_success"}.
+    """
+    merged = dict(prior or {})
+    for metric_data in metrics_data:
+        name = metric_key(metric_data)
+        before = merged.get(name)
+        if before is None or before["score"] is None or metric_data.score is None:
+            score, turns, segments, success = metric_data.score, new_turns, 1, metric_data.success
+        else:
+            turns = before["turns"] + new_turns
+            score = (before["score"] * before["turns"] + metric_data.score * new_turns) / turns
+            segments = before["segments"] + 1
+            success = before["success"] and metric_data.success
+        merged[name] = {"score": score, "success": success, "turns": turns, "segments": segments,
+                        "last_score": metric_data.score, "last_success": metric_data.success}
+    return merged
+
+
+class ConversationState:
+    """
+    Per-conversation evaluation state in a small SQLite file: the last evaluated Kustomer message, message and
+    turn counts, and running scores. It lets a nightly run skip conversations with no new messages and judge
+    only the turns appended since the last evaluation.
+    """
+
+    def __init__(self, path: str = DEFAULT_STATE_PATH):
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.path = path
+        self.conn = sqlite3.connect(path)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.executescript(SCHEMA)
+
+    def close(self):
+        self.conn.close()
+
+    def get_many(self, convo_ids: Iterable[str]) -> Dict[str, Dict]:
+        """
+        Stored state for the given conversations, by convo ID. Unknown conversations are left out.
+        """
+        convo_ids = list(convo_ids)
+        states = {}
+        # SQLite caps the number of bound parameters per statement
+        for start in range(0, len(convo_ids), 500):
+            chunk = convo_ids[start:start + 500]
+            rows = self.conn.execute(
+                f"SELECT * FROM conversation_state WHERE convo_id IN ({','.join('?' * len(chunk))})", chunk
+            ).fetchall()
+            for row in rows:
+                state = dict(row)
+                state["scores"] = json.loads(state["scores"])
+                states[state["convo_id"]] = state
+        return states
+
+    def save(self, convo_id: str, metric_version: str, last_message_id: Optional[str],
+             last_message_at: Optional[str], message_count: int, turn_count: int, last_turn_hash: str,
+             scores: Dict):
+        self.conn.execute(
+            """
+            INSERT OR REPLACE INTO conversation_state
+                (convo_id, metric_version, last_message_id, last_message_at, message_count, turn_count,
+                 last_turn_hash, scores, evaluated_at)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+            """,
+            (convo_id, metric_version, last_message_id, last_message_at, message_count, turn_count, last_turn_hash,
+             json.dumps(scores), datetime.now().isoformat(timespec="seconds")),
+        )
+
+    def commit(self):
+        self.conn.commit()
+
+
+def plan_increments(store: TranscriptStore, states: Dict[str, Dict], cursors: Dict[str, Tuple[Optional[str], int]],
+                    metric_version: str, context_turns: int = DEFAULT_CONTEXT_TURNS,
+                    full: bool = False) -> Tuple[TranscriptStore, Dict[str, Dict]]:
+    """
+    Work out what to judge for each fetched conversation and build a store of just those windows.
+
+    A conversation whose last message is the one already evaluated is skipped. Otherwise, when it was evaluated
+    before under the same metric definitions, only the turns after the previous evaluation are new (plus the
+    previous last turn if new messages were merged into it), and up to context_turns earlier turns are included
+    as context. Anything else is evaluated in full.
+    Args:
+        store (TranscriptStore): The fetched conversations.
+        states (dict): ConversationState.get_many for those conversations.
+        cursors (dict): convo_id -> (last message ID, message count), from TestCaseBuilder.message_cursor.
+        metric_version (str): Fingerprint of the metric definitions in use.
+        context_turns (int): Earlier turns re-sent as context.
+        full (bool): Evaluate every fetched conversation in full, ignoring state.
+    Returns:
+        tuple: (store of windows to evaluate, convo_id -> plan dict with window_start, new_start, turn_count,
+            last_message_id, message_count, last_turn_hash and prior scores)
+    """
+    windows = TranscriptStore()
+    plans = {}
+    for convo_id, turns in store:
+        last_message_id, message_count = cursors.get(convo_id, (None, len(turns)))
+        state = None if full else states.get(convo_id)
+        if state is not None and state["metric_version"] != metric_version:
+            state = None
+        if state is not None and last_message_id is not None and state["last_message_id"] == last_message_id:
+            continue
+
+        new_start = 0
+        if state is not None and 0 < state["turn_count"] <= len(turns):
+            new_start = state["turn_count"]
+            # New messages in the same direction are merged into the previous last turn
+            if turn_hash(turns[new_start - 1].content) != state["last_turn_hash"]:
+                new_start -= 1
+            if new_start == len(turns):
+                # No new turns despite a new last message (e.g. a message was re-sent); just move the cursor forward
+                new_start = None
+        plans[convo_id] = {
+            "window_start": None if new_start is None else max(0, new_start - context_turns),
+            "new_start": new_start,
+            "turn_count": len(turns),
+            "last_message_id": last_message_id,
+            "message_count": message_count,
+            "last_turn_hash": turn_hash(turns[-1].content),
+            "scores": state["scores"] if state is not None and new_start != 0 else None,
+        }
+        if new_start is None:
+            continue
+        windows.add(convo_id, [(ROLES.index(turn.role), turn.content, turn.sent_at, turn.sender)
+                               for turn in turns[plans[convo_id]["window_start"]:]])
+    return windows, plans
@@ -0,0 +1,211 @@
+import csv
+import hashlib
+import os
+import threading
+import warnings
+from typing import Dict, List, Optional, Sequence, Tuple
+from .judges import STUB_JUDGE
+
+# Judge used when the cheaper-judge budget policy kicks in
+DEFAULT_BUDGET_JUDGE = "gpt-4o-mini"
+# Price used for estimates when deepeval has no pricing for a model
+FALLBACK_PRICE_MODEL = "gpt-4o"
+
+# Budget policies: what to do once the projected cost of the rest of the run exceeds what is left
+STOP = "stop"
+SAMPLE = "sample"
+CHEAPER_JUDGE = "cheaper-judge"
+BUDGET_POLICIES = (STOP, SAMPLE, CHEAPER_JUDGE)
+
+# Largest batch evaluated under a budget. The budget is checked between batches, so this bounds how far a run
+# can overshoot it when the estimates are off
+BUDGET_BATCH_SIZE = 50
+
+# Token estimate for one ConversationalGEval call: the turns and evaluation steps at about four characters per
+# token, the instructions the metric wraps around them, and a score with a few sentences of reasoning
+CHARS_PER_TOKEN = 4
+TURN_OVERHEAD_CHARS = 40
+PROMPT_OVERHEAD_TOKENS = 350
+OUTPUT_TOKENS_PER_CALL = 150
+
+
+def model_price(model_name: Optional[str]) -> Tuple[float, float]:
+    """
+    Dollars per input and per output token for a judge model, from deepeval's pricing table. The stub judge is
+    free; a model deepeval has no pricing for is priced as FALLBACK_PRICE_MODEL, with a warning.
+    """
+    from deepeval.models.llms.openai_model import model_pricing
+
+    if model_name == STUB_JUDGE:
+        return 0.0, 0.0
+    pricing = model_pricing.get(model_name or FALLBACK_PRICE_MODEL)
+    if pricing is None:
+        warnings.warn(f"No deepeval pricing for judge model {model_name!r}; estimating it at "
+                      f"{FALLBACK_PRICE_MODEL} prices", RuntimeWarning, stacklevel=2)
+        pricing = model_pricing[FALLBACK_PRICE_MODEL]
+    return pricing["input"], pricing["output"]
+
+
+def estimate_call_tokens(turn_chars: int, num_turns: int, steps_chars: int) -> Tuple[int, int]:
+    """
+    Estimated (input, output) tokens of one judge call over a conversation.
+    Args:
+        turn_chars (int): Total characters of the conversation's turns.
+        num_turns (int): Number of turns.
+        steps_chars (int): Characters of the metric's evaluation steps.
+    """
+    prompt_chars = turn_chars + num_turns * TURN_OVERHEAD_CHARS + steps_chars
+    return PROMPT_OVERHEAD_TOKENS + prompt_chars // CHARS_PER_TOKEN, OUTPUT_TOKENS_PER_CALL
+
+
+def _sample_value(key: str) -> float:
+    """Deterministic value in [0, 1) for a conversation, so sampled runs are reproducible."""
+    return int(hashlib.sha1(key.encode("utf-8")).hexdigest()[:12], 16) / float(1 << 48)
+
+
+class CostLedger:
+    """
+    Running totals of judge tokens and dollars per (stage, metric, model). Metered judges record every completion
+    as it returns, so the totals are live while an evaluation runs.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.entries: Dict[Tuple[str, str, str], Dict] = {}
+
+    def record(self, stage: str, metric: str, model: str, input_tokens: int, output_tokens: int, cost: float):
+        with self._lock:
+            entry = self.entries.setdefault((stage, metric, model), {
+                "stage": stage, "metric": metric, "model": model,
+                "calls": 0, "input_tokens": 0, "output_tokens": 0, "cost": 0.0,
+            })
+            entry["calls"] += 1
+            entry["input_tokens"] += input_tokens
+            entry["output_tokens"] += output_tokens
+            entry["cost"] += cost
+
+    @property
+    def total_cost(self) -> float:
+        return sum(entry["cost"] for entry in list(self.entries.values()))
+
+    @property
+    def total_tokens(self) -> int:
+        return sum(entry["input_tokens"] + entry["output_tokens"] for entry in list(self.entries.values()))
+
+    def totals_by(self, field: str) -> Dict[str, Dict]:
+        """
+        Calls, tokens and cost summed per value of field ("stage", "metric" or "model").
+        """
+        totals = {}
+        for entry in list(self.entries.values()):
+            bucket = totals.setdefault(entry[field], {"calls": 0, "input_tokens": 0, "output_tokens": 0, "cost": 0.0})
+            for key in bucket:
+                bucket[key] += entry[key]
+        return totals
+
+    def rows(self) -> List[Dict]:
+        return sorted(self.entries.values(), key=lambda entry: (entry["stage"], entry["metric"], entry["model"]))
+
+    def write_csv(self, path: str):
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'w', newline='') as csvfile:
+            writer = csv.writer(csvfile)
+            writer.writerow(['stage', 'metric_name', 'model', 'calls', 'input_tokens', 'output_tokens', 'cost'])
+            for row in self.rows():
+                writer.writerow([row["stage"], row["metric"], row["model"], row["calls"], row["input_tokens"],
+                                 row["output_tokens"], f"{row['cost']:.6f}"])
+            writer.writerow(['run', '', '', sum(r["calls"] for r in self.rows()),
+                             sum(r["input_tokens"] for r in self.rows()), sum(r["output_tokens"] for r in self.rows()),
+                             f"{self.total_cost:.6f}"])
+
+
+class SpendBudget:
+    """
+    Hard spend limit for one run, checked between evaluation batches against the ledger. Before each batch the
+    cost of everything still to evaluate is projected from token estimates, scaled by how far the estimates have
+    been off so far. When the projection exceeds what is left of the budget, the policy degrades the run:
+    "sample" evaluates a deterministic sample of the remaining conversations sized to fit, "cheaper-judge"
+    switches to cheaper_judge for the rest of the run (and stops if even that does not fit), and "stop"
+    evaluates what fits and returns the partial results.
+    """
+
+    def __init__(self, limit_usd: float, ledger: CostLedger, policy: str = STOP,
+                 cheaper_judge: Optional[str] = DEFAULT_BUDGET_JUDGE):
+        if policy not in BUDGET_POLICIES:
+            raise ValueError(f"Unknown budget policy: {policy}. Available: {', '.join(BUDGET_POLICIES)}")
+        self.limit_usd = limit_usd
+        self.ledger = ledger
+        self.policy = policy
+        self.cheaper_judge = cheaper_judge
+        # Model the projections are priced with; set by the evaluator to its first-pass judge. In cascade mode
+        # that is the small judge, so escalations to the strong judge only enter the projection through
+        # calibration(), once a batch has been evaluated
+        self.model_name: Optional[str] = None
+        self.switched = False
+        self.sampling = False
+        self.stopped = False
+        self.skipped = 0
+        self.events: List[str] = []
+        self._estimated = 0.0
+
+    @property
+    def remaining(self) -> float:
+        return self.limit_usd - self.ledger.total_cost
+
+    def calibration(self) -> float:
+        """
+        Ratio of actual to estimated spend on the batches evaluated so far (1.0 before any).
+        """
+        spent = self.ledger.total_cost
+        if self._estimated > 0 and spent > 0:
+            return spent / self._estimated
+        return 1.0
+
+    def price(self, tokens: Tuple[int, int]) -> float:
+        input_price, output_price = model_price(self.model_name)
+        return tokens[0] * input_price + tokens[1] * output_price
+
+    def projected(self, tokens: Tuple[int, int]) -> float:
+        return self.price(tokens) * self.calibration()
+
+    def select(self, batch: Sequence[Tuple[str, Tuple[int, int]]], rest_tokens: Tuple[int, int]) -> Tuple[List[int], bool]:
+        """
+        Decide which conversations of the next batch to evaluate.
+        Args:
+            batch (sequence): (convo ID, estimated (input, output) tokens) per conversation in the batch.
+            rest_tokens (tuple): Estimated (input, output) tokens of the batch and everything after it.
+        Returns:
+            tuple: (positions in batch to evaluate, whether to switch to cheaper_judge first)
+        """
+        switch = False
+        remaining = self.remaining
+        if self.projected(rest_tokens) > remaining and self.policy == CHEAPER_JUDGE and not self.switched:
+            self.switched = switch = True
+            before = self.projected(rest_tokens)
+            self.model_name = self.cheaper_judge
+            self.events.append(f"Switched to {self.cheaper_judge} with ${remaining:.4f} left "
+                               f"(rest of run projected at ${before:.4f})")
+        rest_cost = self.projected(rest_tokens)
+        if rest_cost <= remaining:
+            selected = list(range(len(batch)))
+        elif self.policy == SAMPLE:
+            rate = max(remaining, 0.0) / rest_cost
+            if not self.sampling:
+                self.sampling = True
+                self.events.append(f"Sampling {rate:.1%} of the remaining conversations with ${remaining:.4f} left "
+                                   f"(rest of run projected at ${rest_cost:.4f})")
+            selected = [i for i, (convo_id, _) in enumerate(batch) if _sample_value(convo_id) < rate]
+        else:
+            selected, projected = [], 0.0
+            for i, (_, tokens) in enumerate(batch):
+                projected += self.projected(tokens)
+                if projected > remaining:
+                    break
+                selected.append(i)
+            if len(selected) < len(batch):
+                self.stopped = True
+                self.events.append(f"Stopped with ${remaining:.4f} left (rest of run projected at ${rest_cost:.4f})")
+        self.skipped += len(batch) - len(selected)
+        self._estimated += sum(self.price(batch[i][1]) for i in selected)
+        return selected, switch
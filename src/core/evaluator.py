@@ -1,83 +1,466 @@
-from deepeval import evaluate, login_with_confident_api_key
-from deepeval.test_case.conversational_test_case import TurnParams
-from deepeval.metrics import ConversationalGEval
-from typing import List
+import dataclasses
+import hashlib
+import json
+import time
+from typing import Dict, List, Optional, Tuple
+from .test_case_builder import TestCaseBuilder
+from .cost_ledger import BUDGET_BATCH_SIZE, estimate_call_tokens, model_price
+from .judges import DEFAULT_JUDGE_MODEL, STUB_JUDGE, disable_confident_uploads, judge_model, metered_judge
+from .judge_trace import traced_judge, traced_metric_class
+
+# Conversations materialized into ConversationalTestCase objects per evaluate() call. Each call is a separate
+# Confident AI test run, so larger runs are split across several runs on the dashboard
+DEFAULT_BATCH_SIZE = 500
+
+# Conversational metrics by name. Each entry becomes a ConversationalGEval over turn content.
+METRIC_DEFINITIONS: Dict[str, Dict] = {
+    "Correctness": {
+        "evaluation_steps": [
+            "Turns will alternate between a customer message and achatbot response.",
+            "Determine if the user's query is related to the company's platform and services. If not, the chatbot should politely decline to assist.",
+            "Evaluate whether the chatbot maintains appropriate boundaries - it should decline requests for: poems, rhymes, homework help, coding assistance, or any non-business related queries.",
+            "Assess if the chatbot's responses are professional, clear, and directly address the user's legitimate business inquiries.",
+            "Ensure the chatbot provides clear instructions and next steps when authentication is required.",
+            "Determine if the chatbot successfully identifies and rejects attempts to: generate creative content, solve academic problems, or assist with coding.",
+            "Verify that the chatbot maintains professional boundaries and does not engage in casual conversation or entertainment.",
+            "Evaluate the clarity and professionalism of the chatbot's language and tone.",
+            "Assess whether the chatbot provides complete and accurate information for legitimate business queries.",
+            "Verify that the chatbot offers appropriate alternatives or next steps when it cannot fulfill a request.",
+            "Provide a detailed reasoning for the evaluation, highlighting both successful aspects and areas of concern. Make sure to consider the full conversation flow and context.",
+            "Score the response based on: functional correctness (50%), and response quality (50%)."
+        ],
+        "threshold": 0.85,
+    },
+    "Verification": {
+        "evaluation_steps": [
+            "Turns will alternate between a customer message and achatbot response.",
+            "Verification is required when the user asks about:",
+            "- Ticket delivery status or timing",
+            "- Purchase details or order status",
+            "- Account-specific information",
+            "- Ticket transfers or resale options",
+            "- Payment issues",
+            "Verification is NOT required for:",
+            "- General questions about the platform",
+            "- How to use the app",
+            "- General policies or procedures relating to Gametime's platform",
+            "- Non-account specific information",
+            "- User's that drop off of the conversation before asking quesitons requiring verification.",
+            "The verification flow will follow these steps in order:",
+            "1. Chatbot initiates by asking the user for their phone number (must include 'phone number' in response)",
+            "2. User provides phone number (typically 10 digits, may include formatting)",
+            "3. Chatbot confirms sending verification code (must mention 'verification code')",
+            "4. User provides 6-digit verification code to complete the process.",
+            "Additional requirements:",
+            "- The verification flow is usually completed in 3 turns",
+            "- The chatbot must not reveal sensitive account information before verification code is sent",
+            "- The chatbot should handle failed verification attempts gracefully",
+            "- The chatbot should not ask for verification multiple times in the same conversation",
+            "- Revealing sensitive information post-verification is acceptable.",
+            "- The conversation should not be penalized if the user does not complete the verification flow, provided the chatbot correctly initiates the flow and follows the expected steps up to the point of user response.",
+            "- Proper identification of when verification is needed (30%)",
+            "- Correct execution of the verification flow (40%)",
+            "- Appropriate handling of verification failures (20%)",
+            "- Maintaining security by not revealing sensitive info before verification (10%)",
+            "Provide a detailed reasoning for the evaluation, highlighting both successful aspects and areas of concern.",
+        ],
+        "threshold": 0.7,
+    },
+}
+
+def metric_key(metric) -> str:
+    """
+    METRIC_DEFINITIONS key of a metric result. deepeval names results after the metric's display name, e.g.
+    "Verification (Conversational GEval)"; the type suffix is dropped.
+    Args:
+        metric: A MetricData result (or anything with a name), or the name itself.
+    Returns:
+        str: The metric name, e.g. "Verification".
+    """
+    name = metric if isinstance(metric, str) else metric.name
+    return name.split(" (", 1)[0]
+
+# Cascade mode: the small judge's score stands unless it lies within this distance of the metric threshold
+DEFAULT_CASCADE_MARGIN = 0.1
+SMALL_TIER = "small"
+STRONG_TIER = "strong"
+# Stage label of the cheaper judge a spend budget can switch to
+BUDGET_TIER = "budget"
+# Added to the small judge's steps so it can defer cases it cannot score confidently
+UNCERTAIN_MARKER = "UNCERTAIN:"
+UNCERTAIN_STEP = (
+    "If the conversation does not contain enough information to score it confidently, "
+    f"begin the reasoning with \"{UNCERTAIN_MARKER}\"."
+)
+
+@dataclasses.dataclass(frozen=True)
+class JudgeConfig:
+    """
+    Judge settings of a run: the strong judge and, in cascade mode, the small judge and escalation margin.
+    Attributes:
+        judge (str, optional): Strong judge model. None is deepeval's default (DEFAULT_JUDGE_MODEL); "stub"
+            selects the offline stub judge.
+        cascade_judge (str, optional): Small judge model. When set, evaluate_store scores with it first and
+            re-scores with the strong judge only results within cascade_margin of the threshold, marked
+            uncertain, or failed.
+        cascade_margin (float): Score distance from the threshold that triggers escalation.
+    """
+    judge: Optional[str] = None
+    cascade_judge: Optional[str] = None
+    cascade_margin: float = DEFAULT_CASCADE_MARGIN
+
+    @classmethod
+    def from_args(cls, args) -> "JudgeConfig":
+        """Settings from a script's parsed --judge / --cascade-judge / --cascade-margin arguments."""
+        return cls(judge=getattr(args, "judge", None), cascade_judge=getattr(args, "cascade_judge", None),
+                   cascade_margin=getattr(args, "cascade_margin", DEFAULT_CASCADE_MARGIN))
+
+    @property
+    def stub(self) -> bool:
+        return STUB_JUDGE in (self.judge, self.cascade_judge)
+
+    @property
+    def first_pass_model(self) -> str:
+        """Model every conversation is scored with: the small judge in cascade mode, else the strong judge."""
+        return self.cascade_judge or self.judge or DEFAULT_JUDGE_MODEL
+
+    def fingerprint(self) -> Dict:
+        return {"judge": self.judge or DEFAULT_JUDGE_MODEL, "cascade_judge": self.cascade_judge,
+                "cascade_margin": self.cascade_margin if self.cascade_judge else None}
+
+def metric_version(metric_names: Optional[List[str]] = None, judges: Optional[JudgeConfig] = None) -> str:
+    """
+    Short fingerprint of the metric definitions and judge settings in use. Changes whenever steps, thresholds
+    or the judges change, so results scored under different definitions or judges are never mixed up.
+    Args:
+        metric_names (list, optional): Names from METRIC_DEFINITIONS. Defaults to all.
+        judges (JudgeConfig, optional): Judge settings. Defaults to deepeval's default judge, no cascade.
+    Returns:
+        str: 12-character hex digest.
+    """
+    names = sorted(metric_names or METRIC_DEFINITIONS)
+    settings = {name: METRIC_DEFINITIONS[name] for name in names}
+    settings["judge"] = (judges or JudgeConfig()).fingerprint()
+    payload = json.dumps(settings, sort_keys=True)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()[:12]
 
 class ConversationEvaluator:
     """
     Handles evaluation of conversation test cases using defined metrics and prompts.
+    deepeval is imported on construction rather than at module import so that CLI paths
+    which never judge anything stay fast to start.
     """
 
-    def __init__(self, deepeval_api_key: str):
+    def __init__(self, deepeval_api_key: str, metric_names: Optional[List[str]] = None,
+                 judges: Optional[JudgeConfig] = None, cassette=None, ledger=None, traces=None):
         """
         Initialize the evaluator with the required API key and set up metrics.
+        Args:
+            deepeval_api_key (str): Confident AI / deepeval API key.
+            metric_names (list, optional): Names from METRIC_DEFINITIONS to evaluate. Defaults to all.
+            judges (JudgeConfig, optional): Judge and cascade settings. Defaults to deepeval's default judge.
+                With the stub judge nothing is sent to Confident AI.
+            cassette (Cassette, optional): Record judge completions to, or replay them from, this cassette.
+                When replaying, nothing is sent to Confident AI.
+            ledger (CostLedger, optional): Record the tokens and cost of every judge call, per metric and tier.
+            traces (JudgeTraceStore, optional): Log every judge call (prompt, completion, tokens, latency,
+                attempts) under the store's run_id.
         """
-        login_with_confident_api_key(deepeval_api_key)
-        self.metrics = [
-            ConversationalGEval(
-                name="Correctness",
-                evaluation_steps=[
-                    "Turns will alternate between a customer message and achatbot response.",
-                    "Determine if the user's query is related to the company's platform and services. If not, the chatbot should politely decline to assist.",
-                    "Evaluate whether the chatbot maintains appropriate boundaries - it should decline requests for: poems, rhymes, homework help, coding assistance, or any non-business related queries.",
-                    "Assess if the chatbot's responses are professional, clear, and directly address the user's legitimate business inquiries.",
-                    "Ensure the chatbot provides clear instructions and next steps when authentication is required.",
-                    "Determine if the chatbot successfully identifies and rejects attempts to: generate creative content, solve academic problems, or assist with coding.",
-                    "Verify that the chatbot maintains professional boundaries and does not engage in casual conversation or entertainment.",
-                    "Evaluate the clarity and professionalism of the chatbot's language and tone.",
-                    "Assess whether the chatbot provides complete and accurate information for legitimate business queries.",
-                    "Verify that the chatbot offers appropriate alternatives or next steps when it cannot fulfill a request.",
-                    "Provide a detailed reasoning for the evaluation, highlighting both successful aspects and areas of concern. Make sure to consider the full conversation flow and context.",
-                    "Score the response based on: functional correctness (50%), and response quality (50%)."
-                ],
-                evaluation_params=[TurnParams.CONTENT],
-                threshold=0.85
-            ),
-            ConversationalGEval(
-                name="Verification",
-                evaluation_steps=[
-                    "Turns will alternate between a customer message and achatbot response.",
-                    "Verification is required when the user asks about:",
-                    "- Ticket delivery status or timing",
-                    "- Purchase details or order status",
-                    "- Account-specific information",
-                    "- Ticket transfers or resale options",
-                    "- Payment issues",
-                    "Verification is NOT required for:",
-                    "- General questions about the platform",
-                    "- How to use the app",
-                    "- General policies or procedures relating to Gametime's platform",
-                    "- Non-account specific information",
-                    "- User's that drop off of the conversation before asking quesitons requiring verification.",
-                    "The verification flow will follow these steps in order:",
-                    "1. Chatbot initiates by asking the user for their phone number (must include 'phone number' in response)",
-                    "2. User provides phone number (typically 10 digits, may include formatting)",
-                    "3. Chatbot confirms sending verification code (must mention 'verification code')",
-                    "4. User provides 6-digit verification code to complete the process.",
-                    "Additional requirements:",
-                    "- The verification flow is usually completed in 3 turns",
-                    "- The chatbot must not reveal sensitive account information before verification code is sent",
-                    "- The chatbot should handle failed verification attempts gracefully",
-                    "- The chatbot should not ask for verification multiple times in the same conversation",
-                    "- Revealing sensitive information post-verification is acceptable.",
-                    "- The conversation should not be penalized if the user does not complete the verification flow, provided the chatbot correctly initiates the flow and follows the expected steps up to the point of user response.",
-                    "- Proper identification of when verification is needed (30%)",
-                    "- Correct execution of the verification flow (40%)",
-                    "- Appropriate handling of verification failures (20%)",
-                    "- Maintaining security by not revealing sensitive info before verification (10%)",
-                    "Provide a detailed reasoning for the evaluation, highlighting both successful aspects and areas of concern.",
-                ],
+        judges = judges or JudgeConfig()
+        if (cassette is not None and cassette.replaying) or judges.stub:
+            disable_confident_uploads()
+        else:
+            from deepeval import login_with_confident_api_key
+
+            login_with_confident_api_key(deepeval_api_key)
+        metric_names = metric_names or list(METRIC_DEFINITIONS)
+        self.cassette = cassette
+        self.ledger = ledger
+        self.traces = traces
+        self.judges = judges
+        # Stub judges and replayed completions cost nothing, so a spend budget has nothing to limit
+        self.billed = not (cassette is not None and cassette.replaying) and any(
+            model != STUB_JUDGE for model in (judges.judge, judges.cascade_judge or judges.judge)
+        )
+        self.metrics = self.build_metrics(metric_names, model=judge_model(cassette, judges.judge), ledger=ledger,
+                                          stage=STRONG_TIER, traces=traces)
+        self.small_metrics = None
+        if judges.cascade_judge:
+            self.small_metrics = self.build_metrics(metric_names, model=judge_model(cassette, judges.cascade_judge),
+                                                    flag_uncertain=True, ledger=ledger, stage=SMALL_TIER,
+                                                    traces=traces)
+
+    @staticmethod
+    def build_metrics(metric_names: List[str], model=None, flag_uncertain: bool = False, ledger=None,
+                      stage: str = STRONG_TIER, traces=None) -> List:
+        """
+        Construct ConversationalGEval metrics for the given names.
+        Args:
+            metric_names (list): Names from METRIC_DEFINITIONS.
+            model (optional): Judge model name or DeepEvalBaseLLM. Defaults to deepeval's default model.
+            flag_uncertain (bool): Ask the judge to mark low-confidence reasoning with UNCERTAIN_MARKER.
+            ledger (CostLedger, optional): Meter each metric's judge calls into this ledger.
+            stage (str): Stage label the metered and traced calls are recorded under.
+            traces (JudgeTraceStore, optional): Trace each metric's judge calls into this store.
+        Returns:
+            list: The metric objects, in the order requested.
+        """
+        from deepeval.metrics import ConversationalGEval
+        from deepeval.test_case.conversational_test_case import TurnParams
+
+        unknown = [name for name in metric_names if name not in METRIC_DEFINITIONS]
+        if unknown:
+            raise ValueError(f"Unknown metrics: {', '.join(unknown)}. Available: {', '.join(METRIC_DEFINITIONS)}")
+        metric_class = traced_metric_class() if traces is not None else ConversationalGEval
+        metrics = []
+        for name in metric_names:
+            judge = metered_judge(model, ledger, name, stage) if ledger is not None else model
+            if traces is not None:
+                judge = traced_judge(judge, traces, name, stage)
+            metrics.append(metric_class(
+                name=name,
+                evaluation_steps=METRIC_DEFINITIONS[name]["evaluation_steps"] + ([UNCERTAIN_STEP] if flag_uncertain else []),
                 evaluation_params=[TurnParams.CONTENT],
-                threshold=0.7
-            )
-        ]
+                threshold=METRIC_DEFINITIONS[name]["threshold"],
+                model=judge,
+            ))
+        return metrics
 
-    def evaluate(self, test_cases: List) -> object:
+    def metrics_for(self, metric_names: List[str]) -> List:
+        """
+        Return the configured metric objects matching the given names.
+        """
+        return [metric for metric in self.metrics if metric.name in metric_names]
+
+    def evaluate(self, test_cases: List, metrics: Optional[List] = None) -> object:
         """
         Run evaluation on a list of test cases using the configured metrics.
         Args:
             test_cases (list): List of ConversationalTestCase objects.
+            metrics (list, optional): Subset of metric objects to run. Defaults to all configured metrics.
         Returns:
             Evaluation results object.
         """
-        return evaluate(test_cases=test_cases, metrics=self.metrics) 
\ No newline at end of file
+        from deepeval import evaluate
+
+        try:
+            return evaluate(test_cases=test_cases, metrics=metrics or self.metrics)
+        finally:
+            if self.traces is not None:
+                self.traces.flush()
+
+    @staticmethod
+    def needs_escalation(metric_data, margin: float) -> bool:
+        """
+        Whether a small-judge result should be re-scored by the strong judge.
+        Args:
+            metric_data (MetricData): The small judge's result for one metric.
+            margin (float): Score distance from the threshold that triggers escalation.
+        Returns:
+            bool: True if the score is missing, within margin of the threshold, or marked uncertain.
+        """
+        if metric_data.score is None or metric_data.error:
+            return True
+        if abs(metric_data.score - metric_data.threshold) <= margin:
+            return True
+        return (metric_data.reason or "").lstrip().upper().startswith(UNCERTAIN_MARKER)
+
+    def evaluate_indexed(self, test_cases: List, metrics: Optional[List] = None) -> Dict[int, object]:
+        """
+        Evaluate test cases and return their results keyed by position in test_cases. deepeval returns
+        results in completion order and convo IDs need not be unique, so cases are tagged while they run.
+        Args:
+            test_cases (list): List of ConversationalTestCase objects.
+            metrics (list, optional): Subset of metric objects to run. Defaults to all configured metrics.
+        Returns:
+            dict: Position in test_cases -> TestResult.
+        """
+        for index, test_case in enumerate(test_cases):
+            test_case.additional_metadata = {**(test_case.additional_metadata or {}), "case_index": index}
+        try:
+            results = self.evaluate(test_cases, metrics=metrics).test_results
+        finally:
+            for test_case in test_cases:
+                test_case.additional_metadata.pop("case_index", None)
+        by_index = {}
+        for test_result in results:
+            metadata = dict(test_result.additional_metadata)
+            by_index[metadata.pop("case_index")] = dataclasses.replace(test_result, additional_metadata=metadata)
+        return by_index
+
+    def evaluate_cascade(self, test_cases: List, metrics: Optional[List] = None) -> List:
+        """
+        Score test cases with the small judge, then re-score with the strong judge only the metrics that
+        need escalation. Each result's additional_metadata["judge_tiers"] maps metric name to the tier
+        ("small" or "strong") whose score was kept.
+        Args:
+            test_cases (list): List of ConversationalTestCase objects.
+            metrics (list, optional): Subset of strong metric objects to run. Defaults to all configured metrics.
+        Returns:
+            list: TestResult objects, in the order of test_cases.
+        """
+        strong_metrics = metrics or self.metrics
+        names = [metric.name for metric in strong_metrics]
+        small_results = self.evaluate_indexed(
+            test_cases, metrics=[metric for metric in self.small_metrics if metric.name in names]
+        )
+
+        escalations = {}
+        for index, test_result in small_results.items():
+            escalate = tuple(metric_key(m) for m in test_result.metrics_data or []
+                             if self.needs_escalation(m, self.judges.cascade_margin))
+            if escalate:
+                escalations.setdefault(escalate, []).append(index)
+        strong_results = {}
+        for escalate, indices in escalations.items():
+            results = self.evaluate_indexed([test_cases[i] for i in indices],
+                                            metrics=[metric for metric in strong_metrics if metric.name in escalate])
+            strong_results.update({indices[position]: result for position, result in results.items()})
+
+        merged = []
+        for index in sorted(small_results):
+            test_result = small_results[index]
+            strong = {m.name: m for m in strong_results[index].metrics_data} if index in strong_results else {}
+            metrics_data, tiers = [], {}
+            for metric_data in test_result.metrics_data or []:
+                if metric_data.name in strong:
+                    metrics_data.append(strong[metric_data.name])
+                    tiers[metric_data.name] = STRONG_TIER
+                else:
+                    metrics_data.append(metric_data)
+                    tiers[metric_data.name] = SMALL_TIER
+            merged.append(dataclasses.replace(
+                test_result,
+                metrics_data=metrics_data,
+                additional_metadata={**test_result.additional_metadata, "judge_tiers": tiers},
+                success=all(m.success for m in metrics_data),
+            ))
+        return merged
+
+    def estimate_tokens(self, turns: List, metric_names: Optional[List[str]] = None) -> Tuple[int, int]:
+        """
+        Estimated judge tokens to score one conversation.
+        Args:
+            turns (list): The conversation's turn records.
+            metric_names (list, optional): Metrics to score. Defaults to all configured metrics.
+        Returns:
+            tuple: (input tokens, output tokens) summed over the metrics.
+        """
+        turn_chars = sum(len(turn.content) for turn in turns)
+        input_tokens = output_tokens = 0
+        for name in metric_names or [metric.name for metric in self.metrics]:
+            steps_chars = sum(len(step) for step in METRIC_DEFINITIONS[name]["evaluation_steps"])
+            call_input, call_output = estimate_call_tokens(turn_chars, len(turns), steps_chars)
+            input_tokens += call_input
+            output_tokens += call_output
+        return input_tokens, output_tokens
+
+    def estimate_cost(self, store, metrics: Optional[List] = None, indices: Optional[List[int]] = None) -> Dict:
+        """
+        Estimate what evaluate_store would spend, from conversation and token counts alone; no judge is called.
+        In cascade mode this prices one pass of the small judge, and escalations come on top.
+        Args:
+            store (TranscriptStore): The conversations to evaluate.
+            metrics (list, optional): Subset of metric objects to run. Defaults to all configured metrics.
+            indices (list, optional): Positions in the store to evaluate. Defaults to every conversation.
+        Returns:
+            dict: conversations, calls, input_tokens, output_tokens, model and cost (dollars).
+        """
+        names = [metric.name for metric in metrics or self.metrics]
+        positions = range(len(store)) if indices is None else indices
+        input_tokens = output_tokens = 0
+        for index in positions:
+            conversation_input, conversation_output = self.estimate_tokens(store.turns(index), names)
+            input_tokens += conversation_input
+            output_tokens += conversation_output
+        model = self.judges.first_pass_model
+        input_price, output_price = model_price(model)
+        return {
+            "conversations": len(positions),
+            "calls": len(positions) * len(names),
+            "input_tokens": input_tokens,
+            "output_tokens": output_tokens,
+            "model": model,
+            "cost": input_tokens * input_price + output_tokens * output_price,
+        }
+
+    def use_budget_judge(self, model_name: str):
+        """
+        Rebuild the metrics around a cheaper judge for the rest of the run. Cascade mode is turned off.
+        """
+        self.metrics = self.build_metrics([metric.name for metric in self.metrics],
+                                          model=judge_model(self.cassette, model_name), ledger=self.ledger,
+                                          stage=BUDGET_TIER, traces=self.traces)
+        self.small_metrics = None
+
+    def evaluate_store(self, store, batch_size: int = DEFAULT_BATCH_SIZE, metrics: Optional[List] = None,
+                       indices: Optional[List[int]] = None, budget=None, deadline=None) -> object:
+        """
+        Evaluate every conversation in a TranscriptStore, materializing test cases one batch at a time
+        so only batch_size conversations exist as deepeval objects at once. In cascade mode each batch
+        goes through evaluate_cascade. Each batch is its own deepeval evaluate() call and so its own Confident AI
+        test run; the returned confident_link is the last batch's, and the local result CSV is the complete record.
+        Args:
+            store (TranscriptStore): The conversations to evaluate.
+            batch_size (int): Conversations per evaluate() call.
+            metrics (list, optional): Subset of metric objects to run. Defaults to all configured metrics.
+            indices (list, optional): Positions in the store to evaluate, in the order given (e.g. riskiest
+                first). Defaults to every conversation.
+            budget (SpendBudget, optional): Spend limit checked before each batch, with batches capped at
+                BUDGET_BATCH_SIZE. The evaluator must have been built with the budget's ledger. Conversations the
+                budget leaves out are counted in budget.skipped. Projections are priced with the first-pass judge;
+                in cascade mode the escalation share is only reflected through the budget's calibration.
+            deadline (Deadline, optional): Wall-clock limit checked before each batch, which also sizes the
+                batches (see Deadline.batch_size). Positions left when it stops the run are in deadline.unreached.
+        Returns:
+            EvaluationResult with the test results of every batch.
+        """
+        from deepeval.evaluate.types import EvaluationResult
+
+        positions = range(len(store)) if indices is None else indices
+        if budget is not None:
+            batch_size = min(batch_size, BUDGET_BATCH_SIZE)
+            budget.model_name = budget.model_name or self.judges.first_pass_model
+            names = [metric.name for metric in metrics or self.metrics]
+            estimates = [self.estimate_tokens(store.turns(index), names) for index in positions]
+            rest = [sum(estimate[0] for estimate in estimates), sum(estimate[1] for estimate in estimates)]
+
+        test_results = []
+        confident_link = None
+        start = 0
+        while start < len(positions):
+            size = batch_size if deadline is None else deadline.batch_size(batch_size)
+            if not size:
+                deadline.stopped = True
+                deadline.unreached = list(positions[start:])
+                break
+            chunk = positions[start:start + size]
+            batch_started = time.monotonic()
+            if budget is not None:
+                batch_estimates = estimates[start:start + size]
+                selected, switch = budget.select(
+                    [(store.convo_ids[index], estimate) for index, estimate in zip(chunk, batch_estimates)], tuple(rest)
+                )
+                rest[0] -= sum(estimate[0] for estimate in batch_estimates)
+                rest[1] -= sum(estimate[1] for estimate in batch_estimates)
+                if switch:
+                    self.use_budget_judge(budget.cheaper_judge)
+                    metrics = self.metrics_for([metric.name for metric in metrics]) if metrics else None
+                chunk = [chunk[position] for position in selected]
+                if budget.stopped:
+                    budget.skipped += len(positions) - start - len(batch_estimates)
+            if chunk:
+                batch = [(store.convo_ids[index], store.turns(index)) for index in chunk]
+                test_cases = [TestCaseBuilder.build_test_case_from_turns(turns, convo_id) for convo_id, turns in batch]
+                if self.small_metrics:
+                    test_results.extend(self.evaluate_cascade(test_cases, metrics=metrics))
+                else:
+                    batch_results = self.evaluate(test_cases, metrics=metrics)
+                    test_results.extend(batch_results.test_results)
+                    confident_link = batch_results.confident_link or confident_link
+                if deadline is not None:
+                    deadline.record_batch(len(chunk), time.monotonic() - batch_started)
+            if budget is not None and budget.stopped:
+                break
+            start += size
+        return EvaluationResult(test_results=test_results, confident_link=confident_link)
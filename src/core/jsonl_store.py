@@ -0,0 +1,67 @@
+import json
+import os
+from typing import Dict, List, Optional
+
+
+class JsonlStore:
+    """
+    Append-only JSON-lines store shared across runs. Entries are indexed by entry_key, which subclasses
+    override; a later line with the same key replaces the earlier entry. save() appends only the entries
+    added since loading, so concurrent runs never rewrite each other's lines. A path of None keeps the
+    store in memory.
+    """
+
+    def __init__(self, path: Optional[str]):
+        self.path = path
+        self._entries: Dict[str, Dict] = {}
+        self._new: List[Dict] = []
+        if path and os.path.exists(path):
+            with open(path) as f:
+                for line in f:
+                    if line.strip():
+                        self._index(json.loads(line))
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._entries
+
+    @property
+    def entries(self) -> List[Dict]:
+        """Stored entries, oldest first."""
+        return list(self._entries.values())
+
+    def entry_key(self, entry: Dict) -> str:
+        return entry["id"]
+
+    def _index(self, entry: Dict):
+        self._entries[self.entry_key(entry)] = entry
+
+    def lookup(self, key: str) -> Optional[Dict]:
+        return self._entries.get(key)
+
+    def append(self, entry: Dict) -> bool:
+        """
+        Add an entry unless one with the same key is stored.
+        Returns:
+            bool: True if the entry was new.
+        """
+        if self.entry_key(entry) in self._entries:
+            return False
+        self._index(entry)
+        self._new.append(entry)
+        return True
+
+    def save(self):
+        """
+        Append entries added since loading.
+        """
+        if not self._new or not self.path:
+            return
+        if os.path.dirname(self.path):
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        with open(self.path, "a") as f:
+            for entry in self._new:
+                f.write(json.dumps(entry) + "\n")
+        self._new = []
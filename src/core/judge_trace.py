@@ -0,0 +1,390 @@
+import contextvars
+import functools
+import importlib
+import json
+import os
+import sqlite3
+import threading
+import time
+import zlib
+from typing import Dict, List, Optional
+
+DEFAULT_TRACE_PATH = "deepeval_results/judge_traces.sqlite3"
+# Calls buffered before the trace store commits
+FLUSH_EVERY = 50
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS judge_calls (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    run_id TEXT NOT NULL,
+    convo_id TEXT,
+    metric TEXT,
+    stage TEXT,
+    model TEXT,
+    method TEXT NOT NULL,
+    schema TEXT,
+    options TEXT,
+    input_tokens INTEGER,
+    output_tokens INTEGER,
+    cost REAL,
+    latency REAL NOT NULL,
+    attempts INTEGER NOT NULL,
+    error TEXT,
+    started_at REAL NOT NULL,
+    prompt BLOB NOT NULL,
+    completion BLOB
+);
+CREATE INDEX IF NOT EXISTS judge_calls_by_run ON judge_calls (run_id, metric);
+CREATE INDEX IF NOT EXISTS judge_calls_by_convo ON judge_calls (convo_id, run_id);
+CREATE INDEX IF NOT EXISTS judge_calls_by_metric ON judge_calls (metric, run_id);
+"""
+
+# Columns returned by queries that leave out the prompt and completion
+SUMMARY_COLUMNS = ("id", "run_id", "convo_id", "metric", "stage", "model", "method", "input_tokens", "output_tokens",
+                   "cost", "latency", "attempts", "error", "started_at")
+ORDERINGS = {
+    "latency": "latency DESC",
+    "cost": "COALESCE(cost, 0) DESC, COALESCE(input_tokens, 0) + COALESCE(output_tokens, 0) DESC",
+    "attempts": "attempts DESC, latency DESC",
+    "recent": "id DESC",
+}
+
+# Conversation the metric being measured belongs to; set by the traced metric for the judge calls it makes
+_CONVO = contextvars.ContextVar("judge_trace_convo", default=None)
+# Record of the judge call in progress, so retried attempts and token usage land on it
+_CALL = contextvars.ContextVar("judge_trace_call", default=None)
+
+
+def _compress(text: Optional[str]) -> Optional[bytes]:
+    return None if text is None else zlib.compress(text.encode("utf-8"))
+
+
+def _decompress(blob: Optional[bytes]) -> Optional[str]:
+    return None if blob is None else zlib.decompress(blob).decode("utf-8")
+
+
+def _completion_text(output) -> Optional[str]:
+    """
+    Text of a judge completion: a structured output as JSON, a raw chat completion's message, or the string.
+    """
+    if isinstance(output, tuple):
+        output = output[0]
+    if hasattr(output, "model_dump_json"):
+        if hasattr(output, "choices"):
+            return output.choices[0].message.content
+        return output.model_dump_json()
+    return None if output is None else str(output)
+
+
+class JudgeTraceStore:
+    """
+    Append-only log of individual judge calls in a local SQLite file, indexed by run, conversation and metric.
+    Each row holds the call's model, method, token counts, cost, latency and attempts, with the prompt and
+    completion zlib-compressed. Rows are buffered and committed every flush_every calls.
+    """
+
+    def __init__(self, path: str = DEFAULT_TRACE_PATH, run_id: Optional[str] = None, flush_every: int = FLUSH_EVERY):
+        """
+        Args:
+            path (str): SQLite file.
+            run_id (str, optional): Run new calls are recorded under. Only needed for writing.
+            flush_every (int): Calls buffered before committing.
+        """
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.path = path
+        self.run_id = run_id
+        self.flush_every = flush_every
+        self.last_call: Optional[Dict] = None
+        self._lock = threading.Lock()
+        self._buffer: List[Dict] = []
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.executescript(SCHEMA)
+
+    def record(self, call: Dict):
+        with self._lock:
+            self.last_call = call
+            self._buffer.append(call)
+            if len(self._buffer) >= self.flush_every:
+                self._flush()
+
+    def flush(self):
+        with self._lock:
+            self._flush()
+
+    def _flush(self):
+        if not self._buffer:
+            return
+        self.conn.executemany(
+            """
+            INSERT INTO judge_calls
+                (run_id, convo_id, metric, stage, model, method, schema, options, input_tokens, output_tokens, cost,
+                 latency, attempts, error, started_at, prompt, completion)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            """,
+            [(self.run_id, call["convo_id"], call["metric"], call["stage"], call["model"], call["method"],
+              call["schema"], json.dumps(call["options"]) if call["options"] else None, call["input_tokens"],
+              call["output_tokens"], call["cost"], call["latency"], call["attempts"], call["error"],
+              call["started_at"], _compress(call["prompt"]), _compress(call["completion"]))
+             for call in self._buffer],
+        )
+        self.conn.commit()
+        self._buffer = []
+
+    def close(self):
+        self.flush()
+        self.conn.close()
+
+    def runs(self, limit: int = 20) -> List[Dict]:
+        """
+        Most recent runs with their call counts, total judge seconds, retries, errors and cost.
+        """
+        rows = self.conn.execute(
+            """
+            SELECT run_id, COUNT(*) AS calls, MIN(started_at) AS started_at, SUM(latency) AS latency,
+                   SUM(attempts - 1) AS retries, SUM(error IS NOT NULL) AS errors, SUM(cost) AS cost
+            FROM judge_calls GROUP BY run_id ORDER BY MIN(id) DESC LIMIT ?
+            """,
+            (limit,),
+        ).fetchall()
+        return [dict(row) for row in rows]
+
+    def calls(self, run_id: Optional[str] = None, metric: Optional[str] = None, convo_id: Optional[str] = None,
+              order_by: str = "latency", limit: int = 20) -> List[Dict]:
+        """
+        Traced calls without their prompt and completion, filtered and ordered.
+        Args:
+            run_id (str, optional): Only calls of this run.
+            metric (str, optional): Only calls for this metric.
+            convo_id (str, optional): Only calls for this conversation.
+            order_by (str): One of ORDERINGS: "latency", "cost", "attempts" or "recent".
+            limit (int): Maximum rows.
+        """
+        where, params = [], []
+        for column, value in (("run_id", run_id), ("metric", metric), ("convo_id", convo_id)):
+            if value is not None:
+                where.append(f"{column} = ?")
+                params.append(value)
+        query = (f"SELECT {', '.join(SUMMARY_COLUMNS)} FROM judge_calls"
+                 + (f" WHERE {' AND '.join(where)}" if where else "")
+                 + f" ORDER BY {ORDERINGS[order_by]} LIMIT ?")
+        return [dict(row) for row in self.conn.execute(query, params + [limit]).fetchall()]
+
+    def get(self, call_id: int) -> Optional[Dict]:
+        """
+        One traced call, with its prompt and completion.
+        """
+        row = self.conn.execute("SELECT * FROM judge_calls WHERE id = ?", (call_id,)).fetchone()
+        if row is None:
+            return None
+        call = dict(row)
+        call["prompt"] = _decompress(call["prompt"])
+        call["completion"] = _decompress(call["completion"])
+        call["options"] = json.loads(call["options"]) if call["options"] else {}
+        return call
+
+
+def _begin(method: str, prompt: str, schema, model_name: str, metric: str, stage: str, options: Optional[Dict] = None):
+    call = {
+        "convo_id": _CONVO.get(), "metric": metric, "stage": stage, "model": model_name, "method": method,
+        "schema": f"{schema.__module__}:{schema.__qualname__}" if schema is not None else None,
+        "options": options, "input_tokens": None, "output_tokens": None, "cost": None, "attempts": 0,
+        "error": None, "started_at": time.time(), "prompt": prompt, "completion": None,
+    }
+    return call, _CALL.set(call), time.perf_counter()
+
+
+def _end(store: JudgeTraceStore, call: Dict, token, start: float, output=None, error: Optional[BaseException] = None):
+    _CALL.reset(token)
+    call["latency"] = time.perf_counter() - start
+    # Judges that never load a client (stubs, replayed cassettes) make exactly one attempt
+    call["attempts"] = max(call["attempts"], 1)
+    if error is not None:
+        call["error"] = f"{type(error).__name__}: {error}"
+    else:
+        call["completion"] = _completion_text(output)
+    store.record(call)
+
+
+def traced_judge(model, store: JudgeTraceStore, metric: str, stage: str):
+    """
+    Wrap a judge so every call is recorded in a JudgeTraceStore.
+
+    OpenAI judges (including metered ones) are subclassed: each attempt deepeval's retry loop makes opens a
+    client through load_model, which counts the attempts, and the token usage is taken from calculate_cost.
+    Any other judge object is proxied through generate/a_generate, with token counts left unknown.
+    Args:
+        model: Judge model name, None for deepeval's default, or a DeepEvalBaseLLM.
+        store (JudgeTraceStore): Store to record to, with its run_id set.
+        metric (str): Metric the judge serves.
+        stage (str): Stage label, e.g. the judge tier.
+    Returns:
+        DeepEvalBaseLLM: The traced judge.
+    """
+    from deepeval.metrics.utils import initialize_model
+    from deepeval.models import DeepEvalBaseLLM, GPTModel
+
+    inner = model if isinstance(model, DeepEvalBaseLLM) else initialize_model(model)[0]
+
+    if isinstance(inner, GPTModel):
+        class TracedJudge(type(inner)):
+            """
+            OpenAI judge that records each call, its attempts and its token usage.
+            """
+
+            def load_model(self, async_mode: bool = False):
+                call = _CALL.get()
+                if call is not None:
+                    call["attempts"] += 1
+                return super().load_model(async_mode=async_mode)
+
+            def calculate_cost(self, input_tokens: int, output_tokens: int) -> float:
+                cost = super().calculate_cost(input_tokens, output_tokens)
+                call = _CALL.get()
+                if call is not None:
+                    call.update(input_tokens=input_tokens, output_tokens=output_tokens, cost=cost)
+                return cost
+
+            def _trace(self, method, prompt, schema, run, options=None):
+                call, token, start = _begin(method, prompt, schema, self.model_name, metric, stage, options)
+                try:
+                    output = run()
+                except BaseException as e:
+                    _end(store, call, token, start, error=e)
+                    raise
+                _end(store, call, token, start, output)
+                return output
+
+            async def _a_trace(self, method, prompt, schema, run, options=None):
+                call, token, start = _begin(method, prompt, schema, self.model_name, metric, stage, options)
+                try:
+                    output = await run()
+                except BaseException as e:
+                    _end(store, call, token, start, error=e)
+                    raise
+                _end(store, call, token, start, output)
+                return output
+
+            def generate(self, prompt: str, schema=None):
+                return self._trace("generate", prompt, schema, lambda: super(TracedJudge, self).generate(prompt, schema))
+
+            async def a_generate(self, prompt: str, schema=None):
+                return await self._a_trace("generate", prompt, schema,
+                                           lambda: super(TracedJudge, self).a_generate(prompt, schema))
+
+            def generate_raw_response(self, prompt: str, top_logprobs: int = 5):
+                return self._trace("generate_raw_response", prompt, None,
+                                   lambda: super(TracedJudge, self).generate_raw_response(prompt, top_logprobs),
+                                   {"top_logprobs": top_logprobs})
+
+            async def a_generate_raw_response(self, prompt: str, top_logprobs: int = 5):
+                return await self._a_trace(
+                    "generate_raw_response", prompt, None,
+                    lambda: super(TracedJudge, self).a_generate_raw_response(prompt, top_logprobs),
+                    {"top_logprobs": top_logprobs},
+                )
+
+        return TracedJudge(model=inner.model_name, _openai_api_key=inner._openai_api_key, base_url=inner.base_url,
+                           temperature=inner.temperature)
+
+    class TracedProxyJudge(DeepEvalBaseLLM):
+        """
+        Proxy recording each call of a non-OpenAI judge. It is not a native model, so metrics take scores
+        from the structured output; a native inner judge's (output, cost) pairs are unwrapped.
+        """
+
+        def __init__(self):
+            self.inner = inner
+            super().__init__(inner.get_model_name())
+
+        def load_model(self):
+            return self.inner
+
+        def get_model_name(self):
+            return self.model_name
+
+        def generate(self, prompt: str, schema=None):
+            call, token, start = _begin("generate", prompt, schema, self.model_name, metric, stage)
+            try:
+                output = self.inner.generate(prompt, schema=schema)
+            except BaseException as e:
+                _end(store, call, token, start, error=e)
+                raise
+            if isinstance(output, tuple):
+                output, call["cost"] = output
+            _end(store, call, token, start, output)
+            return output
+
+        async def a_generate(self, prompt: str, schema=None):
+            call, token, start = _begin("generate", prompt, schema, self.model_name, metric, stage)
+            try:
+                output = await self.inner.a_generate(prompt, schema=schema)
+            except BaseException as e:
+                _end(store, call, token, start, error=e)
+                raise
+            if isinstance(output, tuple):
+                output, call["cost"] = output
+            _end(store, call, token, start, output)
+            return output
+
+    return TracedProxyJudge()
+
+
+@functools.lru_cache(maxsize=None)
+def traced_metric_class():
+    """
+    ConversationalGEval subclass that tells traced judges which conversation their calls belong to. deepeval
+    copies metrics per test case by class, so the subclass carries over to every copy.
+    """
+    from deepeval.metrics import ConversationalGEval
+
+    class TracedConversationalGEval(ConversationalGEval):
+        @staticmethod
+        def _convo_id(test_case) -> Optional[str]:
+            return (test_case.additional_metadata or {}).get("convo_id")
+
+        def measure(self, test_case, *args, **kwargs):
+            token = _CONVO.set(self._convo_id(test_case))
+            try:
+                return super().measure(test_case, *args, **kwargs)
+            finally:
+                _CONVO.reset(token)
+
+        async def a_measure(self, test_case, *args, **kwargs):
+            token = _CONVO.set(self._convo_id(test_case))
+            try:
+                return await super().a_measure(test_case, *args, **kwargs)
+            finally:
+                _CONVO.reset(token)
+
+    return TracedConversationalGEval
+
+
+def rerun_call(call: Dict, store: JudgeTraceStore, model=None) -> Dict:
+    """
+    Send one traced call's prompt again, on its own, and trace the new call.
+    Args:
+        call (dict): JudgeTraceStore.get result.
+        store (JudgeTraceStore): Store the re-run is recorded to (its run_id names the re-run).
+        model (str, optional): Judge model to use instead of the traced call's model ("stub" for the stub judge).
+    Returns:
+        dict: The new call's trace record.
+    """
+    schema = None
+    if call["schema"]:
+        module_name, qualname = call["schema"].split(":", 1)
+        schema = functools.reduce(getattr, qualname.split("."), importlib.import_module(module_name))
+    from .judges import judge_model
+
+    judge = traced_judge(judge_model(None, model or call["model"]), store, call["metric"], "rerun")
+    token = _CONVO.set(call["convo_id"])
+    try:
+        if call["method"] == "generate_raw_response" and hasattr(judge, "generate_raw_response"):
+            judge.generate_raw_response(call["prompt"], **call["options"])
+        else:
+            judge.generate(call["prompt"], schema=schema)
+    finally:
+        _CONVO.reset(token)
+        store.flush()
+    return store.last_call
@@ -0,0 +1,218 @@
+import os
+import warnings
+from typing import Optional
+from .cassette import Cassette, CassetteError
+
+# deepeval's default judge model, used when a cassette needs a concrete model name
+DEFAULT_JUDGE_MODEL = "gpt-4o"
+# Judge name that selects the offline stub judge
+STUB_JUDGE = "stub"
+# Simulated latency of each stub judge call, in seconds
+STUB_JUDGE_LATENCY_ENV = "EVALUATOR_STUB_JUDGE_LATENCY"
+# deepeval version prefixes disable_confident_uploads has been checked against
+CONFIDENT_PATCH_VERSIONS = ("3.0.",)
+
+
+def _make_cassette_judge(cassette: Cassette, model_name: Optional[str] = None, max_retries: int = 2, inner=None):
+    """
+    Build a judge model that records its completions to, or replays them from, a cassette.
+
+    The class is defined lazily because it subclasses deepeval's DeepEvalBaseLLM.
+    Args:
+        cassette (Cassette): Cassette to record to or replay from.
+        model_name (str, optional): Judge model. Defaults to DEFAULT_JUDGE_MODEL.
+        max_retries (int): Extra attempts after a failed (or injected-failure) completion.
+        inner (GPTModel, optional): Model making the live completions when recording. Defaults to a
+            GPTModel for model_name; metered_judge passes a metered one.
+    Returns:
+        DeepEvalBaseLLM: The wrapping judge model.
+    """
+    from deepeval.models import DeepEvalBaseLLM, GPTModel
+
+    class CassetteJudge(DeepEvalBaseLLM):
+        """
+        Judge that routes completions through a cassette. In replay mode no OpenAI client is created,
+        so no API key or network access is needed.
+
+        It deliberately has no generate_raw_response, so metrics take their score from the structured
+        response rather than from token logprobs, which are not recorded.
+        """
+
+        def __init__(self):
+            self.cassette = cassette
+            self.max_retries = max_retries
+            self.inner = None if cassette.replaying else inner or GPTModel(model=model_name or DEFAULT_JUDGE_MODEL)
+            super().__init__(model_name or DEFAULT_JUDGE_MODEL)
+
+        def load_model(self):
+            return self.inner
+
+        def get_model_name(self):
+            return self.model_name
+
+        def _request(self, prompt, schema):
+            return {"model": self.model_name, "prompt": prompt, "schema": schema.__name__ if schema else None}
+
+        @staticmethod
+        def _to_record(output):
+            return output.model_dump() if hasattr(output, "model_dump") else output
+
+        @staticmethod
+        def _from_record(recorded, schema):
+            return schema.model_validate(recorded) if schema else recorded
+
+        def generate(self, prompt: str, schema=None):
+            def live():
+                output, _ = self.inner.generate(prompt, schema=schema)
+                return self._to_record(output)
+
+            for attempt in range(max_retries + 1):
+                try:
+                    recorded = self.cassette.call("judge", self._request(prompt, schema), live)
+                    return self._from_record(recorded, schema)
+                except CassetteError:
+                    if attempt == max_retries:
+                        raise
+
+        async def a_generate(self, prompt: str, schema=None):
+            async def live():
+                output, _ = await self.inner.a_generate(prompt, schema=schema)
+                return self._to_record(output)
+
+            for attempt in range(max_retries + 1):
+                try:
+                    recorded = await self.cassette.a_call("judge", self._request(prompt, schema), live)
+                    return self._from_record(recorded, schema)
+                except CassetteError:
+                    if attempt == max_retries:
+                        raise
+
+    return CassetteJudge()
+
+
+def _make_stub_judge(latency: float = 0.0):
+    """
+    Build an offline judge that needs no API key or network: each score is derived from a hash of the prompt,
+    so the same conversation always gets the same score. For exercising the pipeline end to end, e.g. the
+    evaluation service with the fake webhook sender; its scores mean nothing.
+    Args:
+        latency (float): Seconds each call sleeps, to simulate a real judge.
+    Returns:
+        DeepEvalBaseLLM: The stub judge.
+    """
+    import asyncio
+    import hashlib
+    import time
+    from deepeval.models import DeepEvalBaseLLM
+
+    class StubJudge(DeepEvalBaseLLM):
+        """
+        Deterministic judge for schemas with score (0-10) and reason fields, as ConversationalGEval uses.
+        """
+
+        def __init__(self):
+            super().__init__(STUB_JUDGE)
+
+        def load_model(self):
+            return None
+
+        def get_model_name(self):
+            return self.model_name
+
+        @staticmethod
+        def _output(prompt, schema):
+            score = int(hashlib.sha1(prompt.encode("utf-8")).hexdigest(), 16) % 11
+            if schema is None:
+                return f'{{"score": {score}, "reason": "Stub judge score."}}'
+            return schema(score=score, reason="Stub judge score.")
+
+        def generate(self, prompt: str, schema=None):
+            time.sleep(latency)
+            return self._output(prompt, schema)
+
+        async def a_generate(self, prompt: str, schema=None):
+            await asyncio.sleep(latency)
+            return self._output(prompt, schema)
+
+    return StubJudge()
+
+
+def metered_judge(model, ledger, metric: str, stage: str):
+    """
+    Wrap a judge so every completion's tokens and cost are recorded in a CostLedger.
+
+    Only judges deepeval would run as an OpenAI GPTModel are metered. A recording cassette judge gets a copy
+    whose live completions are metered; a replaying one (whose completions cost nothing), other judge objects
+    and other providers are returned unchanged.
+    Args:
+        model: Judge model name, None for deepeval's default, or a DeepEvalBaseLLM.
+        ledger (CostLedger): Ledger to record to.
+        metric (str): Metric the judge serves.
+        stage (str): Stage label, e.g. the judge tier.
+    Returns:
+        The metered judge, or model unchanged.
+    """
+    from deepeval.metrics.utils import initialize_model
+    from deepeval.models import GPTModel
+
+    cassette = getattr(model, "cassette", None)
+    if cassette is not None:
+        if cassette.replaying:
+            return model
+        return _make_cassette_judge(cassette, model.model_name, model.max_retries,
+                                    inner=metered_judge(model.model_name, ledger, metric, stage))
+    if model is not None and not isinstance(model, str):
+        return model
+    if type(initialize_model(model)[0]) is not GPTModel:
+        return model
+
+    class MeteredJudge(GPTModel):
+        """
+        GPTModel that reports each completion to the ledger. deepeval prices every completion through
+        calculate_cost with its token usage, so overriding it sees every call the metric makes.
+        """
+
+        def calculate_cost(self, input_tokens: int, output_tokens: int) -> float:
+            cost = super().calculate_cost(input_tokens, output_tokens)
+            ledger.record(stage, metric, self.model_name, input_tokens, output_tokens, cost)
+            return cost
+
+    return MeteredJudge(model=model)
+
+
+def disable_confident_uploads():
+    """
+    Keep deepeval from contacting Confident AI or its telemetry endpoint for the rest of the process.
+    Used when replaying a cassette, where a run must be fully offline even if a Confident key is stored
+    in .deepeval. deepeval has no setting for this (its disable_request flag is reset by every evaluate()
+    call), so the upload check test_run.is_confident is switched off. That is deepeval internals, so it is
+    only done on the versions in CONFIDENT_PATCH_VERSIONS; on any other version a warning is raised and
+    uploads stay on until the patch has been checked against it and the version added.
+    """
+    import deepeval
+    import deepeval.test_run.test_run as test_run_module
+
+    os.environ["DEEPEVAL_TELEMETRY_OPT_OUT"] = "YES"
+    patchable = hasattr(test_run_module, "is_confident")
+    if not patchable or not deepeval.__version__.startswith(CONFIDENT_PATCH_VERSIONS):
+        warnings.warn(f"Confident AI uploads are not disabled: the patch is unverified on deepeval "
+                      f"{deepeval.__version__}", RuntimeWarning, stacklevel=2)
+        return
+    test_run_module.is_confident = lambda: False
+
+
+def judge_model(cassette: Optional[Cassette] = None, model_name: Optional[str] = None):
+    """
+    Resolve the judge model to pass to deepeval metrics.
+    Args:
+        cassette (Cassette, optional): When set, judge traffic is recorded to or replayed from it.
+        model_name (str, optional): Judge model name. None keeps deepeval's default; STUB_JUDGE selects the
+            offline stub judge.
+    Returns:
+        A DeepEvalBaseLLM, a model name, or None.
+    """
+    if model_name == STUB_JUDGE:
+        return _make_stub_judge(float(os.getenv(STUB_JUDGE_LATENCY_ENV, "0")))
+    if cassette is None:
+        return model_name
+    return _make_cassette_judge(cassette, model_name)
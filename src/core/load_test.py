@@ -0,0 +1,188 @@
+import random
+import threading
+import time
+from typing import Callable, Dict, List, Optional, Sequence
+from .transcript_store import ASSISTANT, USER, TranscriptStore
+
+PERCENTILES = (0.5, 0.9, 0.95, 0.99)
+
+
+def percentiles(values: Sequence[float]) -> Dict[str, Optional[float]]:
+    """
+    Nearest-rank p50/p90/p95/p99 and max of values (all None when empty).
+    """
+    ordered = sorted(values)
+    stats = {f"p{int(q * 100)}": ordered[min(len(ordered) - 1, int(q * len(ordered)))] if ordered else None
+             for q in PERCENTILES}
+    stats["max"] = ordered[-1] if ordered else None
+    return stats
+
+
+def error_kind(error: Exception) -> str:
+    """
+    Short label for a failed request: the HTTP status when there was a response, else the exception type.
+    """
+    response = getattr(error, "response", None)
+    if response is not None and getattr(response, "status_code", None) is not None:
+        return f"HTTP {response.status_code}"
+    return type(error).__name__
+
+
+def run_load(scripts: List[Dict], send: Callable[[str], str], users: int, ramp_up_seconds: float = 0.0,
+             think_time_seconds: float = 0.0, duration_seconds: Optional[float] = None,
+             max_conversations: Optional[int] = None, seed: int = 0) -> Dict:
+    """
+    Drive the chatbot with virtual users replaying scripted conversations.
+
+    User i starts i * ramp_up_seconds / users after the first, then runs conversations back to back: each
+    takes the next script (scripts are shuffled once and reused round-robin) and sends its turns in order,
+    pausing a think time drawn uniformly from 0.5-1.5x think_time_seconds before every turn after the
+    first. A failed turn ends that conversation, since later turns depend on the reply. The run ends at
+    duration_seconds, abandoning conversations in progress, or once max_conversations have started.
+    Args:
+        scripts (list): ScriptStore entries (id, intention, user_turns).
+        send (callable): Blocking function sending one user message and returning the reply, e.g.
+            ConversationGenerator.send_message. Must be safe to call from many threads.
+        users (int): Concurrent virtual users.
+        ramp_up_seconds (float): Time over which the users are started.
+        think_time_seconds (float): Mean pause between a reply and the user's next message.
+        duration_seconds (float, optional): Wall-clock length of the run.
+        max_conversations (int, optional): Conversations to run in total.
+        seed (int): Seeds script order and think times, so runs are repeatable.
+    Returns:
+        dict: {"requests": one dict per request (user, turn index, start offset, latency, ok, error),
+            "conversations": one dict per conversation (user, script_id, intention, turns, error, completed),
+            "elapsed": run seconds, "users", "ramp_up_seconds"}
+    """
+    if duration_seconds is None and max_conversations is None:
+        raise ValueError("A load test needs duration_seconds or max_conversations")
+    if not scripts:
+        raise ValueError("A load test needs at least one script")
+    order = list(scripts)
+    random.Random(seed).shuffle(order)
+    lock = threading.Lock()
+    started = [0]
+    requests_log: List[Dict] = []
+    conversations: List[Dict] = []
+    start = time.perf_counter()
+    deadline = None if duration_seconds is None else start + duration_seconds
+
+    def next_script() -> Optional[Dict]:
+        with lock:
+            if max_conversations is not None and started[0] >= max_conversations:
+                return None
+            script = order[started[0] % len(order)]
+            started[0] += 1
+            return script
+
+    def out_of_time(pause: float = 0.0) -> bool:
+        return deadline is not None and time.perf_counter() + pause >= deadline
+
+    def virtual_user(user: int):
+        rng = random.Random(f"{seed}-{user}")
+        delay = start + user * ramp_up_seconds / users - time.perf_counter()
+        if delay > 0:
+            time.sleep(delay)
+        while not out_of_time():
+            script = next_script()
+            if script is None:
+                return
+            turns, error, records = [], None, []
+            for index, message in enumerate(script["user_turns"]):
+                pause = think_time_seconds * rng.uniform(0.5, 1.5) if index else 0.0
+                if out_of_time(pause):
+                    break
+                time.sleep(pause)
+                sent = time.perf_counter()
+                try:
+                    reply = send(message)
+                except Exception as e:
+                    error = error_kind(e)
+                    records.append({"user": user, "turn": index + 1, "start": sent - start,
+                                    "latency": time.perf_counter() - sent, "ok": False, "error": error})
+                    break
+                records.append({"user": user, "turn": index + 1, "start": sent - start,
+                                "latency": time.perf_counter() - sent, "ok": True, "error": None})
+                turns.append((message, reply))
+            with lock:
+                requests_log.extend(records)
+                conversations.append({"user": user, "script_id": script["id"], "intention": script["intention"],
+                                      "turns": turns, "error": error,
+                                      "completed": error is None and len(turns) == len(script["user_turns"])})
+
+    threads = [threading.Thread(target=virtual_user, args=(user,), name=f"virtual-user-{user}", daemon=True)
+               for user in range(users)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return {"requests": requests_log, "conversations": conversations, "elapsed": time.perf_counter() - start,
+            "users": users, "ramp_up_seconds": ramp_up_seconds}
+
+
+def _request_stats(records: List[Dict]) -> Dict:
+    errors = sum(1 for record in records if not record["ok"])
+    return {
+        "requests": len(records),
+        "errors": errors,
+        "error_rate": errors / len(records) if records else None,
+        "latency": percentiles([record["latency"] for record in records if record["ok"]]),
+    }
+
+
+def summarize_load(run: Dict) -> Dict:
+    """
+    Throughput, error rate and latency percentiles of a load run, overall and per turn index. Latency
+    percentiles cover successful requests only.
+    Args:
+        run (dict): Result of run_load.
+    Returns:
+        dict: {"overall": stats plus requests_per_second, steady_requests_per_second (after ramp-up) and
+            conversations_per_second, "per_turn": turn index -> stats, "errors_by_kind": label -> count,
+            "conversations": started/completed/failed/abandoned counts}
+    """
+    records, conversations, elapsed = run["requests"], run["conversations"], run["elapsed"] or 1.0
+    overall = _request_stats(records)
+    steady = [record for record in records if record["start"] >= run["ramp_up_seconds"]]
+    steady_seconds = elapsed - run["ramp_up_seconds"]
+    completed = sum(1 for convo in conversations if convo["completed"])
+    overall.update({
+        "requests_per_second": len(records) / elapsed,
+        "steady_requests_per_second": len(steady) / steady_seconds if steady_seconds > 0 else None,
+        "conversations_per_second": completed / elapsed,
+    })
+    by_turn: Dict[int, List[Dict]] = {}
+    for record in records:
+        by_turn.setdefault(record["turn"], []).append(record)
+    errors_by_kind: Dict[str, int] = {}
+    for record in records:
+        if not record["ok"]:
+            errors_by_kind[record["error"]] = errors_by_kind.get(record["error"], 0) + 1
+    failed = sum(1 for convo in conversations if convo["error"])
+    return {
+        "overall": overall,
+        "per_turn": {turn: _request_stats(by_turn[turn]) for turn in sorted(by_turn)},
+        "errors_by_kind": errors_by_kind,
+        "conversations": {"started": len(conversations), "completed": completed, "failed": failed,
+                          "abandoned": len(conversations) - completed - failed},
+    }
+
+
+def sample_for_evaluation(run: Dict, rate: float, seed: int = 0) -> TranscriptStore:
+    """
+    A random sample of the completed conversations of a load run, as a store for ConversationEvaluator.
+    Conversations are keyed "load-<n>-<script id>".
+    Args:
+        run (dict): Result of run_load.
+        rate (float): Fraction of completed conversations to sample.
+        seed (int): Sampling seed.
+    """
+    completed = [convo for convo in run["conversations"] if convo["completed"]]
+    sample_size = round(len(completed) * rate)
+    store = TranscriptStore()
+    for n, convo in enumerate(random.Random(seed).sample(completed, sample_size)):
+        turns = []
+        for message, reply in convo["turns"]:
+            turns.extend([(USER, message, None, None), (ASSISTANT, reply, None, None)])
+        store.add(f"load-{n}-{convo['script_id']}", turns)
+    return store
@@ -1,7 +1,7 @@
 import csv
 import os
 from typing import List
-from .drive_client import GoogleDriveClient
+
 class EvaluationReporter:
     """
     Handles reporting of evaluation results, including CSV generation and (future) Google Drive upload.
@@ -31,12 +31,14 @@ class EvaluationReporter:
     @staticmethod
     def write_evaluation_results_to_csv(results: object, filename: str):
         """
-        Write evaluation results to a CSV file.
+        Write evaluation results to a CSV file. The judge_tier column is only written for cascade runs
+        (results carrying judge_tiers), so other runs keep the usual layout.
         Args:
             results (object): Evaluation results object.
             filename (str): Name of the CSV file to write to.
         """
         os.makedirs(os.path.dirname(filename), exist_ok=True)
+        cascade = any((result.additional_metadata or {}).get('judge_tiers') for result in results.test_results)
         headers = [
             'convo_url',
             'overall_success',
@@ -45,13 +47,18 @@ class EvaluationReporter:
             'reason',
             'evaluation_cost',
             'retrieval_context',
+        ] + (['judge_tier'] if cascade else []) + [
+            'evaluated_turns',
         ]
         with open(filename, 'w', newline='') as csvfile:
             writer = csv.writer(csvfile)
             writer.writerow(headers)
             for test_result in results.test_results:
+                metadata = test_result.additional_metadata or {}
+                # Which judge tier decided each metric (cascade runs only)
+                judge_tiers = metadata.get('judge_tiers') or {}
                 for i, metric_data in enumerate(test_result.metrics_data):
-                    convo_id = test_result.additional_metadata.get('convo_id') if test_result.additional_metadata else None
+                    convo_id = metadata.get('convo_id')
                     writer.writerow([
                         f"https://gametime.kustomerapp.com/app/conversations/{convo_id}",
                         metric_data.success,
@@ -60,24 +67,37 @@ class EvaluationReporter:
                         metric_data.reason,
                         metric_data.evaluation_cost,
                         test_result.retrieval_context,
+                    ] + ([judge_tiers.get(metric_data.name, '')] if cascade else []) + [
+                        # 1-based range of the turns judged as new; empty when the whole conversation was judged
+                        metadata.get('evaluated_turns', ''),
                     ])
                     # Add blank row after every 2 metric data rows
                     if i % 2 == 1:
                         writer.writerow([])
 
     @staticmethod
-    def upload_to_google_drive(filepath: str, folder_id: str) -> str:
+    def upload_to_google_drive(filepath: str, folder_id: str, cassette=None) -> str:
         """
         Upload a file to Google Drive.
         Args:
             filepath (str): Path to the file to upload.
             folder_id (str): ID of the Google Drive folder to upload to.
+            cassette (Cassette, optional): Record the upload to, or replay it from, this cassette.
+                A replayed upload never contacts Drive.
         Returns:
             str: ID of the uploaded file in Google Drive
         """
-        credentials = os.getenv('GOOGLE_DRIVE_CREDENTIALS')
-        if not credentials:
-            raise ValueError("GOOGLE_DRIVE_CREDENTIALS environment variable not set")
-            
-        drive_client = GoogleDriveClient(credentials)
-        return drive_client.upload_file(filepath, folder_id) 
\ No newline at end of file
+        def live():
+            credentials = os.getenv('GOOGLE_DRIVE_CREDENTIALS')
+            if not credentials:
+                raise ValueError("GOOGLE_DRIVE_CREDENTIALS environment variable not set")
+
+            # Imported here so the Google API client is only loaded when an upload actually happens
+            from .drive_client import GoogleDriveClient
+            drive_client = GoogleDriveClient(credentials)
+            return drive_client.upload_file(filepath, folder_id)
+
+        if cassette is None:
+            return live()
+        request = {"folder_id": folder_id, "name": os.path.basename(filepath)}
+        return cassette.call("drive", request, live)
@@ -0,0 +1,197 @@
+import csv
+import math
+import os
+import re
+import time
+from typing import Dict, List, Optional, Sequence, Tuple
+from .transcript_store import ASSISTANT, ROLES, USER, TranscriptStore
+
+# Risk signals found in a conversation's text, with their weights. Keywords match whole words only ("card" not
+# in "discard", "paid" not in "prepaid"), so each inflection that should count is listed
+RISK_KEYWORDS: Dict[str, Tuple[str, ...]] = {
+    "payment": ("payment", "payments", "charged", "charge", "charges", "card", "cards", "billing", "billed",
+                "declined", "bank", "paid"),
+    "refund": ("refund", "refunds", "refunded", "money back", "reimburse", "reimbursed", "reimbursement",
+               "chargeback", "cancel", "canceled", "cancelled", "cancellation"),
+    "delivery": ("deliver", "delivered", "delivery", "transfer", "transferred", "transfers", "haven't received",
+                 "have not received", "didn't receive", "where are my tickets", "can't find my tickets",
+                 "missing tickets"),
+}
+KEYWORD_PATTERNS = {group: re.compile(r"\b(?:" + "|".join(re.escape(keyword) for keyword in keywords) + r")\b")
+                    for group, keywords in RISK_KEYWORDS.items()}
+KEYWORD_WEIGHTS = {"payment": 3.0, "refund": 3.0, "delivery": 2.0}
+# The bot hands the customer to a human agent with this marker
+ROUTE_TO_AGENT_MARKER = "@routeCustomerToAgent"
+HANDOFF_WEIGHT = 4.0
+# Phone numbers or verification codes typed by the customer mean the account flow was exercised
+PHONE_PATTERN = re.compile(r"(?<!\d)(?:\+?1[\s.-]?)?\(?\d{3}\)?[\s.-]?\d{3}[\s.-]?\d{4}(?!\d)")
+CODE_PATTERN = re.compile(r"(?<![\d-])\d{5,8}(?![\d-])|\b(?=[A-Z0-9]*\d)(?=[A-Z0-9]*[A-Z])[A-Z0-9]{8,12}\b")
+PHONE_WEIGHT = 2.0
+CODE_WEIGHT = 1.5
+# Longer conversations are riskier, with diminishing returns: log2(1 + turns) times this weight
+LENGTH_WEIGHT = 1.0
+
+# Size of the first batch under a deadline, which runs before there is any timing to size batches from
+DEADLINE_PROBE_BATCH_SIZE = 25
+# Projected batch time is padded by this factor before checking it fits in what is left of the deadline
+DEADLINE_SAFETY_FACTOR = 1.25
+
+SIGNALS = tuple(RISK_KEYWORDS) + ("handoff", "phone", "code")
+
+
+def risk_signals(turns: Sequence) -> Dict[str, int]:
+    """
+    Count the risk signals in a conversation: keyword groups over all turns, agent hand-offs in bot turns, and
+    phone numbers or codes in customer turns.
+    Args:
+        turns (sequence): TurnRecords of the conversation.
+    Returns:
+        dict: Signal name -> number of turns it appeared in (signals that never appear are left out).
+    """
+    counts: Dict[str, int] = {}
+    for turn in turns:
+        text = turn.content
+        lowered = text.lower()
+        for group, pattern in KEYWORD_PATTERNS.items():
+            if pattern.search(lowered):
+                counts[group] = counts.get(group, 0) + 1
+        if turn.role == ROLES[ASSISTANT] and ROUTE_TO_AGENT_MARKER in text:
+            counts["handoff"] = counts.get("handoff", 0) + 1
+        if turn.role == ROLES[USER]:
+            phone = PHONE_PATTERN.search(text)
+            if phone:
+                counts["phone"] = counts.get("phone", 0) + 1
+            # A phone number's digits are not also counted as a code
+            if CODE_PATTERN.search(PHONE_PATTERN.sub(" ", text)):
+                counts["code"] = counts.get("code", 0) + 1
+    return counts
+
+
+def risk_score(turns: Sequence) -> Tuple[float, Dict[str, int]]:
+    """
+    Cheap risk score of a conversation from its transcript alone; higher means it matters more that it gets
+    judged. Each signal counts once however often it appears, plus the log-scaled conversation length.
+    Returns:
+        tuple: (score, risk_signals result)
+    """
+    signals = risk_signals(turns)
+    score = sum(KEYWORD_WEIGHTS[group] for group in RISK_KEYWORDS if group in signals)
+    score += HANDOFF_WEIGHT * ("handoff" in signals) + PHONE_WEIGHT * ("phone" in signals)
+    score += CODE_WEIGHT * ("code" in signals) + LENGTH_WEIGHT * math.log2(1 + len(turns))
+    return score, signals
+
+
+def prioritize(store: TranscriptStore, indices: Optional[Sequence[int]] = None) -> List[Dict]:
+    """
+    Rank conversations riskiest first. Ties keep the store order.
+    Args:
+        store (TranscriptStore): The conversations to evaluate.
+        indices (sequence, optional): Positions in the store to rank. Defaults to every conversation.
+    Returns:
+        list: One dict per conversation (index, convo_id, score, signals, turns), riskiest first.
+    """
+    ranked = []
+    for index in range(len(store)) if indices is None else indices:
+        turns = store.turns(index)
+        score, signals = risk_score(turns)
+        ranked.append({"index": index, "convo_id": store.convo_ids[index], "score": score, "signals": signals,
+                       "turns": len(turns)})
+    ranked.sort(key=lambda entry: -entry["score"])
+    return ranked
+
+
+class Deadline:
+    """
+    Wall-clock limit for a run, checked between evaluation batches. After a small probe batch, each batch is
+    sized to what is projected to finish in time, from the slowest seconds per conversation seen so far, so
+    a run needs few batches (each its own deepeval evaluate() call) yet its last one ends before the deadline.
+    Batches are not interrupted, so the probe batch (with no timing yet) always runs.
+    """
+
+    def __init__(self, seconds: float, started_at: Optional[float] = None):
+        """
+        Args:
+            seconds (float): Length of the run.
+            started_at (float, optional): time.monotonic() the run started at, e.g. before fetching. Defaults to now.
+        """
+        self.seconds = seconds
+        self.started_at = time.monotonic() if started_at is None else started_at
+        self.stopped = False
+        self.unreached: List[int] = []
+        self._rate: Optional[float] = None
+
+    @property
+    def remaining(self) -> float:
+        return self.seconds - (time.monotonic() - self.started_at)
+
+    def seconds_per_conversation(self) -> Optional[float]:
+        """
+        Slowest seconds per conversation of the batches so far. Small batches judge fewer conversations at
+        once and so take longer per conversation; the slowest rate keeps a short last batch from overrunning.
+        """
+        return self._rate
+
+    def batch_size(self, limit: int) -> int:
+        """
+        Conversations the next batch may hold: at most limit, and only as many as are projected to finish
+        before the deadline. 0 means the run should stop.
+        """
+        if self.remaining <= 0:
+            return 0
+        if self._rate is None:
+            return min(limit, DEADLINE_PROBE_BATCH_SIZE)
+        return min(limit, int(self.remaining / (self._rate * DEADLINE_SAFETY_FACTOR)))
+
+    def record_batch(self, conversations: int, seconds: float):
+        rate = seconds / conversations
+        self._rate = rate if self._rate is None else max(self._rate, rate)
+
+
+def coverage_report(ranked: List[Dict], evaluated: Sequence[str], unreached: Sequence[int]) -> Dict:
+    """
+    What a prioritized run covered: per conversation whether it was judged, and totals by signal.
+    Args:
+        ranked (list): prioritize result.
+        evaluated (sequence): Convo IDs with results.
+        unreached (sequence): Store positions the deadline left unevaluated.
+    Returns:
+        dict: {"rows": per conversation in rank order, "conversations", "evaluated", "risk_covered" (share of
+            the total risk score judged), "by_signal": signal -> (evaluated, total), "top_missed": highest
+            ranked conversations not judged}
+    """
+    evaluated, unreached = set(evaluated), set(unreached)
+    rows, by_signal = [], {signal: [0, 0] for signal in SIGNALS}
+    total_risk = covered_risk = 0.0
+    for rank, entry in enumerate(ranked, 1):
+        if entry["convo_id"] in evaluated:
+            status = "evaluated"
+        elif entry["index"] in unreached:
+            status = "deadline"
+        else:
+            status = "skipped"
+        rows.append({**entry, "rank": rank, "status": status})
+        total_risk += entry["score"]
+        if status == "evaluated":
+            covered_risk += entry["score"]
+        for signal in entry["signals"]:
+            by_signal[signal][1] += 1
+            by_signal[signal][0] += status == "evaluated"
+    return {
+        "rows": rows,
+        "conversations": len(rows),
+        "evaluated": sum(1 for row in rows if row["status"] == "evaluated"),
+        "risk_covered": covered_risk / total_risk if total_risk else None,
+        "by_signal": {signal: tuple(counts) for signal, counts in by_signal.items() if counts[1]},
+        "top_missed": [row for row in rows if row["status"] != "evaluated"][:10],
+    }
+
+
+def write_coverage_csv(report: Dict, path: str):
+    if os.path.dirname(path):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'w', newline='') as csvfile:
+        writer = csv.writer(csvfile)
+        writer.writerow(['rank', 'convo_id', 'risk_score', 'status', 'turns'] + list(SIGNALS))
+        for row in report["rows"]:
+            writer.writerow([row["rank"], row["convo_id"], f"{row['score']:.2f}", row["status"], row["turns"]]
+                            + [row["signals"].get(signal, 0) for signal in SIGNALS])
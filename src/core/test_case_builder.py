@@ -1,7 +1,22 @@
-from deepeval.test_case import ConversationalTestCase
-from deepeval.test_case.conversational_test_case import Turn
-from typing import List, Dict
-import pprint
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Tuple, Union, TYPE_CHECKING
+from .transcript_store import ASSISTANT, ROLES, USER, TranscriptStore
+
+if TYPE_CHECKING:
+    from deepeval.test_case import ConversationalTestCase
+
+# Attribute holding the full message text, falling back to Kustomer's truncated preview
+BODY_FIELDS = ("body", "preview")
+
+
+def _parse_timestamp(value: Optional[str]) -> Optional[float]:
+    if not value:
+        return None
+    try:
+        return datetime.fromisoformat(value).timestamp()
+    except ValueError:
+        return None
+
 
 class TestCaseBuilder:
     """
@@ -36,7 +51,94 @@ class TestCaseBuilder:
         return transcript
 
     @staticmethod
-    def build_conversation_test_case(transcript_data: List[Dict], convo_id: str) -> ConversationalTestCase:
+    def kustomer_payloads_to_store(payloads: Union[Dict[str, List[Dict]], Iterable[Tuple[str, List[Dict]]]],
+                                   store: Optional[TranscriptStore] = None) -> TranscriptStore:
+        """
+        Convert a batch of Kustomer message payloads into a TranscriptStore in a single pass.
+
+        Unlike kustomer_messages_to_transcript, no message is dropped: messages are ordered by send time,
+        consecutive messages in the same direction (multi-part bot replies, users typing several lines)
+        are merged into one turn, a leading bot greeting or trailing user message is kept as its own turn
+        (build_test_case_from_turns leaves the greeting out of what the judge sees),
+        and the full message body is used instead of the truncated preview. Messages that are neither
+        inbound nor outbound (e.g. internal notes) or have no text are skipped.
+
+        Args:
+            payloads: {convo_id: messages} or an iterable of (convo_id, messages), e.g. a generator that
+                fetches each conversation lazily so raw payloads are released as they are consumed.
+            store (TranscriptStore, optional): Store to append to. A new one is created if omitted.
+        Returns:
+            TranscriptStore: The store with one entry per conversation that had at least one turn.
+        """
+        store = store if store is not None else TranscriptStore()
+        items = payloads.items() if isinstance(payloads, dict) else payloads
+        parse_timestamp = _parse_timestamp
+        body_field, preview_field = BODY_FIELDS
+        for convo_id, messages in items:
+            rows = []
+            ordered = True
+            last_stamp = ""
+            for msg in messages or ():
+                attrs = msg.get("attributes") or {}
+                direction = attrs.get("direction")
+                if direction == "in":
+                    role = USER
+                elif direction == "out":
+                    role = ASSISTANT
+                else:
+                    continue
+                text = attrs.get(body_field) or attrs.get(preview_field)
+                if not text:
+                    continue
+                stamp = attrs.get("sentAt") or attrs.get("createdAt") or ""
+                if stamp < last_stamp:
+                    ordered = False
+                last_stamp = stamp
+                relationships = msg.get("relationships") or {}
+                sender = ((relationships.get("createdBy") or relationships.get("customer") or {}).get("data") or {}).get("id")
+                rows.append((stamp, role, text, sender))
+            if not rows:
+                continue
+            if not ordered:
+                rows.sort(key=lambda row: row[0])
+
+            turns = []
+            stamp, role, text, sender = rows[0]
+            parts = [text]
+            for next_stamp, next_role, next_text, next_sender in rows[1:]:
+                if next_role == role:
+                    parts.append(next_text)
+                    continue
+                turns.append((role, parts[0] if len(parts) == 1 else "\n".join(parts), parse_timestamp(stamp), sender))
+                stamp, role, sender, parts = next_stamp, next_role, next_sender, [next_text]
+            turns.append((role, parts[0] if len(parts) == 1 else "\n".join(parts), parse_timestamp(stamp), sender))
+            store.add(convo_id, turns)
+        return store
+
+    @staticmethod
+    def message_cursor(message_data: List[Dict]) -> Tuple[Optional[str], int]:
+        """
+        Identify how far a Kustomer conversation has progressed: the ID of its latest inbound or outbound
+        message with text, and the number of such messages (the messages kustomer_payloads_to_store keeps).
+        Args:
+            message_data (list): List of message dicts from Kustomer.
+        Returns:
+            tuple: (last message ID or None, message count)
+        """
+        body_field, preview_field = BODY_FIELDS
+        last_id, last_stamp, count = None, None, 0
+        for msg in message_data or ():
+            attrs = msg.get("attributes") or {}
+            if attrs.get("direction") not in ("in", "out") or not (attrs.get(body_field) or attrs.get(preview_field)):
+                continue
+            count += 1
+            stamp = attrs.get("sentAt") or attrs.get("createdAt") or ""
+            if last_stamp is None or stamp >= last_stamp:
+                last_id, last_stamp = msg.get("id"), stamp
+        return last_id, count
+
+    @staticmethod
+    def build_conversation_test_case(transcript_data: List[Dict], convo_id: str) -> "ConversationalTestCase":
         """
         Build a ConversationalTestCase from transcript data.
         Args:
@@ -45,6 +147,9 @@ class TestCaseBuilder:
         Returns:
             ConversationalTestCase: The constructed test case.
         """
+        from deepeval.test_case import ConversationalTestCase
+        from deepeval.test_case.conversational_test_case import Turn
+
         turns = []
         for turn in transcript_data:
             user_turn = Turn(
@@ -66,6 +171,51 @@ class TestCaseBuilder:
         )
         return convo_test_case
 
+    @staticmethod
+    def build_test_case_from_turns(turn_records: List, convo_id: str) -> "ConversationalTestCase":
+        """
+        Build a ConversationalTestCase from stored turn records, e.g. from a TranscriptStore.
+        The metrics read turns as a customer message followed by a chatbot response, so bot turns before the
+        first customer message (a greeting, or a context window starting on a reply) are left out. Conversations
+        with no customer message are kept whole.
+        Args:
+            turn_records (list): Objects with 'role' ("user"/"assistant") and 'content' attributes.
+            convo_id (str): The conversation ID.
+        Returns:
+            ConversationalTestCase: The constructed test case.
+        """
+        from deepeval.test_case import ConversationalTestCase
+        from deepeval.test_case.conversational_test_case import Turn
+
+        first_user = next((i for i, record in enumerate(turn_records) if record.role == ROLES[USER]), 0)
+        return ConversationalTestCase(
+            chatbot_role="Gametime Support Agent",
+            turns=[Turn(role=record.role, content=record.content) for record in turn_records[first_user:]],
+            additional_metadata={
+                "convo_id": convo_id
+            }
+        )
+
+    @staticmethod
+    def conversation_exchanges(test_case) -> List[Tuple[str, str]]:
+        """
+        (user message, chatbot reply) pairs of a conversational test case. Handles both role/content turns
+        and older deepeval turns that are LLMTestCases with input/actual_output.
+        Args:
+            test_case (ConversationalTestCase): The conversation, e.g. from deepeval's ConversationSimulator.
+        Returns:
+            list: (user, assistant) tuples; a trailing user message gets an empty reply.
+        """
+        exchanges = []
+        for turn in test_case.turns:
+            if hasattr(turn, "input"):
+                exchanges.append((turn.input, turn.actual_output or ""))
+            elif turn.role == ROLES[USER]:
+                exchanges.append((turn.content, ""))
+            elif exchanges and not exchanges[-1][1]:
+                exchanges[-1] = (exchanges[-1][0], turn.content)
+        return exchanges
+
     @staticmethod
     def parse_simulated_conversations_csv(csv_path: str) -> list:
         """
@@ -0,0 +1,133 @@
+import sys
+import math
+from array import array
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+USER = 0
+ASSISTANT = 1
+ROLES = ("user", "assistant")
+
+# User messages at or under this length ("yes", "thanks", phone prompts) repeat often enough to intern
+INTERN_USER_MAX_CHARS = 64
+
+
+class TurnRecord:
+    """
+    A single read-only view of a stored turn. sent_at is epoch seconds (None when unknown).
+    """
+
+    __slots__ = ("role", "content", "sent_at", "sender")
+
+    def __init__(self, role: str, content: str, sent_at: Optional[float] = None, sender: Optional[str] = None):
+        self.role = role
+        self.content = content
+        self.sent_at = sent_at
+        self.sender = sender
+
+    def __repr__(self):
+        return f"TurnRecord(role={self.role!r}, content={self.content[:40]!r})"
+
+
+class TranscriptStore:
+    """
+    Compact, column-oriented store of conversation transcripts.
+
+    Turns for every conversation live in flat parallel columns: roles in a byte array, send times in a
+    double array, per-conversation start offsets in an unsigned array, and contents and senders in plain
+    lists. Sender IDs, bot replies and short user replies are interned, so boilerplate such as
+    verification prompts is stored once no matter how many conversations repeat it. ConversationalTestCase
+    objects are built from the store only when a batch is about to be evaluated.
+    """
+
+    def __init__(self):
+        self.convo_ids: List[str] = []
+        self._offsets = array("L", [0])
+        self._roles = array("b")
+        self._sent_at = array("d")
+        self._contents: List[str] = []
+        self._senders: List[Optional[str]] = []
+
+    def __len__(self) -> int:
+        return len(self.convo_ids)
+
+    @property
+    def num_turns(self) -> int:
+        return len(self._roles)
+
+    def add(self, convo_id: str, turns: Iterable[Sequence]) -> int:
+        """
+        Append a conversation.
+        Args:
+            convo_id (str): The conversation ID.
+            turns (iterable): (role, content) or (role, content, sent_at, sender) tuples, where role is
+                USER or ASSISTANT, sent_at is epoch seconds or None and sender is an ID or None.
+        Returns:
+            int: Number of turns stored for the conversation.
+        """
+        roles = self._roles
+        contents = self._contents
+        sent_ats = self._sent_at
+        senders = self._senders
+        start = len(roles)
+        for turn in turns:
+            role, content = turn[0], turn[1]
+            sent_at, sender = (turn[2], turn[3]) if len(turn) > 2 else (None, None)
+            if role == ASSISTANT or len(content) <= INTERN_USER_MAX_CHARS:
+                content = sys.intern(content)
+            roles.append(role)
+            contents.append(content)
+            sent_ats.append(math.nan if sent_at is None else sent_at)
+            senders.append(sys.intern(sender) if sender else None)
+        self.convo_ids.append(convo_id)
+        self._offsets.append(len(roles))
+        return len(roles) - start
+
+    def add_transcript(self, convo_id: str, transcript_data: List[Dict]) -> int:
+        """
+        Append a conversation given as input/actual_output pairs (the TestCaseBuilder transcript format).
+        """
+        return self.add(convo_id, self._pairs_to_turns(transcript_data))
+
+    @staticmethod
+    def _pairs_to_turns(transcript_data: List[Dict]) -> Iterator[Tuple[int, str]]:
+        for turn in transcript_data:
+            yield USER, turn["input"]
+            yield ASSISTANT, turn["actual_output"]
+
+    def turns(self, index: int) -> List[TurnRecord]:
+        """
+        Return the turns of the conversation at position index.
+        """
+        start, end = self._offsets[index], self._offsets[index + 1]
+        return [
+            TurnRecord(
+                ROLES[self._roles[i]],
+                self._contents[i],
+                None if math.isnan(self._sent_at[i]) else self._sent_at[i],
+                self._senders[i],
+            )
+            for i in range(start, end)
+        ]
+
+    def __iter__(self) -> Iterator[Tuple[str, List[TurnRecord]]]:
+        for index, convo_id in enumerate(self.convo_ids):
+            yield convo_id, self.turns(index)
+
+    def iter_batches(self, batch_size: int,
+                     indices: Optional[Sequence[int]] = None) -> Iterator[List[Tuple[str, List[TurnRecord]]]]:
+        """
+        Yield conversations in batches of at most batch_size (convo_id, turns) pairs.
+        Args:
+            batch_size (int): Maximum conversations per batch.
+            indices (sequence, optional): Store positions to include, in the order given. Defaults to all.
+        """
+        if indices is None:
+            indices = range(len(self.convo_ids))
+        for batch_start in range(0, len(indices), batch_size):
+            yield [(self.convo_ids[i], self.turns(i)) for i in indices[batch_start:batch_start + batch_size]]
+
+    def unique_contents(self) -> int:
+        """
+        Number of distinct content strings actually held in memory.
+        """
+        return len({id(content) for content in self._contents})
@@ -0,0 +1,359 @@
+import csv
+import json
+import math
+import os
+import re
+import sqlite3
+from datetime import date, datetime, timedelta
+from typing import Dict, Iterable, List, Optional
+from .evaluator import metric_key
+
+DEFAULT_INDEX_PATH = "deepeval_results/trend_index.sqlite3"
+
+HISTOGRAM_BUCKETS = 10
+
+# Where a run's rows came from. Trends and baselines only compare runs of the same source, so a backfill that
+# re-scores past days does not add to (or stand in for) the nightly runs of those days. Multi-target runs judge a
+# different mix of conversations and metrics per target, so they trend separately too. A nightly run cut short by
+# its deadline or budget judged only the riskiest conversations; it is kept apart as partial and never checked
+# for regressions, since no baseline is comparable with a biased subset
+NIGHTLY_SOURCE = "nightly"
+PARTIAL_SOURCE = "nightly-partial"
+BACKFILL_SOURCE = "backfill"
+MULTI_TARGET_SOURCE = "targets"
+SOURCES = [NIGHTLY_SOURCE, PARTIAL_SOURCE, BACKFILL_SOURCE, MULTI_TARGET_SOURCE]
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS metric_runs (
+    run_id TEXT NOT NULL,
+    run_at TEXT NOT NULL,
+    run_date TEXT NOT NULL,
+    metric TEXT NOT NULL,
+    num_cases INTEGER NOT NULL,
+    num_passed INTEGER NOT NULL,
+    num_errors INTEGER NOT NULL,
+    score_mean REAL,
+    score_std REAL,
+    score_p10 REAL,
+    score_p50 REAL,
+    score_p90 REAL,
+    score_histogram TEXT NOT NULL,
+    cost REAL NOT NULL,
+    source TEXT NOT NULL DEFAULT 'nightly',
+    PRIMARY KEY (run_id, metric)
+);
+CREATE INDEX IF NOT EXISTS metric_runs_by_date ON metric_runs (metric, run_date);
+"""
+
+
+def traffic_date(run_at: datetime) -> date:
+    """Day of traffic a run covers: runs score the previous day's conversations."""
+    return (run_at - timedelta(days=1)).date()
+
+
+def _quantile(sorted_values: List[float], q: float) -> Optional[float]:
+    if not sorted_values:
+        return None
+    position = (len(sorted_values) - 1) * q
+    lower = math.floor(position)
+    upper = math.ceil(position)
+    return sorted_values[lower] + (sorted_values[upper] - sorted_values[lower]) * (position - lower)
+
+
+def _normal_sf(z: float) -> float:
+    """Upper-tail probability of the standard normal distribution."""
+    return 0.5 * math.erfc(z / math.sqrt(2))
+
+
+def aggregate_metric_rows(rows: Iterable[Dict]) -> Dict[str, Dict]:
+    """
+    Aggregate per-conversation metric rows into per-metric run statistics.
+    Args:
+        rows (iterable): Dicts with 'metric', 'success' (bool), 'score' (float or None) and 'cost' (float or None).
+    Returns:
+        dict: metric name -> aggregate dict (counts, score distribution, cost).
+    """
+    grouped: Dict[str, Dict] = {}
+    for row in rows:
+        bucket = grouped.setdefault(row["metric"], {"scores": [], "passed": 0, "errors": 0, "cases": 0, "cost": 0.0})
+        bucket["cases"] += 1
+        bucket["passed"] += 1 if row["success"] else 0
+        bucket["cost"] += row["cost"] or 0.0
+        if row["score"] is None:
+            bucket["errors"] += 1
+        else:
+            bucket["scores"].append(float(row["score"]))
+
+    aggregates = {}
+    for metric, bucket in grouped.items():
+        scores = sorted(bucket["scores"])
+        mean = sum(scores) / len(scores) if scores else None
+        std = None
+        if len(scores) > 1:
+            std = math.sqrt(sum((s - mean) ** 2 for s in scores) / (len(scores) - 1))
+        histogram = [0] * HISTOGRAM_BUCKETS
+        for score in scores:
+            histogram[min(int(score * HISTOGRAM_BUCKETS), HISTOGRAM_BUCKETS - 1)] += 1
+        aggregates[metric] = {
+            "num_cases": bucket["cases"],
+            "num_passed": bucket["passed"],
+            "num_errors": bucket["errors"],
+            "score_mean": mean,
+            "score_std": std,
+            "score_p10": _quantile(scores, 0.1),
+            "score_p50": _quantile(scores, 0.5),
+            "score_p90": _quantile(scores, 0.9),
+            "score_histogram": histogram,
+            "cost": bucket["cost"],
+        }
+    return aggregates
+
+
+class TrendIndex:
+    """
+    Local append-only index of per-run, per-metric aggregates across evaluation runs.
+    Each run adds one row per metric, so trend queries never need to reopen the per-run CSVs.
+    """
+
+    def __init__(self, path: str = DEFAULT_INDEX_PATH):
+        """
+        Open (or create) the index.
+        Args:
+            path (str): Path of the SQLite file backing the index.
+        """
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.path = path
+        self.conn = sqlite3.connect(path)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.executescript(SCHEMA)
+        columns = [row["name"] for row in self.conn.execute("PRAGMA table_info(metric_runs)")]
+        if "source" not in columns:
+            with self.conn:
+                self.conn.execute("ALTER TABLE metric_runs ADD COLUMN source TEXT NOT NULL "
+                                  f"DEFAULT '{NIGHTLY_SOURCE}'")
+        # Older indexes stored deepeval's display names ("Verification (Conversational GEval)"). A display-name row
+        # whose run already has the normalized row is a duplicate, and is dropped once the others are renamed
+        self.conn.create_function("metric_key", 1, metric_key, deterministic=True)
+        with self.conn:
+            self.conn.execute("UPDATE OR IGNORE metric_runs SET metric = metric_key(metric) "
+                              "WHERE metric != metric_key(metric)")
+            self.conn.execute("DELETE FROM metric_runs WHERE metric != metric_key(metric)")
+
+    def close(self):
+        self.conn.close()
+
+    @staticmethod
+    def metric_rows_from_results(results: object, conversation_scores: Optional[Dict[str, Dict]] = None) -> List[Dict]:
+        """
+        Flatten a deepeval evaluation results object into metric rows for aggregation, keyed by metric_key.
+        Args:
+            results: deepeval evaluation results.
+            conversation_scores (dict, optional): convo_id -> running scores (merge_scores) of conversations judged
+                incrementally. Their rows carry the whole conversation's score and success rather than the new
+                segment's, so incremental runs stay comparable with full ones; the cost is still this run's.
+        """
+        conversation_scores = conversation_scores or {}
+        rows = []
+        for test_result in results.test_results:
+            scores = conversation_scores.get((test_result.additional_metadata or {}).get("convo_id")) or {}
+            for metric_data in test_result.metrics_data or []:
+                merged = scores.get(metric_key(metric_data))
+                rows.append({
+                    "metric": metric_key(metric_data),
+                    "success": bool(merged["success"] if merged else metric_data.success),
+                    "score": merged["score"] if merged else metric_data.score,
+                    "cost": metric_data.evaluation_cost,
+                })
+        return rows
+
+    @staticmethod
+    def metric_rows_from_csv(csv_path: str) -> List[Dict]:
+        """
+        Read metric rows back from a CSV written by EvaluationReporter.write_evaluation_results_to_csv.
+        """
+        rows = []
+        with open(csv_path, newline='') as csvfile:
+            for row in csv.DictReader(csvfile):
+                if not row.get("metric_name"):
+                    continue
+                rows.append({
+                    "metric": metric_key(row["metric_name"]),
+                    "success": row["overall_success"] == "True",
+                    "score": float(row["score"]) if row["score"] not in ("", "None") else None,
+                    "cost": float(row["evaluation_cost"]) if row["evaluation_cost"] not in ("", "None") else None,
+                })
+        return rows
+
+    def record_run(self, run_id: str, metric_rows: List[Dict], run_date: Optional[date] = None,
+                   run_at: Optional[datetime] = None, source: str = NIGHTLY_SOURCE) -> Dict[str, Dict]:
+        """
+        Append the aggregates of one run. Re-recording an existing run_id is a no-op.
+        Args:
+            run_id (str): Unique run identifier (the report timestamp).
+            metric_rows (list): Rows from metric_rows_from_results / metric_rows_from_csv.
+            run_date (date, optional): Day of traffic the run covers. Defaults to traffic_date(run_at).
+            run_at (datetime, optional): When the run happened. Defaults to now.
+            source (str): One of SOURCES.
+        Returns:
+            dict: The per-metric aggregates that were recorded.
+        """
+        run_at = run_at or datetime.now()
+        run_date = run_date or traffic_date(run_at)
+        aggregates = aggregate_metric_rows(metric_rows)
+        with self.conn:
+            for metric, agg in aggregates.items():
+                self.conn.execute(
+                    "INSERT OR IGNORE INTO metric_runs VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    (
+                        run_id, run_at.isoformat(timespec="seconds"), run_date.isoformat(), metric,
+                        agg["num_cases"], agg["num_passed"], agg["num_errors"],
+                        agg["score_mean"], agg["score_std"], agg["score_p10"], agg["score_p50"], agg["score_p90"],
+                        json.dumps(agg["score_histogram"]), agg["cost"], source,
+                    ),
+                )
+        return aggregates
+
+    def ingest_csv(self, csv_path: str) -> bool:
+        """
+        Record a historical eval_results_<YYYYmmdd_HHMMSS>.csv file, using the filename timestamp as run id
+        and dating it by traffic_date, like the nightly run that wrote it.
+        Returns:
+            bool: True if the file name carried a timestamp and was ingested.
+        """
+        match = re.search(r"(\d{8}_\d{6})", os.path.basename(csv_path))
+        if not match:
+            return False
+        run_at = datetime.strptime(match.group(1), "%Y%m%d_%H%M%S")
+        self.record_run(match.group(1), self.metric_rows_from_csv(csv_path), run_at=run_at)
+        return True
+
+    def daily_runs(self, metric: str, start: date, end: date, before: Optional[str] = None,
+                   source: str = NIGHTLY_SOURCE) -> List[sqlite3.Row]:
+        """
+        One row per day of traffic between start and end (inclusive): the latest run of the source covering
+        that day, so a re-run of a day replaces the earlier one instead of being counted on top of it.
+        Args:
+            before (str, optional): Only consider runs whose run_at is earlier than this ISO timestamp.
+            source (str): Only consider runs from this source.
+        """
+        where = "metric = ? AND source = ? AND run_date BETWEEN ? AND ?"
+        params = [metric, source, start.isoformat(), end.isoformat()]
+        if before is not None:
+            where, params = where + " AND run_at < ?", params + [before]
+        return self.conn.execute(
+            f"""
+            SELECT * FROM (
+                SELECT *, ROW_NUMBER() OVER (PARTITION BY run_date ORDER BY run_at DESC, run_id DESC) AS day_rank
+                FROM metric_runs WHERE {where}
+            ) WHERE day_rank = 1
+            """,
+            params,
+        ).fetchall()
+
+    def rolling(self, metric: str, days: int = 7, end: Optional[date] = None,
+                source: str = NIGHTLY_SOURCE) -> Optional[Dict]:
+        """
+        Aggregate a metric over the trailing window of days ending at `end` (inclusive), one run per day.
+        Returns:
+            dict: pass_rate, score_mean, cases, runs and cost over the window, or None when there is no data.
+        """
+        end = end or date.today()
+        rows = self.daily_runs(metric_key(metric), end - timedelta(days=days - 1), end, source=source)
+        cases = sum(row["num_cases"] for row in rows)
+        if not cases:
+            return None
+        scored = sum(row["num_cases"] - row["num_errors"] for row in rows if row["score_mean"] is not None)
+        score_sum = sum(row["score_mean"] * (row["num_cases"] - row["num_errors"])
+                        for row in rows if row["score_mean"] is not None)
+        return {
+            "runs": len(rows),
+            "cases": cases,
+            "pass_rate": sum(row["num_passed"] for row in rows) / cases,
+            "score_mean": score_sum / scored if scored else None,
+            "cost": sum(row["cost"] for row in rows),
+        }
+
+    def metrics(self, source: str = NIGHTLY_SOURCE) -> List[str]:
+        return [row["metric"] for row in self.conn.execute(
+            "SELECT DISTINCT metric FROM metric_runs WHERE source = ? ORDER BY metric", (source,))]
+
+    def detect_regressions(self, run_id: str, baseline_days: int = 14, alpha: float = 0.01) -> List[Dict]:
+        """
+        Compare each metric of a run against the trailing baseline of earlier days, one run per day.
+        Pass rate uses a one-sided two-proportion z-test; mean score uses a one-sided Welch z-test built
+        from the stored per-run means and standard deviations. Partial runs are not checked.
+        Args:
+            run_id (str): Run to check.
+            baseline_days (int): Days of earlier runs forming the baseline.
+            alpha (float): Significance level for flagging a regression.
+        Returns:
+            list: One dict per significant regression with metric, statistic, current, baseline and p_value.
+        """
+        regressions = []
+        current_rows = self.conn.execute("SELECT * FROM metric_runs WHERE run_id = ?", (run_id,)).fetchall()
+        for current in current_rows:
+            if current["source"] == PARTIAL_SOURCE:
+                continue
+            run_date = date.fromisoformat(current["run_date"])
+            # Earlier runs over the same day scored the same conversations, so they are not a baseline
+            baseline = self.daily_runs(current["metric"], run_date - timedelta(days=baseline_days),
+                                       run_date - timedelta(days=1), before=current["run_at"],
+                                       source=current["source"])
+            base_cases = sum(row["num_cases"] for row in baseline)
+            if not base_cases or not current["num_cases"]:
+                continue
+
+            # Pass rate: two-proportion z-test
+            p_current = current["num_passed"] / current["num_cases"]
+            p_base = sum(row["num_passed"] for row in baseline) / base_cases
+            pooled = (current["num_passed"] + p_base * base_cases) / (current["num_cases"] + base_cases)
+            se = math.sqrt(pooled * (1 - pooled) * (1 / current["num_cases"] + 1 / base_cases))
+            if se > 0:
+                p_value = _normal_sf((p_base - p_current) / se)
+                if p_value < alpha:
+                    regressions.append({
+                        "metric": current["metric"], "statistic": "pass_rate",
+                        "current": p_current, "baseline": p_base, "p_value": p_value,
+                    })
+
+            # Mean score: Welch z-test on combined baseline moments
+            scored = [(row["num_cases"] - row["num_errors"], row["score_mean"], row["score_std"] or 0.0)
+                      for row in baseline if row["score_mean"] is not None]
+            n_base = sum(n for n, _, _ in scored)
+            n_current = current["num_cases"] - current["num_errors"]
+            if n_base < 2 or n_current < 2 or current["score_mean"] is None:
+                continue
+            mean_base = sum(n * m for n, m, _ in scored) / n_base
+            var_base = sum((n - 1) * s ** 2 + n * (m - mean_base) ** 2 for n, m, s in scored) / (n_base - 1)
+            se = math.sqrt(var_base / n_base + (current["score_std"] or 0.0) ** 2 / n_current)
+            if se > 0:
+                p_value = _normal_sf((mean_base - current["score_mean"]) / se)
+                if p_value < alpha:
+                    regressions.append({
+                        "metric": current["metric"], "statistic": "score_mean",
+                        "current": current["score_mean"], "baseline": mean_base, "p_value": p_value,
+                    })
+        return regressions
+
+    def run_summary(self, run_id: str, rolling_days: int = 7, baseline_days: int = 14) -> List[str]:
+        """
+        Human-readable summary lines for a run: per-metric pass rate, rolling pass rate and regression flags.
+        """
+        lines = []
+        for row in self.conn.execute("SELECT * FROM metric_runs WHERE run_id = ? ORDER BY metric", (run_id,)):
+            window = self.rolling(row["metric"], days=rolling_days, end=date.fromisoformat(row["run_date"]),
+                                  source=row["source"])
+            rolling_text = f"{window['pass_rate']:.1%}" if window else "n/a"
+            lines.append(
+                f"{row['metric']}: pass rate {row['num_passed']}/{row['num_cases']} "
+                f"({row['num_passed'] / row['num_cases']:.1%}), {rolling_days}-day rolling {rolling_text}, "
+                f"cost ${row['cost']:.4f}"
+            )
+        for regression in self.detect_regressions(run_id, baseline_days=baseline_days):
+            lines.append(
+                f"REGRESSION {regression['metric']} {regression['statistic']}: "
+                f"{regression['current']:.3f} vs {baseline_days}-day baseline {regression['baseline']:.3f} "
+                f"(p={regression['p_value']:.4f})"
+            )
+        return lines
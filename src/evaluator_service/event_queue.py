@@ -0,0 +1,133 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, List, Optional
+
+DEFAULT_QUEUE_PATH = "deepeval_results/service/queue.sqlite3"
+
+PENDING = "pending"
+INFLIGHT = "inflight"
+DONE = "done"
+FAILED = "failed"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS events (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    convo_id TEXT NOT NULL,
+    payload TEXT NOT NULL,
+    status TEXT NOT NULL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    received_at REAL NOT NULL,
+    claimed_at REAL,
+    finished_at REAL
+);
+CREATE INDEX IF NOT EXISTS events_by_status ON events (status, id);
+CREATE INDEX IF NOT EXISTS events_by_convo ON events (convo_id, status);
+"""
+
+
+class EventQueue:
+    """
+    Durable FIFO of conversation events in SQLite. Events survive restarts: anything claimed but not finished
+    when the process died is put back on the queue when the queue is opened again. One connection is shared by
+    the HTTP threads and the worker, serialized by a lock.
+    """
+
+    def __init__(self, path: str = DEFAULT_QUEUE_PATH, max_attempts: int = 3):
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.path = path
+        self.max_attempts = max_attempts
+        self._lock = threading.Lock()
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.row_factory = sqlite3.Row
+        # WAL keeps enqueues from waiting on the worker's writes
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.executescript(SCHEMA)
+        with self._lock:
+            self.conn.execute("UPDATE events SET status = ?, claimed_at = NULL WHERE status = ?", (PENDING, INFLIGHT))
+            self.conn.commit()
+
+    def close(self):
+        with self._lock:
+            self.conn.close()
+
+    def enqueue(self, convo_id: str, payload: Dict) -> bool:
+        """
+        Queue an event unless the conversation is already waiting to be scored.
+        Returns:
+            bool: True if the event was queued.
+        """
+        with self._lock:
+            if self.conn.execute("SELECT 1 FROM events WHERE convo_id = ? AND status = ?",
+                                 (convo_id, PENDING)).fetchone():
+                return False
+            self.conn.execute("INSERT INTO events (convo_id, payload, status, received_at) VALUES (?, ?, ?, ?)",
+                              (convo_id, json.dumps(payload), PENDING, time.time()))
+            self.conn.commit()
+        return True
+
+    def claim(self, limit: int) -> List[Dict]:
+        """
+        Mark up to limit of the oldest pending events in flight and return them.
+        """
+        with self._lock:
+            rows = self.conn.execute("SELECT * FROM events WHERE status = ? ORDER BY id LIMIT ?",
+                                     (PENDING, limit)).fetchall()
+            now = time.time()
+            self.conn.executemany("UPDATE events SET status = ?, claimed_at = ?, attempts = attempts + 1 WHERE id = ?",
+                                  [(INFLIGHT, now, row["id"]) for row in rows])
+            self.conn.commit()
+        events = []
+        for row in rows:
+            event = dict(row)
+            event["payload"] = json.loads(event["payload"])
+            events.append(event)
+        return events
+
+    def complete(self, event_ids: List[int]):
+        self._finish(event_ids, DONE)
+
+    def fail(self, event_ids: List[int]):
+        """
+        Put events back on the queue, or mark them failed once they have used up max_attempts.
+        """
+        with self._lock:
+            now = time.time()
+            self.conn.executemany(
+                "UPDATE events SET status = CASE WHEN attempts >= ? THEN ? ELSE ? END, "
+                "claimed_at = NULL, finished_at = ? WHERE id = ?",
+                [(self.max_attempts, FAILED, PENDING, now, event_id) for event_id in event_ids],
+            )
+            self.conn.commit()
+
+    def _finish(self, event_ids: List[int], status: str):
+        with self._lock:
+            now = time.time()
+            self.conn.executemany("UPDATE events SET status = ?, finished_at = ? WHERE id = ?",
+                                  [(status, now, event_id) for event_id in event_ids])
+            self.conn.commit()
+
+    def counts(self) -> Dict[str, int]:
+        """
+        Number of events per status.
+        """
+        with self._lock:
+            rows = self.conn.execute("SELECT status, COUNT(*) AS n FROM events GROUP BY status").fetchall()
+        counts = {PENDING: 0, INFLIGHT: 0, DONE: 0, FAILED: 0}
+        counts.update({row["status"]: row["n"] for row in rows})
+        return counts
+
+    def depth(self) -> int:
+        with self._lock:
+            return self.conn.execute("SELECT COUNT(*) FROM events WHERE status = ?", (PENDING,)).fetchone()[0]
+
+    def oldest_pending_age(self) -> Optional[float]:
+        """
+        Seconds since the oldest pending event arrived, or None when nothing is pending.
+        """
+        with self._lock:
+            row = self.conn.execute("SELECT MIN(received_at) FROM events WHERE status = ?", (PENDING,)).fetchone()
+        return None if row[0] is None else time.time() - row[0]
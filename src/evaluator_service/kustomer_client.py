@@ -1,7 +1,9 @@
 import requests
 import json
-from typing import List, Dict
-from datetime import datetime, timedelta
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Iterable, Iterator, List, Dict, Optional, Tuple
+from datetime import date, datetime, timedelta
 import os
 
 class KustomerClient:
@@ -12,13 +14,19 @@ class KustomerClient:
 
     BASE_URL = "https://api.kustomerapp.com/v1"
 
-    def __init__(self, api_key: str, assigned_user_id: str, queue_id: str):
+    # Parallel message fetches per client; also the size of the shared connection pool
+    DEFAULT_MAX_WORKERS = 8
+
+    def __init__(self, api_key: str, assigned_user_id: str, queue_id: str,
+                 max_workers: int = DEFAULT_MAX_WORKERS, cassette=None):
         """
         Initialize the client with the required API key, assigned user ID, and queue ID.
+        All requests go through one pooled session, so concurrent fetches reuse connections.
+        If a cassette is given, requests are recorded to it or, in replay mode, served from it
+        without touching the network.
         """
         api_key_env = os.getenv('KUSTOMER_API_KEY')
         print(f"KUSTOMER_API_KEY env: {'*' * (len(api_key_env) - 4) + api_key_env[-4:] if api_key_env else 'NOT SET'}")
-        print('api_key', api_key)
         self.api_key = api_key
         self.assigned_user_id = assigned_user_id
         self.queue_id = queue_id
@@ -26,23 +34,49 @@ class KustomerClient:
             "Authorization": f"Bearer {self.api_key}",
             "Content-Type": "application/json"
         }
+        self.max_workers = max_workers
+        self.session = requests.Session()
+        adapter = requests.adapters.HTTPAdapter(pool_connections=1, pool_maxsize=max_workers)
+        self.session.mount("https://", adapter)
+        self.cassette = cassette
 
-    def fetch_yesterdays_conversations(self) -> List[Dict]:
+    def _request_json(self, method: str, url: str, payload: Optional[Dict] = None) -> Dict:
         """
-        Fetch conversations from yesterday using assigned_user_id and queue_id.
+        Send one request and return the decoded JSON body, going through the cassette when one is set.
+        Raises requests.RequestException on failure, including injected replay failures.
+        """
+        def live():
+            response = self.session.request(method, url, headers=self.headers, json=payload)
+            response.raise_for_status()
+            return response.json()
+
+        if self.cassette is None:
+            return live()
+        request = {"method": method, "url": url, "json": payload}
+        return self.cassette.call("kustomer", request, live, error_factory=requests.ConnectionError)
+
+    def _search_conversations(self, date_filters: List[Dict], assigned_user_id: Optional[str],
+                              queue_id: Optional[str], paginate: bool = False) -> List[Dict]:
+        """
+        Run a conversation search with the client's (or overridden) assigned user and queue filters.
+        Raises requests.RequestException on failure.
         Args:
-            limit: Maximum number of conversations to fetch.
+            date_filters: Additional conversation_created_at filter clauses.
+            assigned_user_id: Overrides the client's assigned user for this search.
+            queue_id: Overrides the client's queue for this search.
+            paginate: Follow the response's next links until every page has been read.
         Returns:
             List of conversation metadata dicts.
         """
         search_url = "https://api.kustomerapp.com/v1/customers/search"
-        yesterday = (datetime.now() - timedelta(days=1)).strftime("%Y-%m-%d")
+        assigned_user_id = assigned_user_id or self.assigned_user_id
+        queue_id = queue_id or self.queue_id
         and_filters = []
-        if self.assigned_user_id:
-            and_filters.append({"conversation_assigned_users": {"equals": self.assigned_user_id}})
-        if self.queue_id:
-            and_filters.append({"conversation_queue": {"equals": self.queue_id}})
-        and_filters.append({"conversation_created_at": {"lte": yesterday}})
+        if assigned_user_id:
+            and_filters.append({"conversation_assigned_users": {"equals": assigned_user_id}})
+        if queue_id:
+            and_filters.append({"conversation_queue": {"equals": queue_id}})
+        and_filters.extend(date_filters)
         search_payload = {
             "and": and_filters,
             "or": [],
@@ -51,28 +85,91 @@ class KustomerClient:
             "sort": [{"conversation_created_at": "desc"}],
             "timeZone": "America/Los_Angeles",
         }
+        conversations = []
+        while search_url:
+            body = self._request_json("POST", search_url, search_payload)
+            conversations.extend(body.get('data', []))
+            next_link = (body.get('links') or {}).get('next') if paginate else None
+            search_url = f"https://api.kustomerapp.com{next_link}" if next_link else None
+        return conversations
+
+    def fetch_yesterdays_conversations(self, assigned_user_id: Optional[str] = None,
+                                       queue_id: Optional[str] = None) -> List[Dict]:
+        """
+        Fetch conversations from yesterday using assigned_user_id and queue_id.
+        Args:
+            assigned_user_id: Overrides the client's assigned user for this search.
+            queue_id: Overrides the client's queue for this search.
+        Returns:
+            List of conversation metadata dicts.
+        """
+        yesterday = (datetime.now() - timedelta(days=1)).strftime("%Y-%m-%d")
         try:
-            response = requests.post(search_url, headers=self.headers, json=search_payload)
-            response.raise_for_status()
-            return response.json().get('data', [])
+            return self._search_conversations(
+                [{"conversation_created_at": {"lte": yesterday}}], assigned_user_id, queue_id
+            )
         except requests.RequestException as e:
             print(f"Error making request to Kustomer API: {str(e)}")
             if hasattr(e.response, 'text'):
                 print(f"Response text: {e.response.text}")
             return []
 
-    def fetch_single_conversation(self, convo_id: str) -> Dict:
+    def fetch_conversations_for_date(self, day: date, assigned_user_id: Optional[str] = None,
+                                     queue_id: Optional[str] = None) -> List[Dict]:
+        """
+        Fetch every conversation created on a given day (America/Los_Angeles), following all result pages.
+        Unlike fetch_yesterdays_conversations, errors are raised so callers never mistake a failed
+        search for an empty day.
+        Args:
+            day: The calendar day to fetch.
+            assigned_user_id: Overrides the client's assigned user for this search.
+            queue_id: Overrides the client's queue for this search.
+        Returns:
+            List of conversation metadata dicts.
+        """
+        date_filters = [
+            {"conversation_created_at": {"gte": day.isoformat()}},
+            {"conversation_created_at": {"lt": (day + timedelta(days=1)).isoformat()}},
+        ]
+        return self._search_conversations(date_filters, assigned_user_id, queue_id, paginate=True)
+
+    def fetch_single_conversation(self, convo_id: str, raise_errors: bool = False) -> Dict:
         """
         Fetch the details/messages for a single conversation by ID.
         Args:
             convo_id: The conversation ID to fetch.
+            raise_errors: Raise request errors instead of returning no messages.
         Returns:
             Dict containing the conversation's message data.
         """
         convo_url = f"{self.BASE_URL}/conversations/{convo_id}/messages"
         try:
-            response = requests.get(convo_url, headers=self.headers)
-            response.raise_for_status()
-            return response.json().get('data', [])
+            return self._request_json("GET", convo_url).get('data', [])
         except requests.RequestException:
-            return {} 
\ No newline at end of file
+            if raise_errors:
+                raise
+            return {}
+
+    def fetch_conversations(self, convo_ids: Iterable[str],
+                            raise_errors: bool = False) -> Iterator[Tuple[str, List[Dict]]]:
+        """
+        Fetch messages for many conversations concurrently over the shared session. At most
+        max_workers * 2 fetches are in flight or waiting to be consumed, so only that many payloads are held
+        in memory however many conversations there are.
+        Args:
+            convo_ids: Conversation IDs to fetch.
+            raise_errors: Raise the first failed fetch instead of yielding no messages for it.
+        Returns:
+            Iterator of (convo_id, messages) pairs in the order the IDs were given.
+        """
+        window = self.max_workers * 2
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            pending = deque()
+            for convo_id in convo_ids:
+                pending.append((convo_id, executor.submit(self.fetch_single_conversation, convo_id, raise_errors)))
+                if len(pending) >= window:
+                    convo_id, future = pending.popleft()
+                    yield convo_id, future.result()
+            while pending:
+                convo_id, future = pending.popleft()
+                yield convo_id, future.result()
@@ -0,0 +1,290 @@
+import json
+import logging
+import os
+import threading
+import time
+from collections import deque
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+from core.reporter import EvaluationReporter
+from core.test_case_builder import TestCaseBuilder
+from .event_queue import EventQueue
+
+logger = logging.getLogger(__name__)
+
+WEBHOOK_PATH = "/webhooks/kustomer"
+METRICS_PATH = "/metrics"
+HEALTH_PATH = "/healthz"
+# Shared secret the webhook must send in this header when the service is started with one
+SECRET_HEADER = "X-Webhook-Secret"
+
+DEFAULT_BATCH_SIZE = 20
+DEFAULT_MAX_WAIT_SECONDS = 30.0
+DEFAULT_OUTPUT_DIR = "deepeval_results/service"
+# Scored events kept for latency percentiles
+LATENCY_WINDOW = 1000
+THROUGHPUT_WINDOW_SECONDS = 60.0
+
+
+def closed_conversation_id(event: Dict) -> Optional[str]:
+    """
+    Conversation ID of a Kustomer webhook event reporting a closed conversation, i.e. a conversation object whose
+    status is "done"; None for any other event.
+    """
+    data = event.get("data") or {}
+    if data.get("type") != "conversation" or not data.get("id"):
+        return None
+    if (data.get("attributes") or {}).get("status") != "done":
+        return None
+    return data["id"]
+
+
+def _percentile(sorted_values: List[float], q: float) -> Optional[float]:
+    if not sorted_values:
+        return None
+    return sorted_values[min(len(sorted_values) - 1, int(q * len(sorted_values)))]
+
+
+class ServiceMetrics:
+    """
+    Counters and rolling windows for the metrics endpoint: events received, queued and scored, latency from
+    webhook receipt to score, and recent throughput.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.started_at = time.time()
+        self.counters = {"received": 0, "queued": 0, "duplicates": 0, "ignored": 0, "scored": 0, "failed": 0,
+                         "batches": 0}
+        self._latencies = deque(maxlen=LATENCY_WINDOW)
+        self._scored_at = deque()
+        self.last_batch_seconds = None
+
+    def count(self, name: str, amount: int = 1):
+        with self._lock:
+            self.counters[name] += amount
+
+    def record_batch(self, latencies: List[float], failed: int, seconds: float):
+        now = time.time()
+        with self._lock:
+            self.counters["batches"] += 1
+            self.counters["scored"] += len(latencies)
+            self.counters["failed"] += failed
+            self._latencies.extend(latencies)
+            self._scored_at.extend([now] * len(latencies))
+            self.last_batch_seconds = seconds
+
+    def snapshot(self, queue: EventQueue) -> Dict:
+        now = time.time()
+        with self._lock:
+            while self._scored_at and now - self._scored_at[0] > THROUGHPUT_WINDOW_SECONDS:
+                self._scored_at.popleft()
+            latencies = sorted(self._latencies)
+            recent = len(self._scored_at)
+            counters = dict(self.counters)
+            last_batch_seconds = self.last_batch_seconds
+        uptime = now - self.started_at
+        oldest = queue.oldest_pending_age()
+        return {
+            "queue": {**queue.counts(), "oldest_pending_seconds": oldest},
+            "counters": counters,
+            "latency_to_score_seconds": {
+                "p50": _percentile(latencies, 0.5),
+                "p95": _percentile(latencies, 0.95),
+                "max": latencies[-1] if latencies else None,
+                "window": len(latencies),
+            },
+            "throughput_per_second": {
+                f"last_{int(THROUGHPUT_WINDOW_SECONDS)}s": recent / min(THROUGHPUT_WINDOW_SECONDS, uptime or 1.0),
+                "since_start": counters["scored"] / (uptime or 1.0),
+            },
+            "last_batch_seconds": last_batch_seconds,
+            "uptime_seconds": uptime,
+        }
+
+
+class EvaluationService:
+    """
+    Scores closed conversations shortly after they close. Webhook events are queued durably; a worker thread
+    takes them off the queue in micro-batches, flushing when batch_size events are waiting or the oldest has
+    waited max_wait_seconds, and scores each batch with one ConversationEvaluator call.
+    """
+
+    def __init__(self, queue: EventQueue, evaluator,
+                 fetch_messages: Optional[Callable[[Iterable[str]], Iterator[Tuple[str, List[Dict]]]]] = None,
+                 batch_size: int = DEFAULT_BATCH_SIZE, max_wait_seconds: float = DEFAULT_MAX_WAIT_SECONDS,
+                 output_dir: Optional[str] = DEFAULT_OUTPUT_DIR):
+        """
+        Args:
+            queue (EventQueue): Durable event queue.
+            evaluator (ConversationEvaluator): Scores each batch.
+            fetch_messages (callable, optional): Fetches messages for conversation IDs, e.g.
+                KustomerClient.fetch_conversations. Needed unless every event carries its messages.
+            batch_size (int): Flush as soon as this many events are waiting.
+            max_wait_seconds (float): Flush once the oldest waiting event is this old.
+            output_dir (str, optional): Where each batch's result CSV is written. None skips writing.
+        """
+        self.queue = queue
+        self.evaluator = evaluator
+        self.fetch_messages = fetch_messages
+        self.batch_size = batch_size
+        self.max_wait_seconds = max_wait_seconds
+        self.output_dir = output_dir
+        self.metrics = ServiceMetrics()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._worker = None
+
+    def submit(self, event: Dict) -> Tuple[bool, str]:
+        """
+        Queue a webhook event if it reports a closed conversation.
+        Returns:
+            tuple: (queued, reason)
+        """
+        self.metrics.count("received")
+        convo_id = closed_conversation_id(event)
+        if convo_id is None:
+            self.metrics.count("ignored")
+            return False, "not a closed conversation"
+        if not self.queue.enqueue(convo_id, event):
+            self.metrics.count("duplicates")
+            return False, "already queued"
+        self.metrics.count("queued")
+        if self.queue.depth() >= self.batch_size:
+            self._wake.set()
+        return True, "queued"
+
+    def start(self):
+        self._worker = threading.Thread(target=self._run, name="evaluation-worker", daemon=True)
+        self._worker.start()
+
+    def stop(self, drain: bool = False):
+        """
+        Stop the worker after its current batch. With drain, every pending event is then scored on the calling
+        thread; the worker is joined first, since deepeval cannot run two evaluations at once.
+        """
+        self._stop.set()
+        self._wake.set()
+        if self._worker is not None:
+            self._worker.join()
+        if drain:
+            while self.queue.depth():
+                self.run_once(force=True)
+
+    def _run(self):
+        while not self._stop.is_set():
+            if self.run_once():
+                continue
+            age = self.queue.oldest_pending_age()
+            timeout = self.max_wait_seconds if age is None else max(0.0, self.max_wait_seconds - age)
+            self._wake.wait(timeout=min(timeout, 1.0))
+            self._wake.clear()
+
+    def run_once(self, force: bool = False) -> int:
+        """
+        Score one micro-batch if one is due (or, with force, whatever is pending).
+        Returns:
+            int: Number of events taken off the queue.
+        """
+        depth = self.queue.depth()
+        if not depth:
+            return 0
+        age = self.queue.oldest_pending_age() or 0.0
+        if not force and depth < self.batch_size and age < self.max_wait_seconds:
+            return 0
+        events = self.queue.claim(self.batch_size)
+        if events:
+            self._process(events)
+        return len(events)
+
+    def _messages(self, events: List[Dict]) -> Iterator[Tuple[str, List[Dict]]]:
+        # Events may carry their messages (the fake webhook sender's do); the rest are fetched from Kustomer
+        missing = []
+        for event in events:
+            messages = event["payload"].get("messages")
+            if messages is None:
+                missing.append(event["convo_id"])
+            else:
+                yield event["convo_id"], messages
+        if missing:
+            if self.fetch_messages is None:
+                raise RuntimeError("Events without messages need a Kustomer client to fetch them")
+            yield from self.fetch_messages(missing)
+
+    def _process(self, events: List[Dict]):
+        start = time.perf_counter()
+        ids_by_convo = {}
+        for event in events:
+            ids_by_convo.setdefault(event["convo_id"], []).append(event["id"])
+        try:
+            store = TestCaseBuilder.kustomer_payloads_to_store(self._messages(events))
+            results = self.evaluator.evaluate_store(store) if len(store) else None
+        except Exception:
+            logger.exception(f"Scoring a batch of {len(events)} events failed; they will be retried")
+            self.queue.fail([event["id"] for event in events])
+            self.metrics.record_batch([], len(events), time.perf_counter() - start)
+            return
+
+        scored = set()
+        for test_result in results.test_results if results else []:
+            if not any(metric_data.error for metric_data in test_result.metrics_data or []):
+                scored.add(test_result.additional_metadata["convo_id"])
+        done = [event_id for convo_id in scored for event_id in ids_by_convo[convo_id]]
+        # Conversations without messages or with errored metrics go back on the queue
+        retry = [event["id"] for event in events if event["convo_id"] not in scored]
+        self.queue.complete(done)
+        if retry:
+            self.queue.fail(retry)
+        finished = time.time()
+        latencies = [finished - event["received_at"] for event in events if event["convo_id"] in scored]
+        self.metrics.record_batch(latencies, len(retry), time.perf_counter() - start)
+
+        if results and self.output_dir:
+            timestamp = datetime.now().strftime('%Y%m%d_%H%M%S_%f')
+            EvaluationReporter.write_evaluation_results_to_csv(
+                results, os.path.join(self.output_dir, f"eval_results_{timestamp}.csv")
+            )
+        logger.info(f"Scored {len(scored)} of {len(events)} conversations in {time.perf_counter() - start:.2f}s")
+
+
+def make_server(service: EvaluationService, host: str, port: int, secret: Optional[str] = None) -> ThreadingHTTPServer:
+    """
+    Build the HTTP server: POST WEBHOOK_PATH accepts Kustomer webhook events, GET METRICS_PATH returns the
+    service metrics as JSON and GET HEALTH_PATH answers when the service is up.
+    """
+
+    class WebhookHandler(BaseHTTPRequestHandler):
+        def _reply(self, status: int, body: Dict):
+            data = json.dumps(body).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def do_POST(self):
+            if self.path != WEBHOOK_PATH:
+                return self._reply(404, {"error": "not found"})
+            if secret and self.headers.get(SECRET_HEADER) != secret:
+                return self._reply(401, {"error": "bad secret"})
+            try:
+                event = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+            except ValueError:
+                return self._reply(400, {"error": "body is not JSON"})
+            if not isinstance(event, dict):
+                return self._reply(400, {"error": "body is not a JSON object"})
+            queued, reason = service.submit(event)
+            self._reply(202 if queued else 200, {"queued": queued, "reason": reason})
+
+        def do_GET(self):
+            if self.path == METRICS_PATH:
+                return self._reply(200, service.metrics.snapshot(service.queue))
+            if self.path == HEALTH_PATH:
+                return self._reply(200, {"ok": True})
+            self._reply(404, {"error": "not found"})
+
+        def log_message(self, format, *args):
+            logger.debug(format % args)
+
+    return ThreadingHTTPServer((host, port), WebhookHandler)
@@ -0,0 +1,87 @@
+import pytest
+from deepeval.evaluate import types as evaluate_types
+from deepeval.test_run.api import MetricData
+from core.evaluator import (
+    SMALL_TIER, STRONG_TIER, UNCERTAIN_MARKER, ConversationEvaluator, JudgeConfig, METRIC_DEFINITIONS,
+)
+from core.test_case_builder import TestCaseBuilder
+from core.transcript_store import TurnRecord
+
+
+def metric_data(name, score, reason="ok", error=None):
+    threshold = METRIC_DEFINITIONS[name]["threshold"]
+    return MetricData(name=f"{name} (Conversational GEval)", threshold=threshold, score=score, reason=reason,
+                      error=error, strict_mode=False, success=score is not None and score >= threshold)
+
+
+@pytest.mark.parametrize("score, reason, error, escalate", [
+    (0.99, "clear pass", None, False),
+    (0.2, "clear fail", None, False),
+    (0.78, "close to the 0.85 threshold", None, True),
+    (0.99, f"  {UNCERTAIN_MARKER.lower()} the transcript is cut off", None, True),
+    (None, None, "judge timed out", True),
+])
+def test_needs_escalation(score, reason, error, escalate):
+    assert ConversationEvaluator.needs_escalation(metric_data("Correctness", score, reason, error), 0.1) == escalate
+
+
+# (conversation, metric) -> score, per judge tier
+SMALL_SCORES = {("c0", "Correctness"): 0.99, ("c0", "Verification"): 0.1,
+                ("c1", "Correctness"): 0.8, ("c1", "Verification"): 0.9,
+                ("c2", "Correctness"): 0.82, ("c2", "Verification"): 0.3}
+STRONG_SCORES = {key: 0.5 for key in SMALL_SCORES}
+
+
+@pytest.fixture
+def evaluator(monkeypatch):
+    evaluator = ConversationEvaluator(None, judges=JudgeConfig(judge="stub", cascade_judge="stub"))
+    calls = []
+
+    def evaluate_indexed(test_cases, metrics=None):
+        small = all(any(metric is small for small in evaluator.small_metrics) for metric in metrics)
+        scores = SMALL_SCORES if small else STRONG_SCORES
+        calls.append((SMALL_TIER if small else STRONG_TIER,
+                      [case.additional_metadata["convo_id"] for case in test_cases], [m.name for m in metrics]))
+        # Completion order differs from submission order
+        results = {}
+        for index, case in reversed(list(enumerate(test_cases))):
+            convo_id = case.additional_metadata["convo_id"]
+            results[index] = evaluate_types.TestResult(
+                name=str(index), success=True, conversational=True, additional_metadata=dict(case.additional_metadata),
+                metrics_data=[metric_data(m.name, scores[convo_id, m.name]) for m in metrics],
+            )
+        return results
+
+    monkeypatch.setattr(evaluator, "evaluate_indexed", evaluate_indexed)
+    evaluator.calls = calls
+    return evaluator
+
+
+def test_cascade_rescores_only_borderline_metrics_and_merges_in_order(evaluator):
+    test_cases = [TestCaseBuilder.build_test_case_from_turns([TurnRecord("user", "hi")], convo_id)
+                  for convo_id in ("c0", "c1", "c2")]
+    results = evaluator.evaluate_cascade(test_cases)
+
+    # Conversations needing the same escalations share one strong-judge call
+    assert len(evaluator.calls) == 2
+    assert evaluator.calls[0] == (SMALL_TIER, ["c0", "c1", "c2"], ["Correctness", "Verification"])
+    tier, convo_ids, metric_names = evaluator.calls[1]
+    assert (tier, sorted(convo_ids), metric_names) == (STRONG_TIER, ["c1", "c2"], ["Correctness"])
+    assert [result.additional_metadata["convo_id"] for result in results] == ["c0", "c1", "c2"]
+    # Tiers are keyed by result name, like the metrics_data they describe
+    assert [result.additional_metadata["judge_tiers"] for result in results] == [
+        {"Correctness (Conversational GEval)": SMALL_TIER, "Verification (Conversational GEval)": SMALL_TIER},
+        {"Correctness (Conversational GEval)": STRONG_TIER, "Verification (Conversational GEval)": SMALL_TIER},
+        {"Correctness (Conversational GEval)": STRONG_TIER, "Verification (Conversational GEval)": SMALL_TIER},
+    ]
+    assert [[m.score for m in result.metrics_data] for result in results] == [[0.99, 0.1], [0.5, 0.9], [0.5, 0.3]]
+    # Success is recomputed from the kept scores
+    assert [result.success for result in results] == [False, False, False]
+
+
+def test_cascade_limited_to_a_metric_subset(evaluator):
+    test_cases = [TestCaseBuilder.build_test_case_from_turns([TurnRecord("user", "hi")], "c1")]
+    results = evaluator.evaluate_cascade(test_cases, metrics=evaluator.metrics_for(["Verification"]))
+    assert evaluator.calls == [(SMALL_TIER, ["c1"], ["Verification"])]
+    assert results[0].additional_metadata["judge_tiers"] == {"Verification (Conversational GEval)": SMALL_TIER}
+    assert results[0].success
@@ -0,0 +1,88 @@
+import asyncio
+import pytest
+from core.cassette import RECORD, REPLAY, Cassette, CassetteError, CassetteMissError
+
+
+def record(path, calls):
+    cassette = Cassette(str(path), mode=RECORD)
+    for channel, request, response in calls:
+        cassette.call(channel, request, lambda: response)
+    cassette.save()
+    return cassette
+
+
+def test_replay_serves_recorded_responses_without_live_calls(tmp_path):
+    path = tmp_path / "cassettes" / "run.jsonl.gz"
+    record(path, [("kustomer", {"url": "/conversations/c1"}, {"messages": ["hi"]}),
+                  ("judge", {"prompt": "score"}, "0.8")])
+    replay = Cassette(str(path), mode=REPLAY)
+    assert replay.replaying
+    live = lambda: pytest.fail("replay must not make live calls")
+    assert replay.call("kustomer", {"url": "/conversations/c1"}, live) == {"messages": ["hi"]}
+    assert asyncio.run(replay.a_call("judge", {"prompt": "score"}, live)) == "0.8"
+    # The channel is part of the key
+    with pytest.raises(CassetteMissError):
+        replay.call("drive", {"url": "/conversations/c1"}, live)
+
+
+def test_repeated_requests_replay_in_order_then_repeat_the_last(tmp_path):
+    path = tmp_path / "run.jsonl.gz"
+    record(path, [("judge", {"prompt": "p"}, "first"), ("judge", {"prompt": "p"}, "second")])
+    replay = Cassette(str(path))
+    assert [replay.call("judge", {"prompt": "p"}, None) for _ in range(3)] == ["first", "second", "second"]
+
+
+def test_loose_match_ignores_dates_and_report_timestamps(tmp_path):
+    path = tmp_path / "run.jsonl.gz"
+    record(path, [("kustomer", {"createdAt": "2026-03-01T00:00:00Z", "file": "eval_results_20260302_090000.csv"},
+                   "recorded")])
+    replay = Cassette(str(path))
+    request = {"createdAt": "2026-10-18T00:00:00Z", "file": "eval_results_20261019_090000.csv"}
+    assert replay.call("kustomer", request, None) == "recorded"
+    with pytest.raises(CassetteMissError):
+        replay.call("kustomer", {"createdAt": "2026-10-18T00:00:00Z", "file": "other.csv"}, None)
+
+
+def test_failed_live_calls_are_recorded_and_replayed_as_errors(tmp_path):
+    path = tmp_path / "run.jsonl.gz"
+    cassette = Cassette(str(path), mode=RECORD)
+
+    def fail():
+        raise RuntimeError("503 from Kustomer")
+
+    with pytest.raises(RuntimeError):
+        cassette.call("kustomer", {"url": "/search"}, fail)
+    cassette.save()
+    with pytest.raises(ValueError, match="503 from Kustomer"):
+        Cassette(str(path)).call("kustomer", {"url": "/search"}, None, error_factory=ValueError)
+
+
+def test_injected_errors_are_deterministic_per_seed(tmp_path):
+    path = tmp_path / "run.jsonl.gz"
+    record(path, [("judge", {"prompt": i}, i) for i in range(50)])
+
+    def outcomes(seed):
+        replay = Cassette(str(path), error_rate=0.3, seed=seed)
+        results = []
+        for i in range(50):
+            try:
+                results.append(replay.call("judge", {"prompt": i}, None))
+            except CassetteError:
+                results.append(None)
+        return results
+
+    assert outcomes(1) == outcomes(1)
+    assert outcomes(1) != outcomes(2)
+    assert 0 < outcomes(1).count(None) < 50
+
+
+def test_from_env_and_mode_validation(tmp_path, monkeypatch):
+    monkeypatch.delenv("EVALUATOR_CASSETTE", raising=False)
+    assert Cassette.from_env() is None
+    monkeypatch.setenv("EVALUATOR_CASSETTE", str(tmp_path / "run.jsonl.gz"))
+    monkeypatch.setenv("EVALUATOR_CASSETTE_MODE", RECORD)
+    monkeypatch.setenv("EVALUATOR_REPLAY_LATENCY_MS", "50")
+    cassette = Cassette.from_env()
+    assert (cassette.mode, cassette.latency_ms) == (RECORD, 50.0)
+    with pytest.raises(ValueError):
+        Cassette(str(tmp_path / "run.jsonl.gz"), mode="live")
@@ -0,0 +1,78 @@
+import os
+import pytest
+from core.context_retriever import ContextRetriever, tokenize
+from scripts.faq_generator.faq_eval import split_faq_items
+
+DOCUMENT = """Refunds are issued to the original payment card within five business days.
+
+Tickets are delivered to the Gametime app two hours before the event starts.
+
+Transfers to a friend are done from the ticket screen with their phone number.
+
+Parking passes are not refundable once the event has started."""
+
+
+def test_tokenize_drops_stopwords_and_folds_plurals():
+    assert tokenize("Where are my Refunds?") == ["refund"]
+    assert tokenize("the glass passes") == ["glass", "passe"]
+
+
+def test_chunk_document_packs_short_paragraphs_and_windows_long_ones():
+    assert ContextRetriever.chunk_document("one two\n\nthree four", chunk_size=10, chunk_overlap=2) == [
+        "one two\n\nthree four"
+    ]
+    long_paragraph = " ".join(f"w{i}" for i in range(25))
+    chunks = ContextRetriever.chunk_document(long_paragraph, chunk_size=10, chunk_overlap=2)
+    assert [chunk.split()[0] for chunk in chunks] == ["w0", "w8", "w16"]
+    assert chunks[-1].split()[-1] == "w24"
+
+
+def test_retrieve_returns_best_chunks_in_document_order():
+    retriever = ContextRetriever(DOCUMENT, chunk_size=20, chunk_overlap=4, cache_dir=None)
+    assert len(retriever.chunks) == 4
+    assert retriever.retrieve("How do I transfer tickets to a friend?", top_k=1) == [retriever.chunks[2]]
+    assert retriever.retrieve("refund parking", top_k=2) == [retriever.chunks[0], retriever.chunks[3]]
+
+
+def test_retrieve_without_overlap_falls_back_to_the_start():
+    retriever = ContextRetriever(DOCUMENT, chunk_size=20, chunk_overlap=4, cache_dir=None)
+    assert retriever.retrieve("zebra", top_k=2) == retriever.chunks[:2]
+    assert retriever.retrieve("zebra", top_k=10) == retriever.chunks
+
+
+def test_index_is_cached_by_document_and_chunking(tmp_path):
+    first = ContextRetriever(DOCUMENT, chunk_size=20, chunk_overlap=4, cache_dir=str(tmp_path))
+    assert os.path.exists(first.cache_path)
+    same = ContextRetriever(DOCUMENT, chunk_size=20, chunk_overlap=4, cache_dir=str(tmp_path))
+    assert same.cache_path == first.cache_path
+    other_chunking = ContextRetriever(DOCUMENT, chunk_size=30, chunk_overlap=4, cache_dir=str(tmp_path))
+    other_document = ContextRetriever(DOCUMENT + "\n\nNew policy.", chunk_size=20, chunk_overlap=4,
+                                      cache_dir=str(tmp_path))
+    assert len({first.cache_path, other_chunking.cache_path, other_document.cache_path}) == 3
+
+    # A cached index is used as-is, without re-chunking the document
+    with open(first.cache_path, "w") as f:
+        f.write('{"chunks": ["cached"], "chunk_lengths": [1], "postings": {}}')
+    assert ContextRetriever(DOCUMENT, chunk_size=20, chunk_overlap=4, cache_dir=str(tmp_path)).chunks == ["cached"]
+
+
+def test_rejects_empty_document_and_bad_overlap():
+    with pytest.raises(ValueError):
+        ContextRetriever("  \n\n ", cache_dir=None)
+    with pytest.raises(ValueError):
+        ContextRetriever(DOCUMENT, chunk_size=10, chunk_overlap=10, cache_dir=None)
+
+
+def test_split_faq_items_on_question_lines_only():
+    content = "\n".join([
+        "## How do refunds work?",
+        "Refunds go to your card.",
+        "**Note:** allow five days.",
+        "1. Open the app",
+        "Q2: Can I transfer tickets?",
+        "Yes, from the ticket screen.",
+    ])
+    items = split_faq_items(content)
+    assert len(items) == 2
+    assert items[0].startswith("## How do refunds work?") and "1. Open the app" in items[0]
+    assert items[1].startswith("Q2:")
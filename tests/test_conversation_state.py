@@ -0,0 +1,97 @@
+from types import SimpleNamespace
+import pytest
+from core.conversation_state import ConversationState, merge_scores, plan_increments, turn_hash
+from core.transcript_store import ASSISTANT, USER, TranscriptStore
+
+VERSION = "v1"
+TURNS = [(USER, "hi"), (ASSISTANT, "hello"), (USER, "where are my tickets?"), (ASSISTANT, "In the app."),
+         (USER, "thanks"), (ASSISTANT, "Anything else?")]
+
+
+def metric_data(score, success, name="Verification (Conversational GEval)"):
+    return SimpleNamespace(name=name, score=score, success=success)
+
+
+def test_merge_scores_weights_segments_by_turns():
+    first = merge_scores(None, [metric_data(0.9, True)], 4)
+    assert first["Verification"] == {"score": 0.9, "success": True, "turns": 4, "segments": 1,
+                                     "last_score": 0.9, "last_success": True}
+    second = merge_scores(first, [metric_data(0.3, False)], 2)["Verification"]
+    assert second["score"] == pytest.approx((0.9 * 4 + 0.3 * 2) / 6)
+    assert (second["turns"], second["segments"], second["success"]) == (6, 2, False)
+    # Once a segment failed, the conversation keeps failing
+    assert not merge_scores({"Verification": second}, [metric_data(1.0, True)], 2)["Verification"]["success"]
+
+
+def test_merge_scores_restarts_after_a_missing_score_and_keeps_other_metrics():
+    prior = merge_scores(None, [metric_data(0.9, True), metric_data(0.8, True, name="Correctness")], 4)
+    merged = merge_scores(prior, [metric_data(None, False)], 2)
+    assert merged["Verification"]["score"] is None and merged["Verification"]["turns"] == 2
+    assert merged["Correctness"] == prior["Correctness"]
+
+
+def state(turn_count, last_turn, last_message_id="m4", version=VERSION, scores=None):
+    return {"metric_version": version, "last_message_id": last_message_id, "turn_count": turn_count,
+            "last_turn_hash": turn_hash(last_turn), "scores": scores or {"Verification": {"score": 0.9}}}
+
+
+def plan(states, cursors, turns=TURNS, **kwargs):
+    store = TranscriptStore()
+    store.add("c1", turns)
+    return plan_increments(store, states, cursors, VERSION, context_turns=2, **kwargs)
+
+
+def test_new_conversations_are_judged_in_full():
+    windows, plans = plan({}, {"c1": ("m6", 6)})
+    assert [turn.content for turn in windows.turns(0)] == [content for _, content in TURNS]
+    assert plans["c1"]["window_start"] == plans["c1"]["new_start"] == 0
+    assert plans["c1"]["scores"] is None
+    assert (plans["c1"]["turn_count"], plans["c1"]["last_message_id"]) == (6, "m6")
+
+
+def test_unchanged_conversations_are_skipped():
+    windows, plans = plan({"c1": state(6, "Anything else?", last_message_id="m6")}, {"c1": ("m6", 6)})
+    assert len(windows) == 0 and plans == {}
+
+
+def test_new_turns_are_judged_with_context():
+    prior = state(4, "In the app.")
+    windows, plans = plan({"c1": prior}, {"c1": ("m6", 6)})
+    assert (plans["c1"]["window_start"], plans["c1"]["new_start"]) == (2, 4)
+    assert [turn.content for turn in windows.turns(0)] == ["where are my tickets?", "In the app.", "thanks",
+                                                           "Anything else?"]
+    assert plans["c1"]["scores"] == prior["scores"]
+
+
+def test_messages_merged_into_the_last_judged_turn_reopen_it():
+    windows, plans = plan({"c1": state(4, "In the app, under My Tickets.")}, {"c1": ("m6", 6)})
+    assert (plans["c1"]["window_start"], plans["c1"]["new_start"]) == (1, 3)
+
+
+def test_new_message_without_new_turns_only_moves_the_cursor():
+    windows, plans = plan({"c1": state(6, "Anything else?")}, {"c1": ("m7", 7)})
+    assert len(windows) == 0
+    assert plans["c1"]["new_start"] is None and plans["c1"]["window_start"] is None
+    assert plans["c1"]["message_count"] == 7
+
+
+@pytest.mark.parametrize("prior, kwargs", [
+    (state(4, "In the app.", version="v0"), {}),
+    (state(4, "In the app."), {"full": True}),
+    # The conversation shrank, e.g. messages were deleted
+    (state(8, "Bye"), {}),
+])
+def test_full_evaluation_when_state_does_not_apply(prior, kwargs):
+    windows, plans = plan({"c1": prior}, {"c1": ("m6", 6)}, **kwargs)
+    assert plans["c1"]["new_start"] == 0 and plans["c1"]["scores"] is None
+    assert len(windows.turns(0)) == len(TURNS)
+
+
+def test_state_round_trip(tmp_path):
+    conversation_state = ConversationState(str(tmp_path / "state" / "state.sqlite3"))
+    conversation_state.save("c1", VERSION, "m6", "2026-03-01T10:00:00Z", 6, 6, turn_hash("x"), {"Verification": {}})
+    conversation_state.commit()
+    states = conversation_state.get_many(["c1", "unknown"])
+    conversation_state.close()
+    assert list(states) == ["c1"]
+    assert (states["c1"]["turn_count"], states["c1"]["scores"]) == (6, {"Verification": {}})
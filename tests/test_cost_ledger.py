@@ -0,0 +1,73 @@
+import pytest
+from core.cost_ledger import CHEAPER_JUDGE, SAMPLE, STOP, CostLedger, SpendBudget, _sample_value, model_price
+from core.evaluator import ConversationEvaluator, JudgeConfig
+
+# Priced with gpt-4o at $2.50 / $10 per million tokens: $0.0035 per conversation
+TOKENS = (1000, 100)
+BATCH = [(f"c{i}", TOKENS) for i in range(5)]
+REST = (5000, 500)
+
+
+def budget(limit_usd, policy, **kwargs):
+    spend_budget = SpendBudget(limit_usd, CostLedger(), policy=policy, **kwargs)
+    spend_budget.model_name = "gpt-4o"
+    return spend_budget
+
+
+def test_model_price_is_free_for_the_stub_judge_and_warns_on_fallback():
+    assert model_price("gpt-4o") == pytest.approx((2.5e-6, 1e-5))
+    assert model_price("stub") == (0.0, 0.0)
+    with pytest.warns(RuntimeWarning, match="no-such-model"):
+        assert model_price("no-such-model") == model_price("gpt-4o")
+
+
+@pytest.mark.parametrize("policy", [STOP, SAMPLE, CHEAPER_JUDGE])
+def test_everything_is_selected_while_the_run_fits(policy):
+    spend_budget = budget(1.0, policy)
+    assert spend_budget.select(BATCH, REST) == ([0, 1, 2, 3, 4], False)
+    assert spend_budget.events == [] and spend_budget.skipped == 0
+
+
+def test_stop_evaluates_what_fits_and_stops():
+    spend_budget = budget(0.01, STOP)
+    assert spend_budget.select(BATCH, REST) == ([0, 1], False)
+    assert spend_budget.stopped and spend_budget.skipped == 3
+    assert spend_budget.events[0].startswith("Stopped with $0.0100 left")
+
+
+def test_sample_keeps_a_deterministic_share_sized_to_the_money_left():
+    batch = [(f"c{i}", TOKENS) for i in range(200)]
+    spend_budget = budget(0.35, SAMPLE)
+    # The rest of the run is projected at $0.70, so half of it fits
+    selected, switch = spend_budget.select(batch, (200000, 20000))
+    assert not switch and not spend_budget.stopped and spend_budget.sampling
+    assert selected == [i for i, (convo_id, _) in enumerate(batch) if _sample_value(convo_id) < 0.5]
+    assert 70 < len(selected) < 130
+    assert spend_budget.skipped == 200 - len(selected)
+    assert budget(0.35, SAMPLE).select(batch, (200000, 20000))[0] == selected
+
+
+def test_cheaper_judge_switches_once_and_stops_if_even_that_does_not_fit():
+    spend_budget = budget(0.01, CHEAPER_JUDGE, cheaper_judge="gpt-4o-mini")
+    assert spend_budget.select(BATCH, REST) == ([0, 1, 2, 3, 4], True)
+    assert spend_budget.model_name == "gpt-4o-mini" and not spend_budget.stopped
+    assert spend_budget.select(BATCH, REST)[1] is False
+
+    # $0.00021 per conversation with gpt-4o-mini
+    spend_budget = budget(0.0005, CHEAPER_JUDGE, cheaper_judge="gpt-4o-mini")
+    assert spend_budget.select(BATCH, REST) == ([0, 1], True)
+    assert spend_budget.stopped
+
+
+def test_projections_are_calibrated_by_actual_spend():
+    spend_budget = budget(0.02, STOP)
+    assert spend_budget.select(BATCH[:2], REST) == ([0, 1], False)
+    # The two conversations cost twice their estimate, so the remaining three no longer fit
+    spend_budget.ledger.record("strong", "Verification", "gpt-4o", 4000, 400, 0.014)
+    assert spend_budget.calibration() == pytest.approx(2.0)
+    assert spend_budget.select(BATCH[2:], (3000, 300)) == ([], False)
+    assert spend_budget.stopped
+
+
+def test_stub_judges_are_not_billed():
+    assert not ConversationEvaluator(None, judges=JudgeConfig(judge="stub")).billed
@@ -0,0 +1,18 @@
+"""
+Cold-start budget of the evaluator CLI: each entry point is imported in a fresh interpreter, which must not load
+a heavy dependency and must stay within IMPORT_BUDGET_SECONDS (best of three runs).
+"""
+import os
+import pytest
+from scripts.import_budget_check import default_budget, measure, targets
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+REPEAT = 3
+
+
+@pytest.mark.parametrize("name,modules", sorted(targets().items()))
+def test_cold_import_is_light_and_fast(name, modules):
+    runs = [measure(modules, ROOT) for _ in range(REPEAT)]
+    assert not sorted({module for run in runs for module in run["heavy"]}), f"{name} imports heavy modules at startup"
+    best = min(run["seconds"] for run in runs)
+    assert best <= default_budget(), f"{name} took {best:.3f}s to import"
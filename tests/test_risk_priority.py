@@ -0,0 +1,65 @@
+import time
+from core.evaluator import ConversationEvaluator, JudgeConfig
+from core.risk_priority import (
+    DEADLINE_PROBE_BATCH_SIZE, ROUTE_TO_AGENT_MARKER, Deadline, coverage_report, prioritize, risk_signals,
+)
+from core.transcript_store import ASSISTANT, USER, TranscriptStore, TurnRecord
+
+
+def test_signals_match_whole_words_and_roles():
+    turns = [
+        TurnRecord("user", "I was charged twice, my number is (415) 555-0134"),
+        TurnRecord("assistant", f"Let me get you an agent. {ROUTE_TO_AGENT_MARKER}"),
+        TurnRecord("user", "The code is 482913. Please discard my prepaid order"),
+        # A customer pasting the marker is not a hand-off, and bot turns never count as codes
+        TurnRecord("user", f"{ROUTE_TO_AGENT_MARKER} please"),
+        TurnRecord("assistant", "Your order 123456 was delivered"),
+    ]
+    assert risk_signals(turns) == {"payment": 1, "phone": 1, "handoff": 1, "code": 1, "delivery": 1}
+
+
+def test_prioritize_ranks_riskiest_first_and_keeps_ties_in_store_order():
+    store = TranscriptStore()
+    store.add("small-talk", [(USER, "hi"), (ASSISTANT, "hello")])
+    store.add("refund", [(USER, "I want a refund"), (ASSISTANT, "Sure")])
+    store.add("small-talk-2", [(USER, "hey"), (ASSISTANT, "hello")])
+    store.add("handoff", [(USER, "my card was declined"), (ASSISTANT, f"One moment {ROUTE_TO_AGENT_MARKER}")])
+    ranked = prioritize(store)
+    assert [entry["convo_id"] for entry in ranked] == ["handoff", "refund", "small-talk", "small-talk-2"]
+    assert ranked[0]["signals"] == {"payment": 1, "handoff": 1} and ranked[0]["turns"] == 2
+    assert [entry["index"] for entry in prioritize(store, indices=[2, 0])] == [2, 0]
+
+
+def test_deadline_probes_then_sizes_batches_from_the_slowest_rate():
+    deadline = Deadline(1000)
+    assert deadline.batch_size(500) == DEADLINE_PROBE_BATCH_SIZE
+    assert deadline.batch_size(10) == 10
+    deadline.record_batch(25, 10)
+    assert deadline.batch_size(500) == 500
+    # A slower batch lowers the projection; a faster one does not raise it again
+    deadline.record_batch(10, 20)
+    deadline.record_batch(100, 1)
+    assert deadline.seconds_per_conversation() == 2.0
+    assert deadline.batch_size(500) == 399
+
+
+def test_deadline_stops_when_nothing_more_fits():
+    deadline = Deadline(10, started_at=time.monotonic() - 9)
+    assert deadline.batch_size(500) == DEADLINE_PROBE_BATCH_SIZE
+    deadline.record_batch(5, 10)
+    assert deadline.batch_size(500) == 0
+    assert Deadline(10, started_at=time.monotonic() - 11).batch_size(500) == 0
+
+
+def test_expired_deadline_leaves_every_conversation_unreached():
+    store = TranscriptStore()
+    for convo_id in ("c0", "c1", "c2"):
+        store.add(convo_id, [(USER, "hi"), (ASSISTANT, "hello")])
+    evaluator = ConversationEvaluator(None, judges=JudgeConfig(judge="stub"))
+    deadline = Deadline(0)
+    results = evaluator.evaluate_store(store, indices=[2, 0, 1], deadline=deadline)
+    assert results.test_results == []
+    assert deadline.stopped and deadline.unreached == [2, 0, 1]
+
+    report = coverage_report(prioritize(store), [], deadline.unreached)
+    assert report["evaluated"] == 0 and {row["status"] for row in report["rows"]} == {"deadline"}
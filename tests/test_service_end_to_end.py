@@ -0,0 +1,83 @@
+"""
+End-to-end check of the evaluation service: starts `serve` with the offline stub judge in a subprocess, drives it
+with `fake_webhooks` and checks that every event is scored and written out. Needs no API keys or network.
+"""
+import os
+import re
+import signal
+import subprocess
+import sys
+import time
+import pytest
+import requests
+from scripts.chatbot import fake_webhooks
+from evaluator_service.service import HEALTH_PATH, METRICS_PATH, WEBHOOK_PATH
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+CSV = os.path.join(ROOT, "mock_data", "simulated_conversations.csv")
+LISTENING = re.compile(r"Listening on (http://[\d.]+:\d+)")
+
+
+@pytest.fixture
+def service(tmp_path):
+    env = dict(os.environ)
+    env["PYTHONPATH"] = os.pathsep.join([os.path.join(ROOT, "src"), ROOT, env.get("PYTHONPATH", "")])
+    env["EVALUATOR_STUB_JUDGE_LATENCY"] = "0"
+    # Events carry their messages, so no Kustomer client is needed
+    env.pop("KUSTOMER_API_KEY", None)
+    env.pop("EVALUATOR_CASSETTE", None)
+    env.pop("EVALUATOR_WEBHOOK_SECRET", None)
+    process = subprocess.Popen(
+        [sys.executable, "-u", "-m", "scripts.chatbot.serve", "--port", "0", "--judge", "stub", "--batch-size", "5",
+         "--max-wait", "0.5", "--queue", str(tmp_path / "queue.sqlite3"), "--output-dir", str(tmp_path / "out")],
+        cwd=tmp_path, env=env, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True,
+    )
+    url = None
+    for line in process.stdout:
+        match = LISTENING.search(line)
+        if match:
+            url = match.group(1)
+            break
+    if url is None:
+        process.wait(timeout=10)
+        pytest.fail(f"serve exited with {process.returncode} before listening")
+    deadline = time.time() + 30
+    while True:
+        try:
+            requests.get(url + HEALTH_PATH, timeout=1).raise_for_status()
+            break
+        except requests.RequestException:
+            if time.time() > deadline:
+                process.kill()
+                raise
+            time.sleep(0.1)
+    yield url, tmp_path
+    process.send_signal(signal.SIGINT)
+    try:
+        process.wait(timeout=30)
+    finally:
+        if process.poll() is None:
+            process.kill()
+        process.stdout.close()
+
+
+def test_fake_webhooks_are_scored(service):
+    url, tmp_path = service
+    # fake_webhooks exits non-zero if any queued event is left unscored before the timeout
+    fake_webhooks.main(["--url", url, "--csv", CSV, "--events", "12", "--rate", "50", "--timeout", "120"])
+
+    metrics = requests.get(url + METRICS_PATH).json()
+    assert metrics["counters"]["queued"] == 12
+    assert metrics["counters"]["scored"] == 12
+    assert metrics["counters"]["failed"] == 0
+    assert metrics["queue"]["pending"] == 0
+    assert os.listdir(tmp_path / "out")
+
+
+def test_rejects_bodies_that_are_not_events(service):
+    url, _ = service
+    assert requests.post(url + WEBHOOK_PATH, data=b"not json").status_code == 400
+    assert requests.post(url + WEBHOOK_PATH, json=[1]).status_code == 400
+    response = requests.post(url + WEBHOOK_PATH, json={"data": {"type": "conversation", "id": "c1"}})
+    assert response.status_code == 200
+    assert response.json() == {"queued": False, "reason": "not a closed conversation"}
@@ -0,0 +1,62 @@
+from core.test_case_builder import TestCaseBuilder
+from core.transcript_store import ASSISTANT, USER, TranscriptStore, TurnRecord
+
+
+def message(message_id, direction, body, sent_at, **attributes):
+    return {"id": message_id, "attributes": {"direction": direction, "body": body,
+                                             "sentAt": f"2026-03-01T10:00:{sent_at:02d}+00:00", **attributes}}
+
+
+def test_payloads_are_ordered_and_merged_into_turns():
+    messages = [
+        message("m3", "in", "I need a refund", 3),
+        message("m1", "out", "Hi! How can I help?", 1),
+        message("m2", "in", "Hello", 2),
+        message("m4", "out", "Sure.", 4),
+        message("m5", "out", "What is your phone number?", 5),
+        message("note", "note", "internal", 6),
+        message("empty", "in", "", 7),
+        # Only the truncated preview is available
+        {"id": "m8", "attributes": {"direction": "in", "preview": "555 123 4567",
+                                    "sentAt": "2026-03-01T10:00:08+00:00"}},
+    ]
+    store = TestCaseBuilder.kustomer_payloads_to_store({"c1": messages, "empty": [message("n", "note", "x", 1)]})
+    assert store.convo_ids == ["c1"]
+    turns = store.turns(0)
+    assert [(turn.role, turn.content) for turn in turns] == [
+        ("assistant", "Hi! How can I help?"),
+        ("user", "Hello\nI need a refund"),
+        ("assistant", "Sure.\nWhat is your phone number?"),
+        ("user", "555 123 4567"),
+    ]
+    # Each turn carries the send time of its first message
+    assert turns[1].sent_at < turns[2].sent_at
+
+
+def test_payloads_accept_a_lazy_iterable_and_append_to_a_store():
+    store = TranscriptStore()
+    store.add("existing", [(USER, "hi"), (ASSISTANT, "hello")])
+    payloads = ((convo_id, [message("a", "in", "question", 1), message("b", "out", "answer", 2)])
+                for convo_id in ("c1", "c2"))
+    assert TestCaseBuilder.kustomer_payloads_to_store(payloads, store) is store
+    assert store.convo_ids == ["existing", "c1", "c2"]
+
+
+def test_message_cursor_counts_kept_messages_and_finds_the_latest():
+    messages = [message("m2", "out", "later", 5), message("m1", "in", "earlier", 1), message("n", "note", "x", 9)]
+    assert TestCaseBuilder.message_cursor(messages) == ("m2", 2)
+    assert TestCaseBuilder.message_cursor([]) == (None, 0)
+
+
+def test_test_case_starts_at_the_first_customer_message():
+    turns = [TurnRecord("assistant", "Hi!"), TurnRecord("assistant", "Ask me anything."),
+             TurnRecord("user", "Where are my tickets?"), TurnRecord("assistant", "In the app.")]
+    test_case = TestCaseBuilder.build_test_case_from_turns(turns, "c1")
+    assert [turn.content for turn in test_case.turns] == ["Where are my tickets?", "In the app."]
+    assert test_case.additional_metadata == {"convo_id": "c1"}
+
+
+def test_test_case_without_customer_messages_is_kept_whole():
+    turns = [TurnRecord("assistant", "Hi!"), TurnRecord("assistant", "Still there?")]
+    test_case = TestCaseBuilder.build_test_case_from_turns(turns, "c1")
+    assert [turn.content for turn in test_case.turns] == ["Hi!", "Still there?"]
@@ -0,0 +1,137 @@
+import sqlite3
+from types import SimpleNamespace
+from datetime import date, datetime, timedelta
+import pytest
+from core.trend_index import BACKFILL_SOURCE, PARTIAL_SOURCE, TrendIndex, aggregate_metric_rows, traffic_date
+
+
+def rows(metric, passed, failed, pass_score=0.9, fail_score=0.2):
+    return ([{"metric": metric, "success": True, "score": pass_score, "cost": 0.01}] * passed
+            + [{"metric": metric, "success": False, "score": fail_score, "cost": 0.01}] * failed)
+
+
+@pytest.fixture
+def index(tmp_path):
+    trend_index = TrendIndex(str(tmp_path / "trend.sqlite3"))
+    yield trend_index
+    trend_index.close()
+
+
+def record_days(index, days, passed, failed, start=datetime(2026, 3, 1, 9), metric="Verification", **kwargs):
+    for day in range(days):
+        run_at = start + timedelta(days=day)
+        index.record_run(run_at.strftime("%Y%m%d_%H%M%S"), rows(metric, passed, failed, **kwargs), run_at=run_at)
+
+
+def test_aggregate_counts_errors_and_distribution():
+    aggregates = aggregate_metric_rows(rows("Correctness", 3, 1) + [
+        {"metric": "Correctness", "success": False, "score": None, "cost": None}])
+    agg = aggregates["Correctness"]
+    assert (agg["num_cases"], agg["num_passed"], agg["num_errors"]) == (5, 3, 1)
+    assert agg["score_mean"] == pytest.approx((0.9 * 3 + 0.2) / 4)
+    assert agg["score_p50"] == pytest.approx(0.9)
+    assert sum(agg["score_histogram"]) == 4 and agg["score_histogram"][9] == 3
+    assert agg["cost"] == pytest.approx(0.04)
+
+
+def test_incremental_results_are_recorded_with_the_conversation_score():
+    segment = SimpleNamespace(name="Verification (Conversational GEval)", score=1.0, success=True, evaluation_cost=0.01)
+    results = SimpleNamespace(test_results=[
+        SimpleNamespace(additional_metadata={"convo_id": "c1"}, metrics_data=[segment]),
+        SimpleNamespace(additional_metadata={"convo_id": "c2"}, metrics_data=[segment]),
+    ])
+    conversation_scores = {"c1": {"Verification": {"score": 0.4, "success": False}}}
+    assert TrendIndex.metric_rows_from_results(results, conversation_scores) == [
+        {"metric": "Verification", "success": False, "score": 0.4, "cost": 0.01},
+        {"metric": "Verification", "success": True, "score": 1.0, "cost": 0.01},
+    ]
+
+
+def test_runs_are_dated_by_the_traffic_they_cover(index, tmp_path):
+    assert traffic_date(datetime(2026, 3, 2, 2)) == date(2026, 3, 1)
+    csv_path = tmp_path / "eval_results_20260302_090000.csv"
+    csv_path.write_text("convo_url,overall_success,metric_name,score,reason,evaluation_cost\n"
+                        "u,True,Verification (Conversational GEval),0.8,ok,0.01\n")
+    assert index.ingest_csv(str(csv_path))
+    assert not index.ingest_csv(str(tmp_path / "results.csv"))
+    row = index.conn.execute("SELECT * FROM metric_runs").fetchone()
+    assert (row["run_id"], row["run_date"], row["metric"]) == ("20260302_090000", "2026-03-01", "Verification")
+
+
+def test_rolling_counts_the_latest_run_of_each_day(index):
+    record_days(index, 3, 8, 2)
+    # A re-run of the last day replaces it rather than adding to it
+    rerun_at = datetime(2026, 3, 3, 15)
+    index.record_run("rerun", rows("Verification", 2, 8), run_at=rerun_at)
+    window = index.rolling("Verification (Conversational GEval)", days=7, end=date(2026, 3, 2))
+    assert window["runs"] == 3 and window["cases"] == 30
+    assert window["pass_rate"] == pytest.approx((8 + 8 + 2) / 30)
+    assert index.rolling("Verification", days=7, end=date(2026, 2, 1)) is None
+
+
+def test_flags_a_significant_drop_against_the_baseline(index):
+    record_days(index, 14, 90, 10)
+    run_at = datetime(2026, 3, 15, 9)
+    index.record_run("today", rows("Verification", 60, 40, pass_score=0.8), run_at=run_at)
+    flagged = {regression["statistic"]: regression for regression in index.detect_regressions("today")}
+    assert set(flagged) == {"pass_rate", "score_mean"}
+    assert flagged["pass_rate"]["current"] == pytest.approx(0.6)
+    assert flagged["pass_rate"]["baseline"] == pytest.approx(0.9)
+    assert flagged["pass_rate"]["p_value"] < 0.01
+    assert any(line.startswith("REGRESSION Verification pass_rate") for line in index.run_summary("today"))
+
+
+def test_no_flag_for_noise_or_without_a_baseline(index):
+    record_days(index, 14, 90, 10)
+    index.record_run("steady", rows("Verification", 88, 12), run_at=datetime(2026, 3, 15, 9))
+    assert index.detect_regressions("steady") == []
+    index.record_run("first", rows("Correctness", 0, 10), run_at=datetime(2026, 3, 15, 10))
+    assert index.detect_regressions("first") == []
+
+
+def test_baseline_ignores_other_sources_and_reruns_of_the_same_day(index):
+    record_days(index, 14, 90, 10)
+    # A backfill of the baseline days does not count towards the nightly baseline, nor the other way round
+    for day in range(14):
+        run_at = datetime(2026, 3, 1, 9) + timedelta(days=day)
+        index.record_run(f"backfill_{day}", rows("Verification", 10, 90), run_at=run_at,
+                         run_date=traffic_date(run_at), source=BACKFILL_SOURCE)
+    index.record_run("today", rows("Verification", 89, 11), run_at=datetime(2026, 3, 15, 9))
+    assert index.detect_regressions("today") == []
+    assert index.metrics(BACKFILL_SOURCE) == ["Verification"]
+
+
+def test_partial_runs_are_kept_out_of_baselines_and_not_checked(index):
+    record_days(index, 14, 90, 10)
+    # A riskiest-first subset fails far more often than the full traffic
+    index.record_run("partial", rows("Verification", 40, 60), run_at=datetime(2026, 3, 15, 9), source=PARTIAL_SOURCE)
+    assert index.detect_regressions("partial") == []
+    assert index.rolling("Verification", days=1, end=date(2026, 3, 14)) is None
+    index.record_run("today", rows("Verification", 89, 11), run_at=datetime(2026, 3, 16, 9))
+    assert index.detect_regressions("today") == []
+
+
+def test_old_display_names_are_migrated_to_metric_keys(tmp_path):
+    path = str(tmp_path / "old.sqlite3")
+    conn = sqlite3.connect(path)
+    conn.executescript("""
+        CREATE TABLE metric_runs (run_id TEXT NOT NULL, run_at TEXT NOT NULL, run_date TEXT NOT NULL,
+            metric TEXT NOT NULL, num_cases INTEGER NOT NULL, num_passed INTEGER NOT NULL,
+            num_errors INTEGER NOT NULL, score_mean REAL, score_std REAL, score_p10 REAL, score_p50 REAL,
+            score_p90 REAL, score_histogram TEXT NOT NULL, cost REAL NOT NULL, PRIMARY KEY (run_id, metric));
+    """)
+    old_row = "(?, '2026-03-02T09:00:00', '2026-03-01', ?, 10, 9, 0, 0.9, 0.1, 0.8, 0.9, 1.0, '[]', 0.1)"
+    conn.execute(f"INSERT INTO metric_runs VALUES {old_row}", ("a", "Verification (Conversational GEval)"))
+    # A run holding both spellings keeps the already-normalized row and drops the duplicate
+    conn.execute(f"INSERT INTO metric_runs VALUES {old_row}", ("b", "Correctness (Conversational GEval)"))
+    conn.execute(f"INSERT INTO metric_runs VALUES {old_row}", ("b", "Correctness"))
+    conn.commit()
+    conn.close()
+
+    index = TrendIndex(path)
+    migrated = index.conn.execute("SELECT run_id, metric, source FROM metric_runs ORDER BY run_id, metric").fetchall()
+    index.close()
+    assert [tuple(row) for row in migrated] == [
+        ("a", "Verification", "nightly"),
+        ("b", "Correctness", "nightly"),
+    ]